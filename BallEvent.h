@@ -0,0 +1,33 @@
+#ifndef _ballEvent_H
+#define _ballEvent_H
+
+#include <sst/core/event.h>
+#include <cstdint>
+
+// The ball passed between pongers and between hyper pongers.  Pongers track
+// the ball's id; hyper pongers only count balls.
+//
+// A ponger forwards the event it received rather than allocating a new one,
+// so new events are only needed when balls are first sent out (and when SST
+// deserializes a ball arriving from another rank); those come from SST's own
+// event mempool.  Build with -DPINGPONG_ALLOCATE_EVENTS to go back to
+// allocating (and deleting) an event on every hop.
+class BallEvent : public SST::Event {
+  public:
+    int64_t ballId;
+    int64_t count;
+
+    BallEvent() : SST::Event(), ballId(0), count(1) { }
+    BallEvent(int64_t ballId, int64_t count = 1) : SST::Event(), ballId(ballId), count(count) { }
+
+    void serialize_order(SST::Core::Serialization::serializer &ser)  override {
+      Event::serialize_order(ser);
+      ser & ballId;
+      ser & count;
+    }
+
+    // Register this event as serializable
+    ImplementSerializable(BallEvent);
+};
+
+#endif
@@ -2,3 +2,5 @@
 
 bool    gVerbose        = false;
 int64_t gArtificialWork = 0;
+std::string gTraceFile;
+bool    gSampling       = false;
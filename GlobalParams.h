@@ -2,8 +2,11 @@
 #define _globalParams_H
 
 #include <cstdint>
+#include <string>
 
 extern bool    gVerbose;
 extern int64_t gArtificialWork;
+extern std::string gTraceFile;  // empty unless tracing (see Trace.h)
+extern bool    gSampling;       // whether this rank's sampler is running (see Sampler.h)
 
 #endif
@@ -1,24 +1,13 @@
 #include <sst/core/sst_config.h>
 #include <sst/core/interfaces/stringEvent.h>
 #include "Ponger.h"
+#include "BallEvent.h"
 #include "GlobalParams.h"
+#include "Trace.h"
+#include "Sampler.h"
 
 using SST::Interfaces::StringEvent;
 
-class BallEvent : public SST::Event {
-  public:
-    int64_t ballId;
-
-    BallEvent() : SST::Event(), ballId(0) { }
-    BallEvent(int64_t ballId) : SST::Event(), ballId(ballId) { }
-    
-    void serialize_order(SST::Core::Serialization::serializer &ser)  override {
-      Event::serialize_order(ser);
-      ser & ballId;
-    }
-    ImplementSerializable(BallEvent);
-};
-
 static double artificialWorkValue = 1.1;
 static double artificialWorkMultiplier = 1.23;
 static void conductArtificialWork(int64_t count) {
@@ -34,18 +23,50 @@ Ponger::Ponger( SST::ComponentId_t id, SST::Params& params )
   ballsHeadingSouth = params.find<int64_t>("ballsHeadingSouth", 0);
   ballsHeadingWest  = params.find<int64_t>("ballsHeadingWest",  0);
   ballsHeadingEast  = params.find<int64_t>("ballsHeadingEast",  0);
+  aggregateBalls    = params.find<bool>   ("aggregateBalls",    false);
 
   northPort = configureLink("northPort", new SST::Event::Handler<Ponger>(this, &Ponger::handleNorthPort));
   southPort = configureLink("southPort", new SST::Event::Handler<Ponger>(this, &Ponger::handleSouthPort));
   westPort  = configureLink("westPort",  new SST::Event::Handler<Ponger>(this, &Ponger::handleWestPort));
   eastPort  = configureLink("eastPort",  new SST::Event::Handler<Ponger>(this, &Ponger::handleEastPort));
 
+  // Connectivity is fixed once the ports are configured (unconnected ports
+  // give back a null link), so resolve where each incoming ball goes now.
+  static const int opposite[4] = { SOUTH, NORTH, EAST, WEST };
+  SST::Link *ports[4] = { northPort, southPort, westPort, eastPort };
+  for(int d = 0; d < 4; d++) {
+    routePort[d] = ports[opposite[d]] ? opposite[d] : (ports[d] ? d : -1);
+    route[d]     = routePort[d] == -1 ? nullptr : ports[routePort[d]];
+  }
+
+  static const char *portNames[4] = { "northPort", "southPort", "westPort", "eastPort" };
+  remotePorts         = params.find<int64_t>("remotePorts", 0);
+  eventsHandled       = registerStatistic<uint64_t>("eventsHandled", params.find<std::string>("thread", ""));
+  crossPartitionSends = registerStatistic<uint64_t>("crossPartitionSends");
+  bounces             = registerStatistic<uint64_t>("bounces");
+  statsEnabled = !eventsHandled->isNullStatistic() || !crossPartitionSends->isNullStatistic() ||
+                 !bounces->isNullStatistic();
+  for(int d = 0; d < 4; d++) {
+    portSends[d] = registerStatistic<uint64_t>("portSends", portNames[d]);
+    statsEnabled = statsEnabled || !portSends[d]->isNullStatistic();
+  }
+
+  std::string traceFile = params.find<std::string>("traceFile", "");
+  if(!traceFile.empty()) { setTraceFile(traceFile); }
+
+  std::string sampleFile = params.find<std::string>("sampleFile", "");
+  sampling = !sampleFile.empty() &&
+             startSampler(sampleFile, params.find<double>("sampleInterval", 1.0), getRank().rank,
+                          params.find<double>("sampleEpoch", 0.0),
+                          [this] { return getCurrentSimCycle(); });
+
 #ifdef ENABLE_SSTDBG
   dbg = new SSTDebug(getName(),"./");
 #endif
 }
 
 Ponger::~Ponger() {
+  if(sampling) { stopSampler(); }
 #ifdef ENABLE_SSTDBG
   delete dbg;
 #endif
@@ -53,75 +74,125 @@ Ponger::~Ponger() {
 
 void Ponger::setup() {
   static int64_t nextBallId = 0;
-
-  auto sendNTimes = [&](int n, SST::Link *link) {
-    for(int i = 0; i < n; i++) {
-      link->send(new BallEvent(nextBallId++));
+  if(sampling) { samplerPhase(SAMPLE_RUN); }
+
+  // A ball heading north leaves the way a ball arriving from the south would.
+  int        from[4]   = { SOUTH, NORTH, EAST, WEST };
+  SST::Link *links[4]  = { route[SOUTH], route[NORTH], route[EAST], route[WEST] };
+  int64_t    counts[4] = { ballsHeadingNorth, ballsHeadingSouth, ballsHeadingWest, ballsHeadingEast };
+
+  if(aggregateBalls) {
+    // Every ball leaving through the same link travels in one event.  Two
+    // balls that leave together arrive together and, since no two ports route
+    // to the same link, keep travelling together, so this is the only place
+    // balls need to be combined.
+    for(int i = 0; i < 4; i++) {
+      if(!links[i] || counts[i] == 0) { continue; }
+      for(int j = i+1; j < 4; j++) {
+        if(links[j] == links[i]) { counts[i] += counts[j]; counts[j] = 0; }
+      }
+      if(!gTraceFile.empty()) {
+        traceSend(getRank().rank, getCurrentSimCycle(), getId(), nextBallId, counts[i], -1, routePort[from[i]]);
+      }
+      links[i]->send(new BallEvent(nextBallId, counts[i]));
+      nextBallId += counts[i];
+      if(statsEnabled) { recordSend(routePort[from[i]], counts[i]); }
     }
-  };
-
-  if(ballsHeadingNorth > 0) {
-         if(isPortConnected("northPort")) { sendNTimes(ballsHeadingNorth, northPort); }
-    else if(isPortConnected("southPort")) { sendNTimes(ballsHeadingNorth, southPort); }
-  }
-
-  if(ballsHeadingSouth > 0) {
-         if(isPortConnected("southPort")) { sendNTimes(ballsHeadingSouth, southPort); }
-    else if(isPortConnected("northPort")) { sendNTimes(ballsHeadingSouth, northPort); }
-  }
-
-  if(ballsHeadingWest > 0) {
-         if(isPortConnected("westPort")) { sendNTimes(ballsHeadingWest, westPort); }
-    else if(isPortConnected("eastPort")) { sendNTimes(ballsHeadingWest, eastPort); }
+    return;
   }
 
-  if(ballsHeadingEast > 0) {
-         if(isPortConnected("eastPort")) { sendNTimes(ballsHeadingEast, eastPort); }
-    else if(isPortConnected("westPort")) { sendNTimes(ballsHeadingEast, westPort); }
+  for(int i = 0; i < 4; i++) {
+    if(!links[i]) { continue; }
+    for(int64_t n = 0; n < counts[i]; n++) {
+      if(!gTraceFile.empty()) {
+        traceSend(getRank().rank, getCurrentSimCycle(), getId(), nextBallId, 1, -1, routePort[from[i]]);
+      }
+      links[i]->send(new BallEvent(nextBallId++));
+    }
+    if(statsEnabled && counts[i] > 0) { recordSend(routePort[from[i]], counts[i]); }
   }
 }
 
-void Ponger::finish() { }
+void Ponger::finish() {
+  if(!gTraceFile.empty()) { flushTrace(); }
+  if(sampling) { stopSampler(); }
+}
 
 bool Ponger::tick( SST::Cycle_t currentCycle ) {
   return false;
 }
 
-void Ponger::handlePort(
-  BallEvent *ev, const char *dirString, const char *portName,
-  SST::Link *portLink, const char *oppositePortName, SST::Link *oppositePortLink)
-{
+void Ponger::recordSend(int port, int64_t count) {
+  portSends[port]->addData(count);
+  if(remotePorts & (1 << port)) {
+    crossPartitionSends->addData(count);
+  }
+}
+
+void Ponger::handlePort(BallEvent *ev, const char *dirString, int from) {
+  SST::Link *outLink = route[from];
   int64_t ballId = ev->ballId;
-  conductArtificialWork(gArtificialWork);
+  // The work stands in for handling each ball, aggregated or not.
+  conductArtificialWork(gArtificialWork * ev->count);
+  countEvents(1);
 
   if(gVerbose) {
     std::cout << std::setw(10) << getElapsedSimTime().toStringBestSI() << " | "
-              << dirString << getName() << " ballid=" << ballId << std::endl;
+              << dirString << getName() << " ballid=" << ballId;
+    if(ev->count > 1) {
+      std::cout << " count=" << ev->count;
+    }
+    std::cout << std::endl;
   }
 
-  if(isPortConnected(oppositePortName)) {
-    oppositePortLink->send(new BallEvent(ballId));
-  } else if(isPortConnected(portName)) {
-    portLink->send(new BallEvent(ballId));
+  if(!gTraceFile.empty() && outLink) {
+    traceSend(getRank().rank, getCurrentSimCycle(), getId(), ballId, ev->count, from, routePort[from]);
   }
 
+  if(statsEnabled) {
+    eventsHandled->addData(ev->count);
+    if(routePort[from] == from) { bounces->addData(ev->count); }
+    if(outLink)                 { recordSend(routePort[from], ev->count); }
+  }
+
+#ifdef PINGPONG_ALLOCATE_EVENTS
+  if(outLink) {
+    outLink->send(new BallEvent(ballId, ev->count));
+  }
   delete ev;
+#else
+  // The event now belongs to us, so pass it along as is.
+  if(outLink) {
+    outLink->send(ev);
+  } else {
+    delete ev;
+  }
+#endif
+}
+
+// Every event arriving on a ponger's ports is a BallEvent.
+static inline BallEvent *asBall(SST::Event *ev) {
+#ifdef PINGPONG_ALLOCATE_EVENTS
+  return dynamic_cast<BallEvent*>(ev);
+#else
+  return static_cast<BallEvent*>(ev);
+#endif
 }
 
 void Ponger::handleNorthPort(SST::Event *ev) {
-  handlePort(dynamic_cast<BallEvent*>(ev), "vvvvvv ", "northPort", northPort, "southPort", southPort);
+  handlePort(asBall(ev), "vvvvvv ", NORTH);
 }
 
 void Ponger::handleSouthPort(SST::Event *ev) {
-  handlePort(dynamic_cast<BallEvent*>(ev), "^^^^^^ ", "southPort", southPort, "northPort", northPort);
+  handlePort(asBall(ev), "^^^^^^ ", SOUTH);
 }
 
 void Ponger::handleWestPort(SST::Event *ev) {
-  handlePort(dynamic_cast<BallEvent*>(ev), "-----> ", "westPort", westPort, "eastPort", eastPort);
+  handlePort(asBall(ev), "-----> ", WEST);
 }
 
 void Ponger::handleEastPort(SST::Event *ev) {
-  handlePort(dynamic_cast<BallEvent*>(ev), "<----- ", "eastPort", eastPort, "westPort", westPort);
+  handlePort(asBall(ev), "<----- ", EAST);
 }
 
 #ifdef ENABLE_SSTDBG
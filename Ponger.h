@@ -37,7 +37,14 @@ class Ponger : public SST::Component {
      { "ballsHeadingNorth", "Balls currently heading north", "0" },
      { "ballsHeadingSouth", "Balls currently heading south", "0" },
      { "ballsHeadingWest",  "Balls currently heading west",  "0" },
-     { "ballsHeadingEast",  "Balls currently heading east",  "0" } 
+     { "ballsHeadingEast",  "Balls currently heading east",  "0" },
+     { "aggregateBalls",    "Send the balls leaving through the same port together as one event", "false" },
+     { "remotePorts",       "Bit mask (1 north, 2 south, 4 west, 8 east) of the ports whose neighbor is on another rank or thread", "0" },
+     { "thread",            "Thread the ponger runs on, used as the eventsHandled statistic's subId", "" },
+     { "traceFile",         "Record every ball sent to <traceFile>_<rank>.bin (see Trace.h)", "" },
+     { "sampleFile",        "Sample the rank's memory and progress to <sampleFile>_<rank>.bin (see Sampler.h)", "" },
+     { "sampleInterval",    "Seconds of wall-clock time between samples", "1.0" },
+     { "sampleEpoch",       "When the builder started sampling, in seconds since 1970; the samples continue its file (see sampler.py)", "0" }
     )
 
     // Port name, description, event type
@@ -48,16 +55,25 @@ class Ponger : public SST::Component {
       { "eastPort",  "Port to east",  {"pingpong.BallEvent"}}
     )
 
+    // Statistic name, description, units, enable level.  Statistics count
+    // balls; with --aggregate an event can carry several, so the statistics'
+    // Count field gives events and their Sum gives balls.
+    SST_ELI_DOCUMENT_STATISTICS(
+      { "eventsHandled",       "Balls handled (subId is the ponger's thread)",               "balls", 1 },
+      { "crossPartitionSends", "Balls sent to a ponger on another rank or thread",           "balls", 1 },
+      { "bounces",             "Balls sent back out the port they arrived on",               "balls", 2 },
+      { "portSends",           "Balls sent out each port (subId is the port)",               "balls", 3 }
+    )
 
 #ifdef ENABLE_SSTDBG
     void printStatus(SST::Output& out) override;
 #endif
 
   private:
-    void handlePort(
-      BallEvent *ev, const char *dirString, const char *portName,
-      SST::Link *portLink, const char *oppositePortName,
-      SST::Link *oppositePortLink);
+    enum Direction { NORTH, SOUTH, WEST, EAST };
+
+    void handlePort(BallEvent *ev, const char *dirString, int from);
+    void recordSend(int port, int64_t count);
 
     void handleNorthPort(SST::Event *ev);
     void handleSouthPort(SST::Event *ev);
@@ -68,10 +84,23 @@ class Ponger : public SST::Component {
     int64_t ballsHeadingSouth;
     int64_t ballsHeadingWest;
     int64_t ballsHeadingEast;
-    
+    bool aggregateBalls;
+    bool sampling;  // whether this ponger started the rank's sampler
 
     SST::Link *northPort, *southPort, *westPort, *eastPort;
 
+    // route[d] is the link a ball arriving on the port facing direction d
+    // leaves on: the opposite port, or back out the same port if there's no
+    // neighbor on the opposite side (nullptr if neither is connected).
+    SST::Link *route[4];
+    int routePort[4];  // the Direction of route[d]'s port, or -1
+
+    // Statistics are only recorded when at least one is enabled.
+    bool statsEnabled;
+    int64_t remotePorts;
+    SST::Statistics::Statistic<uint64_t> *eventsHandled, *crossPartitionSends, *bounces;
+    SST::Statistics::Statistic<uint64_t> *portSends[4];
+
 #ifdef ENABLE_SSTDBG
     SSTDebug *dbg;
 #endif
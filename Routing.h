@@ -0,0 +1,82 @@
+#ifndef _routing_H
+#define _routing_H
+
+#include <cstddef>
+#include <cstdint>
+#include <vector>
+
+// How a hyper ponger picks the port a ball leaves through: a PCG32 random
+// number picks from an alias table of the connected ports' weights, so a pick
+// costs a multiply, a compare, and two loads however many ports there are.
+
+// O'Neill's PCG32 (pcg32_random_r).  Every component gets its own stream, so
+// components seeded with the same seed still draw different numbers.
+class Pcg32 {
+  public:
+    Pcg32(uint64_t seed = 0, uint64_t stream = 0) {
+      state = 0;
+      increment = (stream << 1) | 1;
+      next();
+      state += seed;
+      next();
+    }
+
+    uint32_t next() {
+      uint64_t old = state;
+      state = old * 6364136223846793005ULL + increment;
+      uint32_t xorShifted = static_cast<uint32_t>(((old >> 18) ^ old) >> 27);
+      uint32_t rotation = static_cast<uint32_t>(old >> 59);
+      return (xorShifted >> rotation) | (xorShifted << ((32 - rotation) & 31));
+    }
+
+  private:
+    uint64_t state, increment;
+};
+
+// Walker's alias method (built with Vose's algorithm): column i is kept with
+// chance threshold[i] / 2^32 and otherwise gives way to alias[i].
+class AliasTable {
+  public:
+    void build(const std::vector<double> &weights) {
+      size_t n = weights.size();
+      threshold.assign(n, 1ULL << 32);
+      alias.resize(n);
+      double total = 0;
+      for(double weight : weights) { total += weight; }
+
+      std::vector<double> scaled(n);
+      std::vector<size_t> small, large;
+      for(size_t i = 0; i < n; i++) {
+        alias[i] = i;
+        // All weights zero picks uniformly
+        scaled[i] = total > 0 ? weights[i] * n / total : 1.0;
+        (scaled[i] < 1.0 ? small : large).push_back(i);
+      }
+      while(!small.empty() && !large.empty()) {
+        size_t s = small.back(), l = large.back();
+        small.pop_back();
+        threshold[s] = static_cast<uint64_t>(scaled[s] * 4294967296.0);
+        alias[s] = l;
+        scaled[l] -= 1.0 - scaled[s];
+        if(scaled[l] < 1.0) {
+          large.pop_back();
+          small.push_back(l);
+        }
+      }
+      // What's left is within rounding of 1 and keeps its column
+    }
+
+    // One 32 bit random number r picks both: the high half of r * n is the
+    // column (without the bias of r % n) and the low half is uniform within it.
+    size_t pick(uint32_t r) const {
+      uint64_t scaled = static_cast<uint64_t>(r) * threshold.size();
+      size_t column = static_cast<size_t>(scaled >> 32);
+      return (scaled & 0xFFFFFFFFULL) < threshold[column] ? column : alias[column];
+    }
+
+  private:
+    std::vector<uint64_t> threshold;
+    std::vector<size_t> alias;
+};
+
+#endif
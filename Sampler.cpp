@@ -0,0 +1,151 @@
+#include "Sampler.h"
+#include <chrono>
+#include <condition_variable>
+#include <cstdio>
+#include <mutex>
+#include <thread>
+#include <vector>
+#include <sys/resource.h>
+#include <unistd.h>
+
+namespace {
+  // The counters of the running threads, and the counts of those that exited
+  std::mutex countersLock;
+  std::vector<EventCounter*> counters;
+  uint64_t exitedCount = 0;
+
+  uint64_t totalEvents() {
+    std::lock_guard<std::mutex> guard(countersLock);
+    uint64_t total = exitedCount;
+    for(EventCounter *counter : counters) {
+      total += counter->count.load(std::memory_order_relaxed);
+    }
+    return total;
+  }
+
+  uint64_t residentBytes() {
+    unsigned long size, resident;
+    FILE *statm = fopen("/proc/self/statm", "r");
+    if(statm) {
+      int fields = fscanf(statm, "%lu %lu", &size, &resident);
+      fclose(statm);
+      if(fields == 2) { return resident * static_cast<uint64_t>(sysconf(_SC_PAGESIZE)); }
+    }
+    // Without /proc, the peak is the best there is
+    struct rusage usage;
+    getrusage(RUSAGE_SELF, &usage);
+#ifdef __APPLE__
+    return usage.ru_maxrss;
+#else
+    return usage.ru_maxrss * 1024;
+#endif
+  }
+
+  double wallClock() {
+    return std::chrono::duration<double>(std::chrono::system_clock::now().time_since_epoch()).count();
+  }
+
+  struct Sampler {
+    std::mutex lock;
+    std::condition_variable wake;
+    std::thread thread;
+    bool started = false;
+    bool stopping = false;
+    FILE *file = nullptr;
+    double interval = 1.0;
+    std::function<uint64_t()> simCycle;
+    std::atomic<uint32_t> phase{SAMPLE_CONSTRUCT};
+    double epoch = 0;  // seconds since 1970 the samples are timed from
+
+    ~Sampler() { stop(); }
+
+    // Called with the lock held
+    void sample() {
+      SampleRecord record;
+      record.wallTime = wallClock() - epoch;
+      record.simCycle = simCycle();
+      record.events   = totalEvents();
+      record.rssBytes = residentBytes();
+      record.phase    = phase.load();
+      record.padding  = 0;
+      fwrite(&record, sizeof(record), 1, file);
+      // So a running job's progress can be read
+      fflush(file);
+    }
+
+    void run() {
+      std::unique_lock<std::mutex> guard(lock);
+      while(!wake.wait_for(guard, std::chrono::duration<double>(interval), [this] { return stopping; })) {
+        sample();
+      }
+    }
+
+    void stop() {
+      {
+        std::lock_guard<std::mutex> guard(lock);
+        if(!thread.joinable()) { return; }
+        phase = SAMPLE_FINISH;
+        sample();
+        stopping = true;
+      }
+      wake.notify_all();
+      thread.join();
+      fclose(file);
+      file = nullptr;
+      gSampling = false;
+    }
+  };
+
+  Sampler sampler;
+}
+
+thread_local EventCounter tEventCounter;
+
+EventCounter::EventCounter() {
+  std::lock_guard<std::mutex> guard(countersLock);
+  counters.push_back(this);
+}
+
+EventCounter::~EventCounter() {
+  std::lock_guard<std::mutex> guard(countersLock);
+  exitedCount += count.load();
+  for(size_t i = 0; i < counters.size(); i++) {
+    if(counters[i] == this) {
+      counters[i] = counters.back();
+      counters.pop_back();
+      break;
+    }
+  }
+}
+
+bool startSampler(const std::string &file, double interval, uint32_t rank, double epoch,
+                  std::function<uint64_t()> simCycle) {
+  std::lock_guard<std::mutex> guard(sampler.lock);
+  if(sampler.started) { return false; }
+  sampler.started = true;
+
+  std::string path = file + "_" + std::to_string(rank) + ".bin";
+  // The builder's samples, if it took any, come first
+  sampler.file = fopen(path.c_str(), epoch > 0 ? "ab" : "wb");
+  if(!sampler.file) {
+    fprintf(stderr, "Couldn't open sample file %s, not sampling\n", path.c_str());
+    return false;
+  }
+  sampler.interval = interval;
+  sampler.simCycle = simCycle;
+  sampler.epoch    = epoch > 0 ? epoch : wallClock();
+  gSampling = true;
+  sampler.sample();
+  sampler.thread = std::thread([] { sampler.run(); });
+  return true;
+}
+
+void samplerPhase(SamplePhase phase) {
+  if(!gSampling || sampler.phase.exchange(phase) == phase) { return; }
+  std::lock_guard<std::mutex> guard(sampler.lock);
+  if(sampler.file) { sampler.sample(); }
+}
+
+void stopSampler() {
+  sampler.stop();
+}
@@ -0,0 +1,61 @@
+#ifndef _sampler_H
+#define _sampler_H
+
+#include <atomic>
+#include <cstdint>
+#include <functional>
+#include <string>
+#include "GlobalParams.h"
+
+// A run with a sample file (the pongers' sampleFile parameter, set by the
+// builders' --sample option) has a thread on every rank that records, every
+// sampleInterval seconds of wall-clock time, one SampleRecord of the rank's
+// resident set size, the simulated time it has reached, and the events its
+// components have handled, to <sampleFile>_<rank>.bin.  It also records one
+// whenever the rank moves to the next phase (constructing its components,
+// running, finishing), so where the memory peak comes from and how far a
+// long run has got are visible while it runs.  results.py reads the files.
+//
+// The first ponger constructed on a rank starts the sampler and stops it in
+// its finish().  That is after the builder has run and SST has partitioned
+// the model, so the builders sample those phases themselves (sampler.py) and
+// pass their start as sampleEpoch; the sampler then appends to their file,
+// timing its samples from the same start.
+struct SampleRecord {
+  double   wallTime;  // seconds since the sampler (or the builder's) started
+  uint64_t simCycle;  // simulated time reached, in core time units (ps)
+  uint64_t events;    // events handled by the rank's components so far
+  uint64_t rssBytes;  // the rank's resident set size
+  uint32_t phase;     // a SamplePhase
+  uint32_t padding;
+};
+static_assert(sizeof(SampleRecord) == 40, "results.py expects 40 byte records");
+
+// BUILD and PARTITION are only recorded by the builders (sampler.py)
+enum SamplePhase { SAMPLE_BUILD = 0, SAMPLE_PARTITION = 1, SAMPLE_CONSTRUCT = 2,
+                   SAMPLE_RUN = 3, SAMPLE_FINISH = 4 };
+
+// Returns true for the caller that started the sampler; simCycle is called
+// from the sampler's thread, so it must stay valid until stopSampler().  A
+// nonzero epoch (seconds since 1970) is when the builder started sampling.
+bool startSampler(const std::string &file, double interval, uint32_t rank, double epoch,
+                  std::function<uint64_t()> simCycle);
+void samplerPhase(SamplePhase phase);
+void stopSampler();
+
+// Every thread counts its own events, so counting never contends.
+struct EventCounter {
+  std::atomic<uint64_t> count{0};
+  EventCounter();
+  ~EventCounter();
+};
+extern thread_local EventCounter tEventCounter;
+
+inline void countEvents(int64_t n) {
+  if(gSampling) {
+    tEventCounter.count.store(tEventCounter.count.load(std::memory_order_relaxed) + n,
+                              std::memory_order_relaxed);
+  }
+}
+
+#endif
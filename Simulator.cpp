@@ -2,6 +2,7 @@
 #include <sst/core/interfaces/stringEvent.h>
 #include "Simulator.h"
 #include "GlobalParams.h"
+#include "Trace.h"
 #include <string>
 
 Simulator::Simulator(SST::ComponentId_t id, SST::Params& params)
@@ -10,6 +11,8 @@ Simulator::Simulator(SST::ComponentId_t id, SST::Params& params)
   timeToRun       = params.find<int64_t>("timeToRun",      100);
   gVerbose        = params.find<bool>   ("verbose",        false);
   gArtificialWork = params.find<int64_t>("artificialWork", 0);
+  std::string traceFile = params.find<std::string>("traceFile", "");
+  if(!traceFile.empty()) { setTraceFile(traceFile); }
 
   registerClock(std::to_string(timeToRun) + "ps", new SST::Clock::Handler<Simulator>(this, &Simulator::clockTick));
 
@@ -33,7 +33,8 @@ class Simulator : public SST::Component {
     SST_ELI_DOCUMENT_PARAMS(
       { "timeToRun",      "How long to run the simulation (in sec)", "100s" },
       { "verbose",        "Print verbose debugging output", "false" },
-      { "artificialWork", "Add an artificial delay to message processing", "0"}
+      { "artificialWork", "Add an artificial delay to message processing", "0"},
+      { "traceFile",      "Record every ball sent to <traceFile>_<rank>.bin (see Trace.h)", ""}
     )
 
 #ifdef ENABLE_SSTDBG
@@ -0,0 +1,193 @@
+#include <sst/core/sst_config.h>
+#include "TilePonger.h"
+#include "GlobalParams.h"
+#include "Sampler.h"
+#include <string>
+
+class TileEvent : public SST::Event {
+  public:
+    TileEvent() : SST::Event() { }
+    TileEvent(std::vector<int32_t> &offsets, std::vector<int64_t> &counts)
+      : SST::Event(), offsets(offsets), counts(counts) { }
+
+    std::vector<int32_t> offsets;
+    std::vector<int64_t> counts;
+
+    void serialize_order(SST::Core::Serialization::serializer &ser)  override {
+      Event::serialize_order(ser);
+      ser & offsets;
+      ser & counts;
+    }
+
+    // Register this event as serializable
+    ImplementSerializable(TileEvent);
+};
+
+static double artificialWorkValue = 1.1;
+static double artificialWorkMultiplier = 1.23;
+static void conductArtificialWork(int64_t count) {
+  for(int64_t i = 0; i < count; i++) {
+    artificialWorkValue *= artificialWorkMultiplier;
+  }
+}
+
+static const int     opposite[4] = { 1, 0, 3, 2 };
+static const int64_t rowStep[4]  = { -1, 1, 0, 0 };
+static const int64_t colStep[4]  = { 0, 0, -1, 1 };
+
+TilePonger::TilePonger( SST::ComponentId_t id, SST::Params& params )
+  : SST::Component(id)
+{
+  gridRows = params.find<int64_t>("gridRows", 1);
+  gridCols = params.find<int64_t>("gridCols", 1);
+  firstRow = params.find<int64_t>("firstRow", 0);
+  firstCol = params.find<int64_t>("firstCol", 0);
+  rows     = params.find<int64_t>("rows",     1);
+  cols     = params.find<int64_t>("cols",     1);
+  int64_t edgeDelay = params.find<int64_t>("edgeDelay", 50);
+
+  for(int b = 0; b < 2; b++) {
+    for(int h = 0; h < 4; h++) {
+      balls[b][h].assign(rows * cols, 0);
+    }
+  }
+  fill = 0;
+  pending = 0;
+
+  std::vector<int64_t> initialBalls;
+  params.find_array<int64_t>("balls", initialBalls);
+  for(size_t i = 0; i + 2 < initialBalls.size(); i += 3) {
+    balls[fill][initialBalls[i+1]][initialBalls[i]] += initialBalls[i+2];
+    pending += initialBalls[i+2];
+  }
+
+  ports[NORTH] = configureLink("northPort", new SST::Event::Handler<TilePonger>(this, &TilePonger::handleNorthPort));
+  ports[SOUTH] = configureLink("southPort", new SST::Event::Handler<TilePonger>(this, &TilePonger::handleSouthPort));
+  ports[WEST]  = configureLink("westPort",  new SST::Event::Handler<TilePonger>(this, &TilePonger::handleWestPort));
+  ports[EAST]  = configureLink("eastPort",  new SST::Event::Handler<TilePonger>(this, &TilePonger::handleEastPort));
+
+  clockOn = true;
+  clockHandler = new SST::Clock::Handler<TilePonger>(this, &TilePonger::clockTick);
+  clockTc = registerClock(std::to_string(edgeDelay) + "ps", clockHandler);
+
+  std::string sampleFile = params.find<std::string>("sampleFile", "");
+  sampling = !sampleFile.empty() &&
+             startSampler(sampleFile, params.find<double>("sampleInterval", 1.0), getRank().rank,
+                          params.find<double>("sampleEpoch", 0.0),
+                          [this] { return getCurrentSimCycle(); });
+}
+
+TilePonger::~TilePonger() {
+  if(sampling) { stopSampler(); }
+}
+
+void TilePonger::setup() {
+  if(sampling) { samplerPhase(SAMPLE_RUN); }
+}
+
+void TilePonger::finish() {
+  if(sampling) { stopSampler(); }
+}
+
+void TilePonger::arrive(int64_t ponger, int heading, int64_t count) {
+  balls[fill][heading][ponger] += count;
+  pending += count;
+}
+
+bool TilePonger::clockTick( SST::Cycle_t currentCycle ) {
+  int now = fill;
+  fill ^= 1;
+  pending = 0;
+
+  auto inGrid = [&](int64_t r, int64_t c) {
+    return r >= 0 && r < gridRows && c >= 0 && c < gridCols;
+  };
+
+  // A ball keeps heading the same way if there's a ponger to go to and
+  // otherwise bounces back the way it came.
+  int64_t moved = 0;
+  for(int h = 0; h < 4; h++) {
+    std::vector<int64_t> &in = balls[now][h];
+    for(int64_t p = 0; p < rows * cols; p++) {
+      int64_t count = in[p];
+      if(count == 0) { continue; }
+      in[p] = 0;
+      moved += count;
+
+      int64_t row = p / cols, col = p % cols;
+      int64_t gridRow = firstRow + row, gridCol = firstCol + col;
+      int out = h;
+      if(!inGrid(gridRow + rowStep[h], gridCol + colStep[h])) {
+        out = opposite[h];
+      }
+      int64_t r = gridRow + rowStep[out], c = gridCol + colStep[out];
+      if(!inGrid(r, c)) {
+        continue;  // a lone ponger: the ball has nowhere to go
+      }
+
+      r -= firstRow;
+      c -= firstCol;
+      if(r >= 0 && r < rows && c >= 0 && c < cols) {
+        arrive(r * cols + c, out, count);
+      } else {
+        outOffsets[out].push_back((out == NORTH || out == SOUTH) ? col : row);
+        outCounts[out].push_back(count);
+      }
+    }
+  }
+
+  conductArtificialWork(gArtificialWork * moved);
+  // The events the pongers the tile stands in for would have handled
+  countEvents(moved);
+
+  for(int d = 0; d < 4; d++) {
+    if(outCounts[d].empty()) { continue; }
+    ports[d]->send(new TileEvent(outOffsets[d], outCounts[d]));
+    outOffsets[d].clear();
+    outCounts[d].clear();
+  }
+
+  if(gVerbose && moved > 0) {
+    std::cout << std::setw(10) << getElapsedSimTime().toStringBestSI() << " | "
+              << getName() << " moved=" << moved << std::endl;
+  }
+
+  // Sleep until another tile sends us a ball.
+  if(pending == 0) {
+    clockOn = false;
+    unregisterClock(clockTc, clockHandler);
+  }
+  return false;
+}
+
+void TilePonger::handlePort(TileEvent *ev, int heading, int64_t row, int64_t col, bool alongRow) {
+  for(size_t i = 0; i < ev->offsets.size(); i++) {
+    int64_t r = alongRow ? row : ev->offsets[i];
+    int64_t c = alongRow ? ev->offsets[i] : col;
+    arrive(r * cols + c, heading, ev->counts[i]);
+  }
+  delete ev;
+
+  if(!clockOn) {
+    clockOn = true;
+    reregisterClock(clockTc, clockHandler);
+  }
+}
+
+// Balls arriving on the north port are heading south into the tile's first
+// row, and so on.
+void TilePonger::handleNorthPort(SST::Event *ev) {
+  handlePort(static_cast<TileEvent*>(ev), SOUTH, 0, 0, true);
+}
+
+void TilePonger::handleSouthPort(SST::Event *ev) {
+  handlePort(static_cast<TileEvent*>(ev), NORTH, rows-1, 0, true);
+}
+
+void TilePonger::handleWestPort(SST::Event *ev) {
+  handlePort(static_cast<TileEvent*>(ev), EAST, 0, 0, false);
+}
+
+void TilePonger::handleEastPort(SST::Event *ev) {
+  handlePort(static_cast<TileEvent*>(ev), WEST, 0, cols-1, false);
+}
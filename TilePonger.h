@@ -0,0 +1,95 @@
+#ifndef _tilePonger_H
+#define _tilePonger_H
+
+#include <sst/core/component.h>
+#include <sst/core/link.h>
+#include <vector>
+
+class TileEvent;
+
+// A tile ponger stands in for a rows x cols block of pongers.  Balls moving
+// between pongers inside the tile are array updates; only balls crossing the
+// tile's edge travel over a link, one link per side.  Every edgeDelay the
+// tile moves every ball it holds one ponger along, exactly as the pongers it
+// replaces would, so a grid of tiles follows the same ball trajectories as
+// the grid of pongers.
+//
+// SST runs clock handlers before delivering events that arrive at the same
+// time, so links between tiles must have a latency of edgeDelay - 1: a ball
+// leaving on one tick then arrives before the neighboring tile's next tick.
+class TilePonger : public SST::Component {
+  public:
+    TilePonger( SST::ComponentId_t id, SST::Params& params );
+    ~TilePonger();
+
+    void setup() override;
+    void finish() override;
+
+    // Register the component
+    SST_ELI_REGISTER_COMPONENT(
+      TilePonger,   // class
+      "pingpong",   // element library
+      "tilePonger", // component
+      SST_ELI_ELEMENT_VERSION( 1, 0, 0 ),
+      "component that simulates a block of pongers, passing balls between them internally and over links at the block's edges",
+      COMPONENT_CATEGORY_UNCATEGORIZED
+    )
+
+    // Parameter name, description, default value
+    SST_ELI_DOCUMENT_PARAMS(
+     { "gridRows",  "Rows of pongers in the whole grid",                "1" },
+     { "gridCols",  "Columns of pongers in the whole grid",             "1" },
+     { "firstRow",  "Grid row of the tile's north west ponger",         "0" },
+     { "firstCol",  "Grid column of the tile's north west ponger",      "0" },
+     { "rows",      "Rows of pongers in the tile",                      "1" },
+     { "cols",      "Columns of pongers in the tile",                   "1" },
+     { "edgeDelay", "Time (in ps) for a ball to reach the next ponger", "50" },
+     { "balls",     "Initial balls as [ponger, direction, count, ...] triples; pongers are numbered row by row within the tile and directions are 0-3 for north, south, west, east", "[]" },
+     { "sampleFile",     "Sample the rank's memory and progress to <sampleFile>_<rank>.bin (see Sampler.h)", "" },
+     { "sampleInterval", "Seconds of wall-clock time between samples", "1.0" },
+     { "sampleEpoch",    "When the builder started sampling, in seconds since 1970; the samples continue its file (see sampler.py)", "0" }
+    )
+
+    // Port name, description, event type
+    SST_ELI_DOCUMENT_PORTS(
+      { "northPort", "Port to the tile to the north", {"pingpong.TileEvent"}},
+      { "southPort", "Port to the tile to the south", {"pingpong.TileEvent"}},
+      { "westPort" , "Port to the tile to the west",  {"pingpong.TileEvent"}},
+      { "eastPort",  "Port to the tile to the east",  {"pingpong.TileEvent"}}
+    )
+
+  private:
+    enum Direction { NORTH, SOUTH, WEST, EAST };
+
+    bool clockTick( SST::Cycle_t currentCycle );
+    void arrive(int64_t ponger, int heading, int64_t count);
+    void handlePort(TileEvent *ev, int heading, int64_t row, int64_t col, bool alongRow);
+
+    void handleNorthPort(SST::Event *ev);
+    void handleSouthPort(SST::Event *ev);
+    void handleWestPort(SST::Event *ev);
+    void handleEastPort(SST::Event *ev);
+
+    int64_t gridRows, gridCols, firstRow, firstCol, rows, cols;
+
+    // balls[b][h][p] is the number of balls that arrived at ponger p heading
+    // in direction h.  On each tick the tile moves the balls in one buffer
+    // and fills the other, which also collects balls arriving from other
+    // tiles before the next tick.
+    std::vector<int64_t> balls[2][4];
+    int fill;
+    int64_t pending;  // balls in balls[fill]
+
+    // Balls leaving through each side on this tick: offset along the side
+    // (column for north/south, row for west/east) and count.
+    std::vector<int32_t> outOffsets[4];
+    std::vector<int64_t> outCounts[4];
+
+    SST::Link *ports[4];
+    bool sampling;  // whether this tile started the rank's sampler
+    bool clockOn;
+    SST::TimeConverter *clockTc;
+    SST::Clock::Handler<TilePonger> *clockHandler;
+};
+
+#endif
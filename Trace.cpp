@@ -0,0 +1,78 @@
+#include "Trace.h"
+#include "GlobalParams.h"
+#include <cstdio>
+#include <mutex>
+#include <string>
+#include <vector>
+
+namespace {
+  const size_t bufferRecords = 1 << 15;  // 1 MiB per thread
+
+  // One file per rank, shared by its threads.  The threads only take the lock
+  // to write out a full buffer.
+  struct TraceFile {
+    std::mutex lock;
+    FILE *file = nullptr;
+    bool failed = false;
+
+    ~TraceFile() {
+      if(file) { fclose(file); }
+    }
+
+    void write(uint32_t rank, const std::vector<TraceRecord> &records) {
+      std::lock_guard<std::mutex> guard(lock);
+      if(!file && !failed) {
+        std::string path = gTraceFile + "_" + std::to_string(rank) + ".bin";
+        file = fopen(path.c_str(), "wb");
+        if(!file) {
+          fprintf(stderr, "Couldn't open trace file %s, not tracing\n", path.c_str());
+          failed = true;
+        }
+      }
+      if(failed) { return; }
+      fwrite(records.data(), sizeof(TraceRecord), records.size(), file);
+    }
+  };
+
+  TraceFile traceFile;
+  std::mutex traceFileNameLock;
+
+  struct TraceBuffer {
+    uint32_t rank = 0;
+    std::vector<TraceRecord> records;
+
+    // Threads that exit with records left (they normally flush in finish())
+    // write them out on the way.
+    ~TraceBuffer() { flush(); }
+
+    void flush() {
+      if(records.empty()) { return; }
+      traceFile.write(rank, records);
+      records.clear();
+    }
+  };
+
+  thread_local TraceBuffer buffer;
+}
+
+void setTraceFile(const std::string &file) {
+  std::lock_guard<std::mutex> guard(traceFileNameLock);
+  if(gTraceFile.empty()) { gTraceFile = file; }
+}
+
+void traceSend(uint32_t rank, uint64_t time, uint64_t component, int64_t ballId,
+               int64_t count, int inPort, int outPort) {
+  if(buffer.records.capacity() == 0) {
+    buffer.records.reserve(bufferRecords);
+  }
+  buffer.rank = rank;
+  buffer.records.push_back({time, component, ballId, static_cast<int32_t>(count),
+                            static_cast<int16_t>(inPort), static_cast<int16_t>(outPort)});
+  if(buffer.records.size() == bufferRecords) {
+    buffer.flush();
+  }
+}
+
+void flushTrace() {
+  buffer.flush();
+}
@@ -0,0 +1,36 @@
+#ifndef _trace_H
+#define _trace_H
+
+#include <cstdint>
+#include <string>
+
+// A run with a trace file (the traceFile parameter of the simulator and the
+// pongers, set by the builders' --trace option) records one
+// fixed-size TraceRecord for every ball a ponger sends, in place of the
+// verbose log.  Records are collected in a buffer per thread and written to
+// <traceFile>_<rank>.bin in large blocks, so tracing neither flushes on every
+// hop nor makes threads wait on each other.  Records from different threads
+// are interleaved block by block and aren't in time order; trace.py reads the
+// files back.
+struct TraceRecord {
+  uint64_t time;       // simulated time of the send, in core time units (ps)
+  uint64_t component;  // id of the sending component
+  int64_t  ballId;     // the first ball's id (always 0 for hyper pongers)
+  int32_t  count;      // balls in the event
+  int16_t  inPort;     // port the ball arrived on, -1 if it's being sent out for the first time (or not known)
+  int16_t  outPort;    // port the ball leaves on
+};
+static_assert(sizeof(TraceRecord) == 32, "trace.py expects 32 byte records");
+
+// Sets gTraceFile; every component given the parameter calls it, from
+// whichever thread constructs it, so the rank's pongers trace even where the
+// simulator is on another rank.
+void setTraceFile(const std::string &file);
+
+void traceSend(uint32_t rank, uint64_t time, uint64_t component, int64_t ballId,
+               int64_t count, int inPort, int outPort);
+
+// Writes out the calling thread's buffered records.
+void flushTrace();
+
+#endif
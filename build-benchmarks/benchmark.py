@@ -0,0 +1,179 @@
+# Times the model builders' graph construction without SST.
+#
+# Each builder is executed under the stand-in `sst` module in this directory
+# (see sst.py) for every combination of side length, rank count, thread count,
+# and ball placement pattern given on the command line.  Parallel-loading
+# builders are run once per rank (as SST would with --parallel-load=SINGLE);
+# the sequential builder is run once, on rank 0.  For every run we report the
+# wall time, peak traced Python memory, and the number of components, links,
+# and parameters created in each phase of the build.
+
+import argparse
+import csv
+import gc
+import itertools
+import os
+import runpy
+import sys
+import time
+import tracemalloc
+
+script_dir = os.path.dirname(os.path.realpath(__file__))
+repo_dir = os.path.dirname(script_dir)
+
+# The stand-in must shadow any real `sst` module.
+sys.path.insert(0, script_dir)
+import sst
+
+# name: (script relative to the repository, loads in parallel, uses a ball pattern)
+BUILDERS = {
+    "python":         ("pingpong.py",         False, True),
+    "parallelPython": ("pingpong_parLoad.py", True,  True),
+    "hyper":          ("pingpong_hyper.py",   True,  True),
+    "gol":            ("gameoflife/gol.py",   True,  False),
+}
+
+FIELDS = ["builder", "N", "pattern", "ranks", "threads", "rank", "phase",
+          "seconds", "peak_mib", "components", "links", "params"]
+
+def int_list(value):
+    try:
+        return [int(x) for x in value.split()]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid list of integers: '{value}'")
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Benchmark the model builders' graph construction under a mock sst module.")
+    parser.add_argument("--builders", default="python parallelPython",
+                        help=f"Space-separated builders to run (from: {' '.join(BUILDERS)}).")
+    parser.add_argument("--N", "--side-lengths", dest="side_lengths", type=int_list, default="64 256",
+                        help="Side lengths to build (e.g., '64 256').")
+    parser.add_argument("--ranks", type=int_list, default="1 4",
+                        help="MPI rank counts to emulate (e.g., '1 4 16').")
+    parser.add_argument("--threads", type=int_list, default="1",
+                        help="Threads per rank to emulate (e.g., '1 2').")
+    parser.add_argument("--patterns", default="corners randomOverlap:1000",
+                        help="Space-separated ball patterns, with an optional ':COUNT' (e.g., 'corners random:100').")
+    parser.add_argument("--extra", default="",
+                        help="Extra arguments passed through to every builder.")
+    parser.add_argument("--no-tracemalloc", dest="tracemalloc", action="store_false",
+                        help="Do not trace Python memory (tracing slows the builders down).")
+    parser.add_argument("--per-rank", action="store_true",
+                        help="Print every rank rather than only the slowest one.")
+    parser.add_argument("--csv", help="Also write every rank and phase to this CSV file.")
+    parser.add_argument("--compare", help="CSV written by an earlier --csv run to compare totals against.")
+    args = parser.parse_args()
+
+    args.builders = args.builders.split()
+    for builder in args.builders:
+        if builder not in BUILDERS:
+            parser.error(f"Unknown builder '{builder}'")
+    return args
+
+def pattern_flags(pattern):
+    name, _, count = pattern.partition(":")
+    return [f"--{name}"] + ([count] if count else [])
+
+def run_builder(script, argv, rank, num_ranks, num_threads, trace):
+    saved_argv, saved_path = sys.argv, list(sys.path)
+    sys.argv = [script] + argv
+    # SST puts the model script's directory on the path.
+    sys.path.insert(1, os.path.dirname(script))
+    gc.collect()
+    if trace:
+        tracemalloc.start()
+    # The setup phase's clock starts with the total's, after the collection
+    start = time.perf_counter()
+    sst.reset(rank, num_ranks, num_threads)
+    try:
+        runpy.run_path(script, run_name="__main__")
+    except SystemExit as e:
+        if e.code not in (None, 0):
+            print(f"  {os.path.basename(script)} exited with {e.code} on rank {rank}")
+    finally:
+        phases = sst.finish()
+        total = time.perf_counter() - start
+        if trace:
+            tracemalloc.stop()
+        sys.argv, sys.path[:] = saved_argv, saved_path
+    return total, phases
+
+def run_matrix(args):
+    rows = []
+    for builder in args.builders:
+        script, parallel, uses_pattern = BUILDERS[builder]
+        script = os.path.join(repo_dir, script)
+        patterns = args.patterns.split() if uses_pattern else ["-"]
+        for n, ranks, threads, pattern in itertools.product(args.side_lengths, args.ranks, args.threads, patterns):
+            argv = ["--N", str(n)] + args.extra.split()
+            if uses_pattern:
+                argv += pattern_flags(pattern)
+            for rank in range(ranks) if parallel else [0]:
+                total, phases = run_builder(script, argv, rank, ranks, threads, args.tracemalloc)
+                key = dict(builder=builder, N=n, pattern=pattern, ranks=ranks, threads=threads, rank=rank)
+                for phase, stats in phases.items():
+                    rows.append(dict(key, phase=phase,
+                                     seconds=stats["seconds"],
+                                     peak_mib=stats["peakBytes"] / 2**20,
+                                     components=stats["components"],
+                                     links=stats["links"],
+                                     params=stats["params"]))
+                rows.append(dict(key, phase="total", seconds=total,
+                                 peak_mib=max(s["peakBytes"] for s in phases.values()) / 2**20,
+                                 components=sum(s["components"] for s in phases.values()),
+                                 links=sum(s["links"] for s in phases.values()),
+                                 params=sum(s["params"] for s in phases.values())))
+                # Drop the recorded graph before the next run.
+                sst.reset()
+    return rows
+
+def config_key(row):
+    return (row["builder"], int(row["N"]), row["pattern"], int(row["ranks"]), int(row["threads"]))
+
+def slowest_ranks(rows):
+    # Ranks build concurrently, so a configuration is as slow as its slowest rank.
+    slowest = {}
+    for row in rows:
+        if row["phase"] == "total":
+            key = config_key(row)
+            if key not in slowest or float(row["seconds"]) > float(slowest[key]["seconds"]):
+                slowest[key] = row
+    return slowest
+
+def print_report(rows, per_rank):
+    header = f"{'builder':<15}{'N':>7}{'pattern':>22}{'ranks':>6}{'thr':>4}{'rank':>5}  {'phase':<10}{'seconds':>9}{'peak MiB':>10}{'comps':>10}{'links':>10}{'params':>10}"
+    print(header)
+    print("-" * len(header))
+    keep = None if per_rank else {(config_key(r), r["rank"]) for r in slowest_ranks(rows).values()}
+    for row in rows:
+        if keep is not None and (config_key(row), row["rank"]) not in keep:
+            continue
+        print(f"{row['builder']:<15}{row['N']:>7}{row['pattern']:>22}{row['ranks']:>6}{row['threads']:>4}{row['rank']:>5}  "
+              f"{row['phase']:<10}{row['seconds']:>9.3f}{row['peak_mib']:>10.1f}{row['components']:>10}{row['links']:>10}{row['params']:>10}")
+
+def print_comparison(rows, baseline_file):
+    with open(baseline_file) as f:
+        baseline = slowest_ranks(list(csv.DictReader(f)))
+    current = slowest_ranks(rows)
+    print()
+    print(f"Compared with {baseline_file} (slowest rank, current / baseline):")
+    for key, row in current.items():
+        if key not in baseline:
+            continue
+        old = baseline[key]
+        time_ratio = float(row["seconds"]) / max(float(old["seconds"]), 1e-9)
+        mem_ratio = float(row["peak_mib"]) / max(float(old["peak_mib"]), 1e-9)
+        print(f"  {' '.join(map(str, key)):<50} time x{time_ratio:.2f}  peak memory x{mem_ratio:.2f}")
+
+if __name__ == "__main__":
+    args = parse_arguments()
+    rows = run_matrix(args)
+    print_report(rows, args.per_rank)
+    if args.csv:
+        with open(args.csv, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=FIELDS)
+            writer.writeheader()
+            writer.writerows(rows)
+        print("Wrote to ", args.csv)
+    if args.compare:
+        print_comparison(rows, args.compare)
@@ -0,0 +1,194 @@
+# A drop-in stand-in for SST's Python model module.
+#
+# The model builders in this repository only need a handful of calls from
+# `sst` (Component, addParams, addGlobalParams, setRank, Link.connect, and the
+# rank/thread queries).  This module implements them without SST by recording every call
+# into compact integer arrays, so a builder's graph construction can be timed
+# and profiled on a laptop.  Strings that repeat (component types, port names,
+# parameter keys and values, latencies) are interned and stored as ids.
+#
+# It also splits the builder's run into coarse phases based on which kind of
+# call it is currently making: everything before the first call ("setup"),
+# creating and configuring components ("component"), creating links ("link"),
+# and everything after the last call ("teardown").  Wall time between two calls
+# is charged to the phase that was active.  When tracemalloc is tracing, each
+# phase also records the peak traced Python memory.
+
+import time, tracemalloc
+from array import array
+
+SETUP, COMPONENT, LINK, TEARDOWN = "setup", "component", "link", "teardown"
+PHASES = [SETUP, COMPONENT, LINK, TEARDOWN]
+
+# A component's global parameter sets are recorded as parameters with this key
+GLOBAL_SET_KEY = "@globalParamSet"
+
+class Interner:
+  def __init__(self):
+    self.ids = {}
+    self.values = []
+
+  def __call__(self, value):
+    key = str(value)
+    i = self.ids.get(key)
+    if i is None:
+      i = len(self.values)
+      self.ids[key] = i
+      self.values.append(key)
+    return i
+
+# -----------------------------------------------------------------------------
+
+def reset(rank=0, numRanks=1, numThreads=1):
+  global myRank, mpiRankCount, threadCount, programOptions, globalParams
+  global types, ports, keys, values, latencies
+  global componentNames, componentType, componentRank, componentThread
+  global paramComponent, paramKey, paramValue
+  global linkCount, linkEnds
+  global phase, phaseStart, lastCall, phaseStats
+
+  myRank       = rank
+  mpiRankCount = numRanks
+  threadCount  = numThreads
+  programOptions = {}
+  globalParams   = {}
+
+  types     = Interner()
+  ports     = Interner()
+  keys      = Interner()
+  values    = Interner()
+  latencies = Interner()
+
+  componentNames  = []
+  componentType   = array('i')
+  componentRank   = array('i')
+  componentThread = array('i')
+
+  paramComponent = array('i')
+  paramKey       = array('i')
+  paramValue     = array('i')
+
+  # Five entries per connected link: component, port, component, port, latency
+  linkCount = 0
+  linkEnds  = array('i')
+
+  phase      = SETUP
+  phaseStart = lastCall = time.perf_counter()
+  phaseStats = {p: {"seconds": 0.0, "peakBytes": 0, "components": 0, "links": 0, "params": 0}
+                for p in PHASES}
+  if tracemalloc.is_tracing():
+    tracemalloc.reset_peak()
+
+def enterPhase(newPhase):
+  global phase, phaseStart, lastCall
+  now = time.perf_counter()
+  lastCall = now
+  if newPhase == phase:
+    return
+  stats = phaseStats[phase]
+  stats["seconds"] += now - phaseStart
+  if tracemalloc.is_tracing():
+    stats["peakBytes"] = max(stats["peakBytes"], tracemalloc.get_traced_memory()[1])
+    tracemalloc.reset_peak()
+  phase = newPhase
+  phaseStart = now
+
+def finish():
+  # Called by the harness once the builder returns: the time since the last
+  # recorded call is the builder's teardown.
+  now = time.perf_counter()
+  phaseStats[phase]["seconds"] += lastCall - phaseStart
+  phaseStats[TEARDOWN]["seconds"] += now - lastCall
+  if tracemalloc.is_tracing():
+    phaseStats[TEARDOWN]["peakBytes"] = tracemalloc.get_traced_memory()[1]
+  return phaseStats
+
+reset()
+
+# -----------------------------------------------------------------------------
+
+def getMyMPIRank():     return myRank
+def getMPIRankCount():  return mpiRankCount
+def getThreadCount():   return threadCount
+
+def setProgramOption(name, value):
+  programOptions[name] = value
+
+def setProgramOptions(options):
+  programOptions.update(options)
+
+def getProgramOptions():
+  return dict(programOptions)
+
+def setStatisticLoadLevel(level):
+  programOptions["statistic-load-level"] = level
+
+def setStatisticOutput(output, options=None):
+  programOptions["statistic-output"] = output
+
+def enableAllStatisticsForAllComponents(options=None):
+  pass
+
+def addGlobalParam(setName, key, value):
+  globalParams.setdefault(setName, {})[key] = value
+
+def addGlobalParams(setName, params):
+  globalParams.setdefault(setName, {}).update(params)
+
+class Component:
+  __slots__ = ("_id",)
+
+  def __init__(self, name, typeName):
+    enterPhase(COMPONENT)
+    self._id = len(componentNames)
+    componentNames.append(name)
+    componentType.append(types(typeName))
+    componentRank.append(-1)
+    componentThread.append(-1)
+    phaseStats[COMPONENT]["components"] += 1
+
+  def getFullName(self):
+    return componentNames[self._id]
+
+  def getType(self):
+    return types.values[componentType[self._id]]
+
+  def addParam(self, key, value):
+    enterPhase(COMPONENT)
+    paramComponent.append(self._id)
+    paramKey.append(keys(key))
+    paramValue.append(values(value))
+    phaseStats[COMPONENT]["params"] += 1
+
+  def addParams(self, params):
+    for key, value in params.items():
+      self.addParam(key, value)
+
+  def addGlobalParamSet(self, setName):
+    enterPhase(COMPONENT)
+    paramComponent.append(self._id)
+    paramKey.append(keys(GLOBAL_SET_KEY))
+    paramValue.append(values(setName))
+    phaseStats[COMPONENT]["params"] += 1
+
+  def setRank(self, rank, thread=0):
+    enterPhase(COMPONENT)
+    componentRank[self._id]   = rank
+    componentThread[self._id] = thread
+
+class Link:
+  __slots__ = ("_name",)
+
+  def __init__(self, name, latency=None):
+    enterPhase(LINK)
+    self._name = name
+
+  def connect(self, end0, end1):
+    global linkCount
+    enterPhase(LINK)
+    for (comp, port, latency) in (end0, end1):
+      linkEnds.append(comp._id)
+      linkEnds.append(ports(port))
+    linkEnds.append(latencies(end0[2]))
+    linkCount += 1
+    phaseStats[LINK]["links"] += 1
@@ -0,0 +1,43 @@
+#!/bin/bash
+# Compares ponger event throughput with and without event reuse.
+#
+# Builds the element library twice -- once with -DPINGPONG_ALLOCATE_EVENTS
+# (allocate a new event on every hop, the old behavior) and once as is
+# (forward the received event) -- and runs the same --randomOverlap simulation
+# with each.  Events per second is the number of ball hops,
+# balls * floor(timeToRun / edgeDelay), over SST's run stage time.
+#
+# Usage: ./compare.sh [sideLength] [balls] [timeToRun] [edgeDelay] [threads] [repeats]
+set -e
+
+scriptDir="$(cd "$(dirname "$0")" && pwd)"
+repoDir="$(dirname "$scriptDir")"
+
+sideLength=${1:-256}
+balls=${2:-100000}
+timeToRun=${3:-100000}
+edgeDelay=${4:-50}
+threads=${5:-1}
+repeats=${6:-3}
+
+hops=$(( balls * (timeToRun / edgeDelay) ))
+echo "N=$sideLength balls=$balls timeToRun=$timeToRun edgeDelay=$edgeDelay threads=$threads hops=$hops"
+printf "%-10s %4s %12s %16s\n" variant run runStageSecs eventsPerSec
+
+# Build the default (reusing) library last so it is the one left installed.
+for variant in allocate reuse; do
+  params=""
+  if [[ "$variant" == "allocate" ]]; then
+    params="-DPINGPONG_ALLOCATE_EVENTS"
+  fi
+  make -C "$repoDir" -B libpingpong.so install PARAMS="$params" > /dev/null
+
+  for run in $(seq 1 $repeats); do
+    runTime=$(sst -n $threads --print-timing-info=true "$repoDir/pingpong.py" -- \
+                --N $sideLength --randomOverlap $balls --seed $run \
+                --timeToRun $timeToRun --edgeDelay $edgeDelay \
+              | grep "Run stage Time:" | awk '{print $4}')
+    awk -v v=$variant -v r=$run -v t=$runTime -v h=$hops \
+      'BEGIN { printf "%-10s %4d %12.3f %16.0f\n", v, r, t, h / t }'
+  done
+done
@@ -0,0 +1,207 @@
+# Ways for omnisubmit.py to run the jobs of an experiment.
+#
+# Each job is a run of omnidispatch.sh with the job's arguments, writing
+# <prefix>.out (the dispatch script's output) and <prefix>.time.
+#
+# - SlurmExecutor submits every job to the batch queue with sbatch.
+# - LocalExecutor runs the jobs on this machine, launching ranks with mpirun.
+#   A job reserves nodes x ranks per node x threads per rank cores while it
+#   runs, and jobs are started (in order, letting smaller jobs start ahead of
+#   a job that doesn't fit yet) only while their reservations fit in the
+#   machine's cores, so runs don't oversubscribe it.
+# - BundledSlurmExecutor groups jobs with the same node count into bundles
+#   and submits each bundle as one allocation, so short runs don't each pay
+#   a queue wait.  Inside the allocation omnibundle.py runs the bundle's jobs
+#   with a BundleRunner: like the local executor, but a job reserves ranks
+#   per node x threads per rank cores on each of the allocation's nodes, so
+#   jobs that fit run side by side and the rest run back to back.
+
+import json
+import os
+import subprocess
+import time
+
+class Job:
+    def __init__(self, prefix, node_count, ranks_per_node, threads_per_rank, dispatch_args, env=None):
+        self.prefix = prefix
+        self.node_count = node_count
+        self.ranks_per_node = ranks_per_node
+        self.threads_per_rank = threads_per_rank
+        self.dispatch_args = dispatch_args  # omnidispatch.sh's arguments, as one shell string
+        self.env = env or {}                # extra environment variables for the job
+
+    @property
+    def outfile(self):
+        return self.prefix + ".out"
+
+    @property
+    def cores(self):
+        return self.node_count * self.ranks_per_node * self.threads_per_rank
+
+    def to_json(self):
+        return json.dumps(self.__dict__)
+
+    @staticmethod
+    def from_json(line):
+        fields = json.loads(line)
+        return Job(**fields)
+
+def queued_slurm_prefixes():
+    # The prefixes of this user's pending and running Slurm jobs, including
+    # those waiting in bundles, or nothing if Slurm isn't here
+    try:
+        result = subprocess.run(["squeue", "--me", "-h", "-o", "%500j"], capture_output=True, text=True)
+    except OSError:
+        return set()
+    prefixes = set()
+    for name in result.stdout.split():
+        prefixes.add(name)
+        if os.path.exists(name + ".jobs"):
+            with open(name + ".jobs") as f:
+                prefixes.update(Job.from_json(line).prefix for line in f if line.strip())
+    return prefixes
+
+class SlurmExecutor:
+    def __init__(self, script_path, dry, exclude=None):
+        self.script_path = script_path
+        self.dry = dry
+        self.exclude = exclude or []  # nodes for Slurm not to run the jobs on
+
+    def submit(self, job):
+        sbatch_portion = f"sbatch -J {job.prefix} -N {job.node_count} --cpus-per-task {job.threads_per_rank} --ntasks-per-node {job.ranks_per_node} -o {job.outfile}"
+        if self.exclude:
+            sbatch_portion += " --exclude=" + ",".join(self.exclude)
+        if job.env:
+            sbatch_portion += " --export=ALL," + ",".join(f"{key}={value}" for key, value in job.env.items())
+        command = sbatch_portion + f" {self.script_path} " + job.dispatch_args
+        print(command)
+        if not self.dry:
+            subprocess.run(command, shell=True, capture_output=True, text=True)
+
+    def queued_prefixes(self):
+        return queued_slurm_prefixes()
+
+    def wait(self):
+        # The jobs run in the queue; there's nothing to wait for here.
+        pass
+
+class BundledSlurmExecutor:
+    def __init__(self, script_path, dry, bundle_size, name=None, exclude=None):
+        self.script_path = script_path
+        self.dry = dry
+        self.bundle_size = bundle_size
+        self.name = name
+        self.exclude = exclude or []
+        self.groups = {}  # node count -> jobs
+
+    def submit(self, job):
+        self.groups.setdefault(job.node_count, []).append(job)
+
+    def queued_prefixes(self):
+        return queued_slurm_prefixes()
+
+    def _bundle_prefix(self, node_count, index):
+        # The first unused name, so a resubmission doesn't overwrite the
+        # .jobs file of a bundle that is still queued
+        while True:
+            bundle_prefix = f"bundle_{node_count}_{index}"
+            if self.name:
+                bundle_prefix += "_" + self.name
+            if not os.path.exists(bundle_prefix + ".jobs"):
+                return bundle_prefix, index
+            index += 1
+
+    def wait(self):
+        # Everything has been submitted: write out and submit the bundles.
+        runner = os.path.join(os.path.dirname(self.script_path), "omnibundle.py")
+        for node_count, jobs in sorted(self.groups.items()):
+            index = 0
+            for first in range(0, len(jobs), self.bundle_size):
+                bundle = jobs[first:first + self.bundle_size]
+                bundle_prefix, index = self._bundle_prefix(node_count, index)
+                index += 1
+                jobs_file = os.path.abspath(bundle_prefix + ".jobs")
+                command = f"sbatch -J {bundle_prefix} -N {node_count} --exclusive -o {bundle_prefix}.out"
+                if self.exclude:
+                    command += " --exclude=" + ",".join(self.exclude)
+                command += f" --wrap \"python3 {runner} {jobs_file}\""
+                print(command)
+                for job in bundle:
+                    print(f"  {job.prefix}")
+                if self.dry:
+                    continue
+                with open(jobs_file, 'w') as f:
+                    for job in bundle:
+                        f.write(job.to_json() + "\n")
+                subprocess.run(command, shell=True, capture_output=True, text=True)
+
+class LocalExecutor:
+    mode = "local"
+
+    def __init__(self, script_path, dry, max_cores=None):
+        self.script_path = script_path
+        self.dry = dry
+        self.max_cores = max_cores or os.cpu_count()
+        self.pending = []
+        self.running = []  # (job, process, output file)
+        self.free_cores = self.max_cores
+
+    def submit(self, job):
+        command = f"bash {self.script_path} {job.dispatch_args}"
+        print(f"[{self.mode}, {self.job_cores(job)} cores] {command}")
+        if self.dry:
+            return
+        if self.job_cores(job) > self.max_cores:
+            print(f"Warning: {job.prefix} needs {self.job_cores(job)} cores but only {self.max_cores} are available; it will run alone")
+        self.pending.append((job, command))
+        self._start_jobs()
+
+    def queued_prefixes(self):
+        # Jobs only run while omnisubmit.py waits for them
+        return set()
+
+    def job_cores(self, job):
+        return job.cores
+
+    def _reservation(self, job):
+        return min(self.job_cores(job), self.max_cores)
+
+    def _start_jobs(self):
+        for (job, command) in list(self.pending):
+            if self._reservation(job) > self.free_cores:
+                continue
+            env = dict(os.environ, OMNI_EXECUTOR=self.mode, **job.env)
+            out = open(job.outfile, 'w')
+            process = subprocess.Popen(command, shell=True, stdout=out, stderr=subprocess.STDOUT, env=env)
+            self.running.append((job, process, out))
+            self.pending.remove((job, command))
+            self.free_cores -= self._reservation(job)
+
+    def _reap(self):
+        for (job, process, out) in list(self.running):
+            if process.poll() is None:
+                continue
+            out.close()
+            self.running.remove((job, process, out))
+            self.free_cores += self._reservation(job)
+            status = "done" if process.returncode == 0 else f"failed ({process.returncode})"
+            print(f"[{self.mode}] {job.prefix} {status}")
+
+    def wait(self):
+        while self.pending or self.running:
+            self._reap()
+            self._start_jobs()
+            time.sleep(0.5)
+
+class BundleRunner(LocalExecutor):
+    # Runs a bundle's jobs inside its allocation.  Every job in a bundle uses
+    # all of the allocation's nodes, so what limits how many run at once is
+    # the cores each one takes on every node.
+    mode = "bundle"
+
+    def __init__(self, script_path):
+        cores_per_node = int(os.environ.get("SLURM_CPUS_ON_NODE", os.cpu_count()))
+        super().__init__(script_path, False, cores_per_node)
+
+    def job_cores(self, job):
+        return job.ranks_per_node * job.threads_per_rank
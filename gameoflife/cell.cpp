@@ -39,6 +39,26 @@ Cell::Cell( SST::ComponentId_t id, SST::Params& params )
   sPort  = configureLink("sPort",  new SST::Event::Handler<Cell>(this, &Cell::handleEvent));
   sePort = configureLink("sePort", new SST::Event::Handler<Cell>(this, &Cell::handleEvent));
 
+  // Unconnected ports give back a null link; the rest never change, so
+  // collect them once rather than checking every port on every tick.
+  SST::Link *ports[8] = {nwPort, nPort, nePort, wPort, ePort, swPort, sPort, sePort};
+  for(int p = 0; p < 8; p++) {
+    if(ports[p]) {
+      connectedPorts.push_back(ports[p]);
+      connectedPortIds.push_back(p);
+    }
+  }
+
+  static const char *portNames[8] = {"nwPort", "nPort", "nePort", "wPort", "ePort", "swPort", "sPort", "sePort"};
+  remotePorts         = params.find<int64_t>("remotePorts", 0);
+  eventsHandled       = registerStatistic<uint64_t>("eventsHandled");
+  crossPartitionSends = registerStatistic<uint64_t>("crossPartitionSends");
+  statsEnabled = !eventsHandled->isNullStatistic() || !crossPartitionSends->isNullStatistic();
+  for(int p = 0; p < 8; p++) {
+    portSends[p] = registerStatistic<uint64_t>("portSends", portNames[p]);
+    statsEnabled = statsEnabled || !portSends[p]->isNullStatistic();
+  }
+
   if(id == 0) {
     registerAsPrimaryComponent();
     primaryComponentDoNotEndSim();
@@ -52,6 +72,7 @@ void Cell::setup() {
 }
 
 void Cell::handleEvent(SST::Event *ev) {
+  if(statsEnabled) { eventsHandled->addData(1); }
   if(dynamic_cast<GolEvent*>(ev)->isAlive()) {
     aliveNeighbors += 1;
   }
@@ -69,14 +90,14 @@ void Cell::update() {
 
 void Cell::communicate() {
   if(postIfDead || isAlive) {
-    if(isPortConnected("nwPort")) { nwPort->send(new GolEvent(isAlive)); }
-    if(isPortConnected("nPort"))  { nPort->send(new GolEvent(isAlive));  }
-    if(isPortConnected("nePort")) { nePort->send(new GolEvent(isAlive)); }
-    if(isPortConnected("wPort"))  { wPort->send(new GolEvent(isAlive));  }
-    if(isPortConnected("ePort"))  { ePort->send(new GolEvent(isAlive));  }
-    if(isPortConnected("swPort")) { swPort->send(new GolEvent(isAlive)); }
-    if(isPortConnected("sPort"))  { sPort->send(new GolEvent(isAlive));  }
-    if(isPortConnected("sePort")) { sePort->send(new GolEvent(isAlive)); }
+    for(size_t i = 0; i < connectedPorts.size(); i++) {
+      if(statsEnabled) {
+        int p = connectedPortIds[i];
+        portSends[p]->addData(1);
+        if(remotePorts & (1 << p)) { crossPartitionSends->addData(1); }
+      }
+      connectedPorts[i]->send(new GolEvent(isAlive));
+    }
   }
 }
 
@@ -1,5 +1,11 @@
 import sst
-import argparse, random
+import os, sys, argparse, random, tracemalloc
+
+# phases.py lives with the ping pong builders in the directory above
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(sys.argv[0])), '..'))
+import phases
+
+timer = phases.PhaseTimer()
 
 parser = argparse.ArgumentParser(
   prog='GameOfLife',
@@ -11,10 +17,23 @@ parser.add_argument('--stop-at',         default="5s")
 parser.add_argument('--onDemandMode',    default=False, action='store_true')
 parser.add_argument('--postOnlyIfAlive', default=False, action='store_true')
 parser.add_argument('--verbose',         default=False, action='store_true')
+parser.add_argument('--statLevel',       type=int, default=0)
+parser.add_argument('--statFile',        default="stats.csv")
+parser.add_argument('--printPhases',     default=False, action='store_true')
+parser.add_argument('--phaseMemory',     default=False, action='store_true')
 args = parser.parse_args()
 
+if args.phaseMemory:
+  tracemalloc.start()
+
 sst.setProgramOption("stop-at", args.stop_at)
 
+# Component statistics (see the README) are off unless --statLevel is given.
+if args.statLevel > 0:
+  sst.setStatisticLoadLevel(args.statLevel)
+  sst.setStatisticOutput("sst.statOutputCSV", {"filepath": args.statFile, "separator": ","})
+  sst.enableAllStatisticsForAllComponents()
+
 myRank = sst.getMyMPIRank()
 numRanks = sst.getMPIRankCount()
 cellType = "gol.onDemandCell" if args.onDemandMode else "gol.cell"
@@ -36,49 +55,54 @@ myRowEnd   = myRowStart + int(args.M / numRanks) - 1
 if myRank < args.M % numRanks:
   myRowEnd += 1
 
+# For the cells' statistics: the ports of a cell in 'row' that lead to a cell
+# on another rank (a bit per port, see cell.h).  Only the rows at the edges of
+# this rank's block have any.
+def remotePorts(row):
+  mask = 0
+  if row == myRowStart and row > 0:
+    mask |= 1 | 2 | 4      # nw, n, ne
+  if row == myRowEnd and row < args.M-1:
+    mask |= 32 | 64 | 128  # sw, s, se
+  return mask
+
 # -----------------------------------------------------------------------------
 cells = {}
-links = set()
-
-def createLink(srcRow, srcCol, offRow, offCol, srcPort, tgtPort):
-  tgtRow = srcRow + offRow
-  tgtCol = srcCol + offCol
+numLinks = 0
 
-  # Don't create a link that would go off the board
-  if tgtRow < 0 or tgtCol < 0 or tgtRow >= args.M or tgtCol >= args.N:
-    return
+# Each link between two cells is made once, from the cell that comes first
+# (by row, then column), so only the east, south east, south, and south west
+# neighbors of a cell are linked from it.  That name is the same on both ranks
+# of a link between ranks.
+halfStencil = [( 0,  1, "ePort",  "wPort" ),
+               ( 1,  1, "sePort", "nwPort"),
+               ( 1,  0, "sPort",  "nPort" ),
+               ( 1, -1, "swPort", "nePort")]
 
-  # Don't create a link to a component that has not been made
-  if (srcRow not in cells) or (tgtRow not in cells):
-    return
-
-  srcComp = cells[srcRow][srcCol]
-  tgtComp = cells[tgtRow][tgtCol]
-
-  # We want to 'normalize' link names so that a link that goes from component
-  # 'x' to 'y' and a link that goes from component 'y' to 'x' will have the
-  # same name.
-  minRow = min( (srcRow,srcCol), (tgtRow,tgtCol) )[0]
-  minCol = min( (srcRow,srcCol), (tgtRow,tgtCol) )[1]
-  maxRow = max( (srcRow,srcCol), (tgtRow,tgtCol) )[0]
-  maxCol = max( (srcRow,srcCol), (tgtRow,tgtCol) )[1]
-  name = "link_%i_%i__%i_%i" % (minRow,minCol,maxRow,maxCol)
-
-  # Avoid making duplicate links
-  if not name in links:
-    sst.Link(name).connect( (srcComp, srcPort, "1s"), (tgtComp, tgtPort, "1s") )
-    links.add(name)
+def createLinks(row, col, stencil):
+  global numLinks
+  srcComp = cells[row][col]
+  for (offRow, offCol, srcPort, tgtPort) in stencil:
+    tgtRow = row + offRow
+    tgtCol = col + offCol
+    # Don't create a link that would go off the board or this rank's part of it
+    if tgtRow not in cells or tgtCol < 0 or tgtCol >= args.N:
+      continue
+    name = "link_%i_%i__%i_%i" % (row, col, tgtRow, tgtCol)
+    sst.Link(name).connect( (srcComp, srcPort, "1s"), (cells[tgtRow][tgtCol], tgtPort, "1s") )
+    numLinks += 1
 
 # -----------------------------------------------------------------------------
 
+timer.start("cells")
 # First create the portion of the game board this rank is responsible for as
 # well as one row below and above what this rank is responsible for (so that we
 # can connect to it).
 for row in range(max(0,myRowStart-1), min(args.M,myRowEnd+2)):
-  cells[row] = {}
+  cells[row] = []
   for col in range(0, args.N):
     cell = sst.Component("cell_%i_%i" % (row,col), cellType)
-    cells[row][col] = cell
+    cells[row].append(cell)
     if row < myRowStart:
       cell.setRank(myRank-1)
     elif row > myRowEnd:
@@ -89,15 +113,20 @@ for row in range(max(0,myRowStart-1), min(args.M,myRowEnd+2)):
       cell.addParams({"isAlive":      rval <= args.prob,
                       "postIfDead":   not args.postOnlyIfAlive,
                       "shouldReport": args.verbose})
+      if args.statLevel > 0:
+        cell.addParams({"remotePorts": remotePorts(row)})
 
-# Create links for all components owned by this rank
-for row in range(max(0,myRowStart), min(args.M,myRowEnd+1)):
+timer.count(components=sum(len(row) for row in cells.values()))
+
+# Create links for all components owned by this rank: the ghost row above only
+# links down into this rank's first row, and this rank's last row links down
+# into the ghost row below but the ghost row below links to nothing.
+timer.start("links")
+for row in range(max(0,myRowStart-1), min(args.M,myRowEnd+1)):
+  stencil = halfStencil if row >= myRowStart else halfStencil[1:]
   for col in range(0, args.N):
-    createLink(row, col, -1, -1, "nwPort", "sePort" )
-    createLink(row, col, -1,  0, "nPort",  "sPort"  )
-    createLink(row, col, -1,  1, "nePort", "swPort" )
-    createLink(row, col,  0, -1, "wPort",  "ePort"  )
-    createLink(row, col,  0,  1, "ePort",  "wPort"  )
-    createLink(row, col,  1, -1, "swPort", "nePort" )
-    createLink(row, col,  1,  0, "sPort",  "nPort"  )
-    createLink(row, col,  1,  1, "sePort", "nwPort" )
+    createLinks(row, col, stencil)
+timer.count(links=numLinks)
+
+if args.printPhases:
+  timer.report("gol", myRank, numRanks)
@@ -31,6 +31,26 @@ OnDemandCell::OnDemandCell( SST::ComponentId_t id, SST::Params& params )
   sPort  = configureLink("sPort",  new SST::Event::Handler<OnDemandCell>(this, &OnDemandCell::handleEvent));
   sePort = configureLink("sePort", new SST::Event::Handler<OnDemandCell>(this, &OnDemandCell::handleEvent));
 
+  // Unconnected ports give back a null link; the rest never change, so
+  // collect them once rather than checking every port on every tick.
+  SST::Link *ports[8] = {nwPort, nPort, nePort, wPort, ePort, swPort, sPort, sePort};
+  for(int p = 0; p < 8; p++) {
+    if(ports[p]) {
+      connectedPorts.push_back(ports[p]);
+      connectedPortIds.push_back(p);
+    }
+  }
+
+  static const char *portNames[8] = {"nwPort", "nPort", "nePort", "wPort", "ePort", "swPort", "sPort", "sePort"};
+  remotePorts         = params.find<int64_t>("remotePorts", 0);
+  eventsHandled       = registerStatistic<uint64_t>("eventsHandled");
+  crossPartitionSends = registerStatistic<uint64_t>("crossPartitionSends");
+  statsEnabled = !eventsHandled->isNullStatistic() || !crossPartitionSends->isNullStatistic();
+  for(int p = 0; p < 8; p++) {
+    portSends[p] = registerStatistic<uint64_t>("portSends", portNames[p]);
+    statsEnabled = statsEnabled || !portSends[p]->isNullStatistic();
+  }
+
   if(id == 0) {
     registerAsPrimaryComponent();
     primaryComponentDoNotEndSim();
@@ -49,6 +69,7 @@ void OnDemandCell::handleEvent(SST::Event *ev) {
     reregisterClock(clockTc, clockHandler);
   }
   aliveNeighbors += 1;
+  if(statsEnabled) { eventsHandled->addData(1); }
   delete ev;
 }
 
@@ -63,14 +84,14 @@ void OnDemandCell::update() {
 
 void OnDemandCell::communicate() {
   if(isAlive) {
-    if(isPortConnected("nwPort")) { nwPort->send(new GolEvent()); }
-    if(isPortConnected("nPort"))  { nPort->send(new GolEvent());  }
-    if(isPortConnected("nePort")) { nePort->send(new GolEvent()); }
-    if(isPortConnected("wPort"))  { wPort->send(new GolEvent());  }
-    if(isPortConnected("ePort"))  { ePort->send(new GolEvent());  }
-    if(isPortConnected("swPort")) { swPort->send(new GolEvent()); }
-    if(isPortConnected("sPort"))  { sPort->send(new GolEvent());  }
-    if(isPortConnected("sePort")) { sePort->send(new GolEvent()); }
+    for(size_t i = 0; i < connectedPorts.size(); i++) {
+      if(statsEnabled) {
+        int p = connectedPortIds[i];
+        portSends[p]->addData(1);
+        if(remotePorts & (1 << p)) { crossPartitionSends->addData(1); }
+      }
+      connectedPorts[i]->send(new GolEvent());
+    }
   }
 }
 
@@ -3,6 +3,7 @@
 
 #include <sst/core/component.h>
 #include <sst/core/link.h>
+#include <vector>
 
 class GolEvent;
 
@@ -23,7 +24,8 @@ class OnDemandCell : public SST::Component {
 
     // Parameter name, description, default value
     SST_ELI_DOCUMENT_PARAMS(
-     { "isAlive", "Indicates if space has a cell (is alive)", "true" }
+     { "isAlive",     "Indicates if space has a cell (is alive)", "true" },
+     { "remotePorts", "Bit mask of the ports whose neighbor is on another rank (1 nw, 2 n, 4 ne, 8 w, 16 e, 32 sw, 64 s, 128 se)", "0" }
     )
 
     // Port name, description, event type
@@ -38,6 +40,13 @@ class OnDemandCell : public SST::Component {
       { "sePort", "Southeast port", {"gameoflife.GolEvent"}}
     )
 
+    // Statistic name, description, units, enable level
+    SST_ELI_DOCUMENT_STATISTICS(
+      { "eventsHandled",       "Messages received from neighbors",                   "events", 1 },
+      { "crossPartitionSends", "Messages sent to a neighbor on another rank",        "events", 1 },
+      { "portSends",           "Messages sent out each port (subId is the port)",    "events", 3 }
+    )
+
     void setup() override;
 
   private:
@@ -50,6 +59,14 @@ class OnDemandCell : public SST::Component {
     bool isAlive, clockOn;
     int aliveNeighbors;
     SST::Link *nwPort, *nPort, *nePort, *wPort, *ePort, *swPort, *sPort, *sePort;
+    std::vector<SST::Link*> connectedPorts;  // the ports above that have a neighbor
+    std::vector<int> connectedPortIds;       // and their bits in remotePorts
+
+    // Statistics are only recorded when at least one is enabled.
+    bool statsEnabled;
+    int64_t remotePorts;
+    SST::Statistics::Statistic<uint64_t> *eventsHandled, *crossPartitionSends;
+    SST::Statistics::Statistic<uint64_t> *portSends[8];
     SST::TimeConverter *clockTc;
     SST::Clock::Handler2<OnDemandCell, &OnDemandCell::clockTick> *clockHandler;
 };
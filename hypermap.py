@@ -0,0 +1,261 @@
+# Grid-to-rank mapping for pingpong_hyper.py.
+#
+# pingpong_hyper.py wires point k of grid g to partner grids through two
+# rotations: its pass 1 links go to grids (m - g) mod G and its pass 2 links
+# to grids (-g - 1 - m) mod G, for m = k * linksPerPoint + x (x over the
+# point's hyperlinks).  m runs over 0 .. L-1, L being a grid's hyperlinks per
+# pass (points times fanout), so the number of hyperlinks between grids g and h only depends on
+# their sum s = (g + h) mod G:
+#
+#   weight(s) = c(s) + c((-s - 1) mod G),  c(r) = L // G + (r < L mod G)
+#
+# Every pair of grids shares at least base = min(weight) links, and which
+# rank a grid goes to only matters for the excess over that: every balanced
+# mapping cuts the same number of base links.  (With the default L = G there
+# is no excess at all: each grid links twice to every other grid.)  The
+# excess graph links g to the grids -g + s for the few sums s with excess
+# weight, so it stays small however many grids there are.
+#
+# Strategies:
+#
+#   block    -- rank r owns grids [r * G/R, (r+1) * G/R).  This is how
+#               pingpong_hyper.py always mapped the grids.
+#   locality -- ranks own G/R grids each, chosen to cut few excess links:
+#               each rank's grids are grown greedily from a seed, adding the
+#               unassigned grid most linked to those already picked, then
+#               swaps of two grids between ranks that cut fewer links are
+#               made until a pass over the grids finds none (or --mapPasses
+#               passes).  Every rank computes the same mapping.
+#
+# preflight() works out, from the same formulas and without building
+# anything, how many components, ghost components, and links each rank of a
+# mapping will have and roughly how much memory SST will need for them, so a
+# configuration that won't fit can be turned down before it is queued:
+#
+#   python3 hypermap.py --N 4 --fanout 100 --ranks 64 [--grids G]
+#       [--mapping locality] [--memoryLimit MB]
+#
+# exits with status 1 when a rank's estimate is over --memoryLimit.
+# (pingpong_hyper.py --preflight prints the same table.)
+
+import argparse, sys
+import numpy as np
+
+STRATEGIES = ['block', 'locality']
+
+class HyperGraph:
+  def __init__(self, nGrids, pointsPerGrid, linksPerPoint):
+    self.nGrids = nGrids
+    self.pointsPerGrid = pointsPerGrid
+    self.linksPerPoint = linksPerPoint
+    q, rem = divmod(pointsPerGrid * linksPerPoint, nGrids)
+    s = np.arange(nGrids, dtype=np.int64)
+    c = lambda r: q + (r < rem)
+    self.weightBySum = c(s) + c((-s - 1) % nGrids)
+    self.base = int(self.weightBySum.min())
+    self.excessSums = np.flatnonzero(self.weightBySum > self.base)
+    self.excessBySum = self.weightBySum - self.base
+    self.excessWeights = self.excessBySum[self.excessSums]
+
+  def neighbors(self, g):
+    # The grids g has excess links to, and how many
+    h = (self.excessSums - g) % self.nGrids
+    keep = h != g
+    return h[keep], self.excessWeights[keep]
+
+  def pairCounts(self):
+    # The number of pairs of distinct grids whose sum is s, for every s
+    # (links from a grid to itself aren't made)
+    s = np.arange(self.nGrids, dtype=np.int64)
+    if self.nGrids % 2 == 0:
+      selfPairs = np.where(s % 2 == 0, 2, 0)
+    else:
+      selfPairs = np.ones_like(s)
+    return (self.nGrids - selfPairs) // 2
+
+  def totalLinks(self):
+    return int((self.weightBySum * self.pairCounts()).sum())
+
+  def rankCutLinks(self, gridRank, numRanks, chunk=4096):
+    # The links between each rank's grids and other ranks' grids
+    gridRank = np.asarray(gridRank)
+    G = self.nGrids
+    sizes = np.bincount(gridRank, minlength=numRanks).astype(np.int64)
+    cut = self.base * sizes * (G - sizes)
+    for start in range(0, G, chunk):
+      g = np.arange(start, min(start + chunk, G), dtype=np.int64)[:, None]
+      h = (self.excessSums[None, :] - g) % G
+      crossing = (gridRank[g] != gridRank[h]) & (h != g)
+      cut += np.bincount(gridRank[g[:, 0]], weights=(crossing * self.excessWeights[None, :]).sum(1),
+                         minlength=numRanks).astype(np.int64)
+    return cut
+
+  def cutLinks(self, gridRank):
+    # Each cut link is cut from both of its ranks
+    gridRank = np.asarray(gridRank)
+    return int(self.rankCutLinks(gridRank, int(gridRank.max()) + 1).sum()) // 2
+
+  def gridLinks(self, grids):
+    # The hyperlinks of each of the given grids (not counting the ones a
+    # grid's rotations would make to itself, which aren't made)
+    return int(self.weightBySum.sum()) - self.weightBySum[(2 * np.asarray(grids)) % self.nGrids]
+
+  def ghosts(self, grids, owned):
+    # The ghost pongers of the rank owning 'grids' (owned[g] says whether it
+    # owns grid g): the points of other grids its points link to.  Point k of
+    # grid g links to the pass 1 grids (kF - g .. kF - g + F-1) mod G and the
+    # pass 2 grids (-g - kF - F .. -g - kF - 1) mod G, F being the fanout.
+    G, F = self.nGrids, self.linksPerPoint
+    if F >= G:
+      return self.pointsPerGrid * int((~owned).sum()) if len(grids) else 0
+    g = np.asarray(grids, dtype=np.int64)[:, None]
+    k = np.arange(self.pointsPerGrid, dtype=np.int64)[None, :]
+    starts = np.concatenate([(k * F - g) % G, (-g - k * F - F) % G]).ravel()
+    points = np.tile(np.arange(self.pointsPerGrid), 2 * len(grids))
+    # Mark each cyclic range on its point's row of a difference array
+    diff = np.zeros((self.pointsPerGrid, G + 1), dtype=np.int64)
+    ends = starts + F
+    wraps = ends > G
+    np.add.at(diff, (points, starts), 1)
+    np.add.at(diff, (points, np.minimum(ends, G)), -1)
+    np.add.at(diff, (points[wraps], 0), 1)
+    np.add.at(diff, (points[wraps], ends[wraps] - G), -1)
+    covered = np.cumsum(diff, axis=1)[:, :G] > 0
+    return int((covered & ~owned[None, :]).sum())
+
+# -----------------------------------------------------------------------------
+
+def blockMapping(nGrids, numRanks):
+  return np.arange(nGrids, dtype=np.int64) // (nGrids // numRanks)
+
+def growRegions(graph, numRanks):
+  G = graph.nGrids
+  perRank = G // numRanks
+  gridRank = np.full(G, -1, dtype=np.int64)
+  conn = np.zeros(G)
+  for r in range(numRanks):
+    # The first unassigned grid seeds the region; after that, the unassigned
+    # grid most linked to it (the first unassigned one if none are).
+    conn[gridRank == -1] = 0
+    for _ in range(perRank):
+      g = int(np.argmax(conn))
+      gridRank[g] = r
+      conn[g] = -np.inf
+      h, w = graph.neighbors(g)
+      conn[h] += w
+  return gridRank
+
+def refine(graph, gridRank, numRanks, passes):
+  # Swaps g with the grid h of the rank g is most linked to (other than its
+  # own) that gains the most, when that cuts fewer links.
+  G = graph.nGrids
+  members = [list(np.flatnonzero(gridRank == r)) for r in range(numRanks)]
+  for _ in range(passes):
+    swaps = 0
+    for g in range(G):
+      own = int(gridRank[g])
+      h, w = graph.neighbors(g)
+      toRank = np.bincount(gridRank[h], weights=w, minlength=numRanks)
+      stay = toRank[own]
+      toRank[own] = -np.inf
+      other = int(np.argmax(toRank))
+      gain = toRank[other] - stay
+      # Only grids that would rather be elsewhere look for a partner
+      if gain <= 0:
+        continue
+
+      # What each grid of 'other' gains moving to 'own'
+      candidates = np.array(members[other], dtype=np.int64)[:, None]
+      ch = (graph.excessSums[None, :] - candidates) % G
+      cw = np.where(ch != candidates, graph.excessWeights[None, :], 0)
+      chRank = gridRank[ch]
+      candidateGain = ((chRank == own) * cw).sum(1) - ((chRank == other) * cw).sum(1)
+      # The link between g and the candidate stays cut
+      total = gain + candidateGain - 2 * graph.excessBySum[(g + candidates[:, 0]) % G]
+      best = int(np.argmax(total))
+      if total[best] <= 0:
+        continue
+      partner = int(candidates[best, 0])
+      gridRank[g], gridRank[partner] = other, own
+      members[own][members[own].index(g)] = partner
+      members[other][best] = g
+      swaps += 1
+    if swaps == 0:
+      break
+  return gridRank
+
+# Rough memory SST needs for a rank, for preflight's estimate: a fixed amount
+# per process plus an amount per component, ghost component, and link end.
+# Calibrate them against the Max Resident Set Size of real runs (see
+# results.py) and pass them to preflight().
+BASE_BYTES      = 200 * 2**20
+COMPONENT_BYTES = 2048
+GHOST_BYTES     = 512
+LINK_BYTES      = 256
+
+def preflight(graph, gridRank, numRanks, baseBytes=BASE_BYTES, componentBytes=COMPONENT_BYTES,
+              ghostBytes=GHOST_BYTES, linkBytes=LINK_BYTES):
+  # For each rank, a dict of its grids, components, ghost components, links
+  # (the links it makes: between its own pongers, and to its ghosts), and
+  # estimated bytes.
+  gridRank = np.asarray(gridRank)
+  N2 = graph.pointsPerGrid
+  side = int(round(np.sqrt(N2)))
+  gridPortLinks = 2 * side * (side - 1)
+  cut = graph.rankCutLinks(gridRank, numRanks)
+  counts = []
+  for r in range(numRanks):
+    grids = np.flatnonzero(gridRank == r)
+    owned = gridRank == r
+    # Links with both ends on the rank are counted from both ends
+    hyperLinks = (int(graph.gridLinks(grids).sum()) + int(cut[r])) // 2
+    links = len(grids) * gridPortLinks + hyperLinks
+    ghosts = graph.ghosts(grids, owned)
+    components = len(grids) * N2
+    # A link between two of the rank's pongers has both of its ends there
+    linkEnds = 2 * links - int(cut[r])
+    counts.append({"rank": r, "grids": len(grids), "components": components, "ghosts": ghosts,
+                   "links": links, "bytes": baseBytes + components * componentBytes +
+                   ghosts * ghostBytes + linkEnds * linkBytes})
+  return counts
+
+def printPreflight(counts, memoryLimit=None):
+  # Returns whether every rank fits in memoryLimit MB
+  print("%5s %7s %11s %10s %11s %14s" % ("Rank", "Grids", "Components", "Ghosts", "Links", "Est. RSS (MB)"))
+  fits = True
+  for c in counts:
+    mb = c["bytes"] / 2**20
+    over = memoryLimit is not None and mb > memoryLimit
+    fits = fits and not over
+    print("%5d %7d %11d %10d %11d %14.1f%s" % (c["rank"], c["grids"], c["components"], c["ghosts"], c["links"], mb,
+                                              "  over the limit" if over else ""))
+  return fits
+
+def makeMapping(strategy, graph, numRanks, passes=2):
+  # The rank of every grid
+  if strategy == 'block' or len(graph.excessSums) == 0:
+    return blockMapping(graph.nGrids, numRanks)
+  if strategy == 'locality':
+    return refine(graph, growRegions(graph, numRanks), numRanks, passes)
+  raise ValueError("Unknown mapping strategy '%s'" % strategy)
+
+# -----------------------------------------------------------------------------
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="Estimate each rank's share of a pingpong_hyper.py model before running it.")
+  parser.add_argument('--N',           type=int, default=2)
+  parser.add_argument('--grids',       type=int, default=-1)
+  parser.add_argument('--fanout',      type=int, default=100)
+  parser.add_argument('--ranks',       type=int, required=True)
+  parser.add_argument('--mapping',     choices=STRATEGIES, default='block')
+  parser.add_argument('--mapPasses',   type=int, default=2)
+  parser.add_argument('--memoryLimit', type=float, default=None, help="MB per rank")
+  args = parser.parse_args()
+
+  nGrids = args.grids if args.grids != -1 else (args.N * args.N) * 100
+  if nGrids % args.ranks != 0:
+    sys.exit("%d grids don't divide between %d ranks" % (nGrids, args.ranks))
+  graph = HyperGraph(nGrids, args.N * args.N, args.fanout)
+  gridRank = makeMapping(args.mapping, graph, args.ranks, args.mapPasses)
+  if not printPreflight(preflight(graph, gridRank, args.ranks), args.memoryLimit):
+    sys.exit(1)
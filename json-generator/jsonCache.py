@@ -0,0 +1,156 @@
+# A shared cache of generated JSON model files.
+#
+# Runs the JSON generator command given after "--" unless the cache already
+# holds its output, then links the cached files into place as <prefix>.json
+# (or <prefix><rank>.json).  Entries are keyed by a hash of the generator's
+# name and arguments (everything but --outputPrefix), so any two jobs asking
+# for the same rank count, threads, side length, pattern, dimensions, edge
+# delay, time to run, and seed share one copy.  The time to run is part of the
+# key because the simulator component in rank 0's file carries it.
+#
+# Jobs that miss on the same entry at the same time take turns on a per-entry
+# lock: the first generates the files into a scratch directory and publishes
+# it with a single rename, the rest wait and then find it.  With --maxSize,
+# the least recently used entries are removed after each publish until the
+# cache fits.  Files are hard linked into place when the cache is on the same
+# file system, so removing an entry never pulls files out from under a job
+# that is still reading them.
+#
+# Usage: python3 jsonCache.py --cacheDir DIR [--maxSize 500G] \
+#            --outputPrefix PREFIX -- GENERATOR [ARGS...]
+
+import argparse
+import fcntl
+import glob
+import hashlib
+import os
+import shutil
+import subprocess
+import time
+import uuid
+
+CACHE_VERSION = "1"
+
+def parse_size(value):
+    units = {'': 1, 'K': 2**10, 'M': 2**20, 'G': 2**30, 'T': 2**40}
+    value = value.strip().upper().rstrip('B')
+    if value and value[-1] in units:
+        return int(float(value[:-1]) * units[value[-1]])
+    return int(value)
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Run a JSON generator through a shared cache of its output.")
+    parser.add_argument("--cacheDir", required=True, help="Directory holding the cache (shared between jobs).")
+    parser.add_argument("--maxSize", type=parse_size, default=0,
+                        help="Size cap for the cache (e.g., '500G'); 0 for no cap.")
+    parser.add_argument("--outputPrefix", required=True, help="Prefix of the JSON files the job reads.")
+    parser.add_argument("generator", nargs=argparse.REMAINDER,
+                        help="Generator command and arguments, after '--' and without --outputPrefix.")
+    args = parser.parse_args()
+    if args.generator and args.generator[0] == '--':
+        args.generator = args.generator[1:]
+    if not args.generator:
+        parser.error("No generator command given.")
+    return args
+
+def cache_key(generator):
+    # The generator's name (the Chapel and Python generators place random
+    # balls differently) and its arguments.
+    words = [CACHE_VERSION, os.path.basename(generator[0])]
+    words += [os.path.basename(word) if word.endswith('.py') else word for word in generator[1:]]
+    return hashlib.sha256("\0".join(words).encode()).hexdigest()[:32]
+
+class EntryLock:
+    # An exclusive lock on one cache entry.  POSIX locks (lockf) rather than
+    # flock, since they also work on NFS.
+    def __init__(self, cache_dir, key):
+        self.path = os.path.join(cache_dir, key + ".lock")
+
+    def __enter__(self):
+        self.file = open(self.path, 'a')
+        fcntl.lockf(self.file, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        fcntl.lockf(self.file, fcntl.LOCK_UN)
+        self.file.close()
+
+def entry_files(entry_dir):
+    return sorted(glob.glob(os.path.join(entry_dir, "model*.json")))
+
+def entry_size(entry_dir):
+    return sum(os.path.getsize(path) for path in entry_files(entry_dir))
+
+def touch(entry_dir):
+    # Entries are ordered for eviction by when they were last used.
+    os.utime(entry_dir)
+
+def generate(cache_dir, key, generator):
+    # Generates into a scratch directory and renames it into place, so an
+    # entry directory only ever holds a complete set of files.
+    scratch = os.path.join(cache_dir, "tmp-%s-%s" % (key, uuid.uuid4().hex[:8]))
+    os.makedirs(scratch)
+    try:
+        command = generator + ["--outputPrefix=" + os.path.join(scratch, "model")]
+        subprocess.run(command, check=True)
+        if not entry_files(scratch):
+            raise RuntimeError("The generator didn't write any model*.json files")
+        os.rename(scratch, os.path.join(cache_dir, key))
+    except BaseException:
+        shutil.rmtree(scratch, ignore_errors=True)
+        raise
+
+def link_files(entry_dir, output_prefix):
+    for path in entry_files(entry_dir):
+        # model.json -> <prefix>.json, model3.json -> <prefix>3.json
+        target = output_prefix + os.path.basename(path)[len("model"):]
+        if os.path.lexists(target):
+            os.remove(target)
+        try:
+            os.link(path, target)
+        except OSError:
+            os.symlink(os.path.abspath(path), target)
+
+def evict(cache_dir, max_size, keep):
+    # Removes the least recently used entries (other than 'keep') until the
+    # cache fits in max_size bytes.
+    entries = []
+    for name in os.listdir(cache_dir):
+        entry_dir = os.path.join(cache_dir, name)
+        if name.startswith("tmp-") or name.endswith(".lock") or not os.path.isdir(entry_dir):
+            continue
+        entries.append((os.path.getmtime(entry_dir), name, entry_size(entry_dir)))
+    total = sum(size for (_, _, size) in entries)
+    for (_, name, size) in sorted(entries):
+        if total <= max_size:
+            break
+        if name == keep:
+            continue
+        with EntryLock(cache_dir, name):
+            entry_dir = os.path.join(cache_dir, name)
+            if not os.path.isdir(entry_dir):
+                continue
+            # Rename first so no job can find a half deleted entry.
+            doomed = os.path.join(cache_dir, "tmp-evicted-%s-%s" % (name, uuid.uuid4().hex[:8]))
+            os.rename(entry_dir, doomed)
+        shutil.rmtree(doomed, ignore_errors=True)
+        total -= size
+        print("JSON cache: evicted %s (%d bytes)" % (name, size))
+
+if __name__ == "__main__":
+    args = parse_arguments()
+    os.makedirs(args.cacheDir, exist_ok=True)
+    key = cache_key(args.generator)
+    entry_dir = os.path.join(args.cacheDir, key)
+
+    start_time = time.time()
+    with EntryLock(args.cacheDir, key):
+        hit = os.path.isdir(entry_dir)
+        if not hit:
+            generate(args.cacheDir, key, args.generator)
+        touch(entry_dir)
+        link_files(entry_dir, args.outputPrefix)
+    print("JSON cache: %s %s in %f secs" % ("hit" if hit else "miss", key, time.time() - start_time))
+
+    if not hit and args.maxSize > 0:
+        evict(args.cacheDir, args.maxSize, key)
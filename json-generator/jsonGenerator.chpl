@@ -13,6 +13,7 @@ config const outputPrefix="configuration";
 config const edgeDelay=50;
 config const verbose = false;
 config const printTimingInfo = true;
+config const aggregateBalls = false;
 
 config const corners = false;
 config const random = -1;
@@ -54,7 +55,7 @@ record ponger {
       "ballsHeadingNorth": "NORTH",
       "ballsHeadingSouth": "SOUTH",
       "ballsHeadingWest": "WEST",
-      "ballsHeadingEast": "EAST"
+      "ballsHeadingEast": "EAST"AGGREGATE
     }""";
     var partitionInfo = """,
     "partition": {
@@ -62,6 +63,11 @@ record ponger {
       "thread": THREAD
     }""";
     
+    if aggregateBalls {
+      params = params.replace("AGGREGATE", ",\n      \"aggregateBalls\": \"true\"");
+    } else {
+      params = params.replace("AGGREGATE", "");
+    }
     if includeParams {
       fullString = fullString.replace("PARAMS", params);
     } else {
@@ -0,0 +1,274 @@
+# A Python version of jsonGenerator.chpl: writes the per-rank JSON model files
+# for running the ping pong simulation with sst --parallel-load=MULTI.
+#
+# It takes the same options as the Chapel program (so omnidispatch.sh can run
+# either) and writes the same files, byte for byte, except that the initial
+# balls come from placement.py, as they do for pingpong.py and
+# pingpong_parLoad.py.  The deterministic patterns are the same as the Chapel
+# program's apart from the 1D wavefront (a ball at each end, as in
+# pingpong.py, rather than a ball at every ponger); the random patterns place
+# each rank's share of the balls among the pongers it owns, as
+# pingpong_parLoad.py does, reproducibly with --seed.
+#
+# Ranks are written in parallel by a pool of --processes worker processes.
+# Each worker only computes the ids of its rank's pongers and links and
+# streams their JSON through a buffered file, so memory stays proportional to
+# the rank's share of the model rather than the whole document.
+#
+# As in the Chapel program pongers are split between ranks (and a rank's
+# between its threads) in contiguous blocks of ids, pongers are named by id,
+# and links are numbered in row-major order with a ponger's south link before
+# its east link.
+
+import os, sys, time
+import argparse
+import multiprocessing
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import placement
+
+def parseBool(value):
+  # Chapel style booleans: --verbose, --verbose=true, --verbose=false
+  if value.lower() in ('true', '1', 'yes'):
+    return True
+  if value.lower() in ('false', '0', 'no'):
+    return False
+  raise argparse.ArgumentTypeError("expected true or false, got '%s'" % value)
+
+parser = argparse.ArgumentParser(
+  prog='jsonGenerator',
+  description='Write the JSON model files for a ping pong simulation loaded with --parallel-load=MULTI')
+parser.add_argument('--rankCount',       type=int, default=1)
+parser.add_argument('--threadsPerRank',  type=int, default=1)
+parser.add_argument('--sideLength',      type=int, default=4)
+parser.add_argument('--timeToRun',       type=int, default=200)
+parser.add_argument('--outputPrefix',    default="configuration")
+parser.add_argument('--edgeDelay',       type=int, default=50)
+parser.add_argument('--numDims',         type=int, choices=[1,2], default=2)
+parser.add_argument('--verbose',         type=parseBool, nargs='?', const=True, default=False)
+parser.add_argument('--printTimingInfo', type=parseBool, nargs='?', const=True, default=True)
+parser.add_argument('--aggregateBalls',  type=parseBool, nargs='?', const=True, default=False)
+parser.add_argument('--seed',            type=int, default=None)
+parser.add_argument('--processes',       type=int, default=os.cpu_count())
+group = parser.add_mutually_exclusive_group(required=True)
+group.add_argument('--corners',          default=False, action='store_true')
+group.add_argument('--random',           type=int, default=-1)
+group.add_argument('--randomOverlap',    type=int, default=-1)
+group.add_argument('--wavefront',        default=False, action='store_true')
+
+# -----------------------------------------------------------------------------
+# The JSON text, copied from the Chapel program's templates.
+
+PONGER_TEMPLATE = '\n    { \n      "name": "pong_%d",\n      "type": "pingpong.ponger"\n      %s\n      %s\n    }'
+PARAMS_TEMPLATE = (',\n    "params": {\n'
+                   '      "ballsHeadingNorth": "%d",\n'
+                   '      "ballsHeadingSouth": "%d",\n'
+                   '      "ballsHeadingWest": "%d",\n'
+                   '      "ballsHeadingEast": "%d"%s\n'
+                   '    }')
+AGGREGATE_PARAM = ',\n      "aggregateBalls": "true"'
+PARTITION_TEMPLATE = ',\n    "partition": {\n      "rank": %d,\n      "thread": %d\n    }'
+
+LINK_TEMPLATE = ('{\n'
+                 '      "name": "link%d",\n'
+                 '      "left": {\n'
+                 '        "component": "pong_%d",\n'
+                 '        "port": "%sPort",\n'
+                 '        "latency": "%ds"\n'
+                 '        \n'
+                 '      },\n'
+                 '      "right": {\n'
+                 '        "component": "pong_%d",\n'
+                 '        "port": "%sPort",\n'
+                 '        "latency": "%ds"\n'
+                 '      }\n'
+                 '    }')
+
+SIM_TEMPLATE = ('{\n'
+                '  "name": "sim",\n'
+                '  "type": "pingpong.simulator",\n'
+                '  "params": {\n'
+                '    "timeToRun": "%d",\n'
+                '    "verbose": "%s",\n'
+                '    "artificialWork": "0"\n'
+                '  }')
+SIM_PARTITION = ',\n  "partition": {\n    "rank": 0,\n    "thread": 0\n  }\n  '
+
+PROGRAM_OPTIONS_TEMPLATE = ('\n"program_options": {\n'
+                            '  "verbose": "0",\n'
+                            '  "stop-at": "0 ns",\n'
+                            '  "print-timing-info": "%d",\n'
+                            '  "heartbeat-sim-period": "",\n'
+                            '  "heartbeat-wall-period": "0",\n'
+                            '  "timebase": "1 ps",\n'
+                            '  "partitioner": "%s",\n'
+                            '  "timeVortex": "sst.timevortex.priority_queue",\n'
+                            '  "interthread-links": "false",\n'
+                            '  "output-prefix-core": "@x SST Core: ",\n'
+                            '  "checkpoint-sim-period": "",\n'
+                            '  "checkpoint-wall-period": "0"\n'
+                            '}')
+
+# -----------------------------------------------------------------------------
+
+def decimalOrder(ids):
+  # The order that sorts 'ids' as decimal strings ("10" before "2"), which is
+  # how the Chapel program's sort of the JSON strings orders components and
+  # links.  A shorter id that is a prefix of a longer one comes first.
+  ids = np.asarray(ids, dtype=np.int64)
+  if len(ids) == 0:
+    return np.zeros(0, dtype=np.int64)
+  lengths = np.ones(len(ids), dtype=np.int64)
+  for power in range(1, 19):
+    lengths += ids >= 10**power
+  maxLength = int(lengths.max())
+  scaled = ids * 10**(maxLength - lengths)
+  return np.lexsort((lengths, scaled))
+
+class Model:
+  def __init__(self, args):
+    self.args = args
+    self.side = args.sideLength
+    self.elementCount = self.side ** args.numDims
+    self.elementsPerRank = self.elementCount // args.rankCount
+    self.elementsPerThread = self.elementsPerRank // args.threadsPerRank
+
+  def rank(self, ids):
+    return ids // self.elementsPerRank
+
+  def thread(self, ids):
+    return (ids % self.elementsPerRank) // self.elementsPerThread
+
+  def links(self, sources):
+    # (linkIds, fromIds, toIds, isSouth) of the south and east links leaving
+    # the pongers in 'sources'.
+    s = self.side
+    if self.args.numDims == 1:
+      sources = sources[sources + 1 < s]
+      return sources, sources, sources + 1, np.ones(len(sources), dtype=bool)
+    i, j = np.divmod(sources, s)
+    # Every row but the last has 2s-1 links: a south link from every ponger
+    # and an east link from all but the last; the last row only has east links.
+    base = np.where(i < s-1, i * (2*s - 1) + 2*j, (s-1) * (2*s - 1) + j)
+    south = i < s-1
+    east = j < s-1
+    linkIds = np.concatenate([base[south], np.where(south, base + 1, base)[east]])
+    fromIds = np.concatenate([sources[south], sources[east]])
+    toIds   = np.concatenate([sources[south] + s, sources[east] + 1])
+    isSouth = np.concatenate([np.ones(int(south.sum()), dtype=bool), np.zeros(int(east.sum()), dtype=bool)])
+    return linkIds, fromIds, toIds, isSouth
+
+  def balls(self, owned, rankNum):
+    # Balls heading [north, south, west, east] at each owned ponger.  In 1D
+    # placement.py numbers ponger i as i * N.
+    args = self.args
+    N = self.side
+    ids = owned * N if args.numDims == 1 else owned
+    numBalls = None
+    if args.random != -1 or args.randomOverlap != -1:
+      totalBalls = args.random if args.random != -1 else args.randomOverlap
+      numBalls = totalBalls // args.rankCount
+      if rankNum == args.rankCount - 1:
+        numBalls += totalBalls % args.rankCount
+    return placement.placeBalls(args, N, N, ids, numBalls, placement.makeRng(args.seed, rankNum))
+
+def writeJoined(f, strings):
+  # Writes the strings separated by ",\n".
+  first = True
+  for string in strings:
+    if not first:
+      f.write(",\n")
+    f.write(string)
+    first = False
+
+def writeRankJson(args, rankNum):
+  startTime = time.time()
+  model = Model(args)
+  multiRank = args.rankCount > 1
+
+  lo = rankNum * model.elementsPerRank
+  hi = min(lo + model.elementsPerRank, model.elementCount)
+  owned = np.arange(lo, hi, dtype=np.int64)
+  counts = model.balls(owned, rankNum)
+
+  # Links with either end on this rank: the links leaving the pongers it owns
+  # and the links into them from the pongers in the row before.
+  firstSource = max(0, lo - (1 if args.numDims == 1 else model.side))
+  linkIds, fromIds, toIds, isSouth = model.links(np.arange(firstSource, hi, dtype=np.int64))
+  keep = (model.rank(fromIds) == rankNum) | (model.rank(toIds) == rankNum)
+  linkIds, fromIds, toIds, isSouth = linkIds[keep], fromIds[keep], toIds[keep], isSouth[keep]
+  ends = np.concatenate([fromIds, toIds])
+  ghosts = np.unique(ends[model.rank(ends) != rankNum])
+
+  componentIds = np.concatenate([owned, ghosts])
+  isOwned = np.concatenate([np.ones(len(owned), dtype=bool), np.zeros(len(ghosts), dtype=bool)])
+  ranks = model.rank(componentIds)
+  threads = model.thread(componentIds)
+  aggregate = AGGREGATE_PARAM if args.aggregateBalls else ""
+
+  def components():
+    order = decimalOrder(componentIds)
+    ownedBalls = counts.tolist()
+    for me, mine, rank, thread in zip(componentIds[order].tolist(), isOwned[order].tolist(),
+                                      ranks[order].tolist(), threads[order].tolist()):
+      if mine:
+        north, south, west, east = ownedBalls[me - lo]
+        params = PARAMS_TEMPLATE % (north, south, west, east, aggregate)
+      else:
+        params = ""
+      partition = PARTITION_TEMPLATE % (rank, thread) if multiRank else ""
+      yield PONGER_TEMPLATE % (me, params, partition)
+    # The simulator sorts after the pongers (its JSON starts with '{' rather
+    # than a newline).
+    if rankNum == 0:
+      yield SIM_TEMPLATE % (args.timeToRun, "True" if args.verbose else "False") + \
+            (SIM_PARTITION if multiRank else "") + "}"
+
+  def links():
+    order = decimalOrder(linkIds)
+    for linkId, fromId, toId, south in zip(linkIds[order].tolist(), fromIds[order].tolist(),
+                                           toIds[order].tolist(), isSouth[order].tolist()):
+      fromPort, toPort = ("south", "north") if south else ("east", "west")
+      yield LINK_TEMPLATE % (linkId, fromId, fromPort, args.edgeDelay,
+                             toId, toPort, args.edgeDelay)
+
+  partitioner = "sst.single" if args.rankCount == 1 and args.threadsPerRank == 1 else "sst.linear"
+  filename = args.outputPrefix + (str(rankNum) if multiRank else "") + ".json"
+  with open(filename, 'w', buffering=1 << 20) as f:
+    f.write("{")
+    f.write(PROGRAM_OPTIONS_TEMPLATE % (int(args.printTimingInfo), partitioner))
+    f.write(",\n\"components\": [")
+    writeJoined(f, components())
+    f.write("],\n\"links\": [")
+    writeJoined(f, links())
+    f.write("]\n}")
+  return rankNum, time.time() - startTime
+
+def writeRank(job):
+  return writeRankJson(*job)
+
+if __name__ == '__main__':
+  args = parser.parse_args()
+  args.single = False
+
+  model = Model(args)
+  if model.elementsPerRank == 0 or model.elementsPerThread == 0:
+    parser.error("%d pongers can't be split between %d ranks of %d threads" %
+                 (model.elementCount, args.rankCount, args.threadsPerRank))
+
+  startTime = time.time()
+  processes = max(1, min(args.processes, args.rankCount))
+  jobs = [(args, rankNum) for rankNum in range(args.rankCount)]
+  if processes == 1:
+    results = map(writeRank, jobs)
+  else:
+    pool = multiprocessing.Pool(processes)
+    results = pool.imap_unordered(writeRank, jobs)
+  for rankNum, elapsed in results:
+    if args.verbose:
+      print("Rank %d: %f seconds" % (rankNum, elapsed))
+  if processes > 1:
+    pool.close()
+    pool.join()
+  print("Writing JSON: %f seconds" % (time.time() - startTime))
@@ -0,0 +1,68 @@
+# Summarizes how evenly the work of a run was spread over ranks and threads.
+#
+# Reads the statistics written by a run with --statLevel 1 or more (SST's CSV
+# statistic output; one file per rank when run on several ranks) and reports
+# the balls handled by each rank and by each (rank, thread), the max/mean
+# ratio of each (1.0 is a perfect balance), and the balls sent across a
+# partition boundary.
+#
+# Usage: python load-imbalance.py [stats files...]   (default: stats*.csv)
+
+import csv
+import glob
+import re
+import sys
+from collections import defaultdict
+
+def read_stats(filename):
+    # Runs on several ranks write one file per rank, named <file>_<rank>.csv;
+    # use that rank when the file has no Rank column.
+    match = re.search(r'_(\d+)\.csv$', filename)
+    file_rank = match.group(1) if match else '0'
+    with open(filename, newline='') as file:
+        reader = csv.DictReader(file, skipinitialspace=True)
+        for row in reader:
+            row = {key.strip(): value.strip() for key, value in row.items() if key}
+            sum_field = next(key for key in row if key.startswith('Sum.') and not key.startswith('SumSQ'))
+            yield {
+                'component': row['ComponentName'],
+                'statistic': row['StatisticName'],
+                'sub_id': row.get('StatisticSubId', ''),
+                'rank': row.get('Rank', file_rank),
+                'sum': int(float(row[sum_field]))
+            }
+
+def imbalance(totals):
+    if not totals:
+        return 0.0
+    mean = sum(totals.values()) / len(totals)
+    return max(totals.values()) / mean if mean > 0 else 0.0
+
+def print_table(title, totals):
+    print(title)
+    for key in sorted(totals, key=lambda k: tuple(int(x) if x.isdigit() else x for x in k)):
+        print('  %-12s %14d' % ('/'.join(key), totals[key]))
+    print('  max/mean     %14.3f' % imbalance(totals))
+
+filenames = sys.argv[1:] if len(sys.argv) > 1 else sorted(glob.glob('stats*.csv'))
+if not filenames:
+    print("No statistics files found (run with --statLevel 1 or more)")
+    sys.exit(1)
+
+events_by_rank = defaultdict(int)
+events_by_thread = defaultdict(int)
+cross_by_rank = defaultdict(int)
+for filename in filenames:
+    for stat in read_stats(filename):
+        if stat['statistic'] == 'eventsHandled':
+            events_by_rank[(stat['rank'],)] += stat['sum']
+            events_by_thread[(stat['rank'], stat['sub_id'] or '0')] += stat['sum']
+        elif stat['statistic'] == 'crossPartitionSends':
+            cross_by_rank[(stat['rank'],)] += stat['sum']
+
+total_events = sum(events_by_rank.values())
+total_cross = sum(cross_by_rank.values())
+print_table('Events handled per rank', events_by_rank)
+print_table('Events handled per rank/thread', events_by_thread)
+print('Cross-partition sends: %d (%.1f%% of events handled)' %
+      (total_cross, 100.0 * total_cross / total_events if total_events else 0.0))
@@ -0,0 +1,137 @@
+# Which nodes keep failing our jobs.
+#
+# Jobs that fail with MPI connection errors ("inet_connect: connect from
+# <node> to <node> ...") tend to fail on the same few nodes.  This reads the
+# jobs' .out files in one streaming pass and gives every node
+#
+# - its failure rate: the jobs that failed with a connection error involving
+#   the node, over the jobs that ran on it (omnidispatch.sh prints each job's
+#   nodes as "Nodes: ..."; without that line only the failures are known),
+# - and a health score: the number of those failures, each decayed by half
+#   every --half-life hours since it happened (the .out file's modification
+#   time), so a node that was repaired stops being blamed.
+#
+# A job resubmitted with --resume writes over its .out file, so every scan
+# also keeps what it found in each job's file in the directory's
+# nodehealth.json, keyed by the file and the Slurm job id omnidispatch.sh
+# prints ("Job: ..."), and the counts and scores come from that history.
+#
+# Nodes whose score reaches the threshold are the ones to avoid.
+# omnisubmit.py --resume --exclude-bad-nodes resubmits the failed jobs with
+# sbatch --exclude for them, and running this script prints the report:
+#
+#   python3 nodehealth.py [DIR] [--half-life 24] [--threshold 2]
+
+import argparse
+import json
+import os
+import re
+import time
+
+CONNECT_FAILURE = re.compile(r"inet_connect: connect from ([\w.-]+) to ([\w.-]+)")
+NODES_LINE = "Nodes: "
+JOB_LINE = "Job: "
+HISTORY_FILE = "nodehealth.json"
+
+DEFAULT_HALF_LIFE = 24.0  # hours
+DEFAULT_THRESHOLD = 2.0
+
+class NodeHealth:
+    def __init__(self, half_life=DEFAULT_HALF_LIFE, now=None):
+        self.half_life = half_life * 3600
+        self.now = now or time.time()
+        self.jobs = {}      # node -> jobs that ran on it
+        self.failures = {}  # node -> jobs that failed connecting to or from it
+        self.scores = {}    # node -> decayed failures
+        self.saw_node_lists = False
+
+    def add_job(self, nodes, failed_nodes, when):
+        for node in nodes:
+            self.jobs[node] = self.jobs.get(node, 0) + 1
+        weight = 0.5 ** ((self.now - when) / self.half_life)
+        for node in failed_nodes:
+            self.failures[node] = self.failures.get(node, 0) + 1
+            self.scores[node] = self.scores.get(node, 0.0) + weight
+
+    def add_event(self, event):
+        # A job counts once per node however many connections failed
+        self.saw_node_lists = self.saw_node_lists or event["listed"]
+        self.add_job(set(event["nodes"]), set(event["failed"]), event["time"])
+
+    def scan_file(self, filename):
+        # The history event of one job's .out file
+        job = None
+        nodes = set()
+        failed_nodes = set()
+        with open(filename, errors="replace") as f:
+            for line in f:
+                if line.startswith(NODES_LINE):
+                    nodes.update(line[len(NODES_LINE):].split())
+                elif line.startswith(JOB_LINE):
+                    job = line[len(JOB_LINE):].strip()
+                elif "inet_connect" in line:
+                    match = CONNECT_FAILURE.search(line)
+                    if match:
+                        failed_nodes.update(match.groups())
+        return {"job": job, "time": os.path.getmtime(filename), "listed": bool(nodes),
+                "nodes": sorted(nodes | failed_nodes), "failed": sorted(failed_nodes)}
+
+    def scan(self, directory=".", history=True):
+        # Adds the jobs of the directory's .out files and, with history, those
+        # of the earlier scans' files that have since been written over.
+        path = os.path.join(directory, HISTORY_FILE)
+        events = load_history(path) if history else {}
+        for filename in os.listdir(directory):
+            if filename.endswith(".out"):
+                event = self.scan_file(os.path.join(directory, filename))
+                # Without a job id (older files), the file as of its last write
+                events[f"{filename} {event['job'] or event['time']}"] = event
+        if history:
+            save_history(path, events)
+        for event in events.values():
+            self.add_event(event)
+        return self
+
+    def rate(self, node):
+        # None when the jobs' nodes weren't printed
+        if not self.saw_node_lists or node not in self.jobs:
+            return None
+        return self.failures.get(node, 0) / self.jobs[node]
+
+    def bad_nodes(self, threshold=DEFAULT_THRESHOLD):
+        return sorted(node for (node, score) in self.scores.items() if score >= threshold)
+
+    def report(self, threshold=DEFAULT_THRESHOLD):
+        bad = set(self.bad_nodes(threshold))
+        print(f"{'Node':<20} {'Jobs':>6} {'Failures':>9} {'Rate':>7} {'Score':>7}")
+        for node in sorted(self.failures, key=lambda node: -self.scores[node]):
+            rate = self.rate(node)
+            rate_text = f"{rate:.1%}" if rate is not None else "-"
+            flag = "  excluded" if node in bad else ""
+            print(f"{node:<20} {self.jobs[node]:>6} {self.failures[node]:>9} {rate_text:>7} {self.scores[node]:>7.2f}{flag}")
+        print(f"{len(self.jobs)} nodes seen, {len(self.failures)} with connection failures, "
+              f"{len(bad)} at or above a score of {threshold}")
+
+def load_history(path):
+    # {"<.out file> <job>": event} of the earlier scans
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+def save_history(path, events):
+    # Written whole and then renamed, so an interrupted scan leaves the old one
+    with open(path + ".tmp", "w") as f:
+        json.dump(events, f, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report the nodes that jobs' connection failures cluster on.")
+    parser.add_argument("directory", nargs="?", default=".", help="Directory of .out files. Default is '.'.")
+    parser.add_argument("--half-life", type=float, default=DEFAULT_HALF_LIFE,
+                        help=f"Hours for a failure's weight in a node's score to halve. Default is {DEFAULT_HALF_LIFE:g}.")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help=f"Score at which a node is excluded. Default is {DEFAULT_THRESHOLD:g}.")
+    args = parser.parse_args()
+    NodeHealth(args.half_life).scan(args.directory).report(args.threshold)
@@ -0,0 +1,24 @@
+# Runs a bundle of omnidispatch.sh jobs inside one Slurm allocation (see
+# omnisubmit.py --bundle and executors.py).  The bundle file holds one job
+# per line; each job writes its own <prefix>.out and <prefix>.time as if it
+# had been submitted on its own.
+
+import os
+import sys
+
+script_dir = os.path.dirname(os.path.realpath(__file__))
+sys.path.insert(0, script_dir)
+import executors
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("Usage: python3 omnibundle.py <bundle>.jobs")
+        sys.exit(1)
+
+    runner = executors.BundleRunner(os.path.join(script_dir, "omnidispatch.sh"))
+    print(f"Running bundle {sys.argv[1]} with {runner.max_cores} cores per node")
+    with open(sys.argv[1]) as f:
+        for line in f:
+            if line.strip():
+                runner.submit(executors.Job.from_json(line))
+    runner.wait()
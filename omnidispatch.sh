@@ -1,8 +1,20 @@
 #!/bin/bash
 # SST Scaling
 set -x
-scriptDir="$(dirname "$(scontrol show job "$SLURM_JOB_ID" | awk -F= '/Command=/{print $2}')")"
+# Under Slurm the script runs from a spool copy, so ask Slurm where it lives.
+# The local executor and bundles (OMNI_EXECUTOR=local or bundle, see
+# executors.py) run it in place.
+if [[ -n "$OMNI_EXECUTOR" ]]; then
+  scriptDir="$(cd "$(dirname "$0")" && pwd)"
+else
+  scriptDir="$(dirname "$(scontrol show job "$SLURM_JOB_ID" | awk -F= '/Command=/{print $2}')")"
+fi
 echo "$scriptDir"
+# The job and its nodes, for nodehealth.py to blame connection failures on
+if [[ -n "$SLURM_JOB_NODELIST" ]]; then
+  echo "Job: $SLURM_JOB_ID"
+  echo "Nodes: $(scontrol show hostnames "$SLURM_JOB_NODELIST" | tr '\n' ' ')"
+fi
 nodeCount=$1
 ranksPerNode=$2
 threadsPerRank=$3
@@ -21,11 +33,41 @@ timeFile=${prefix}.time
 rm $timeFile
 touch $timeFile
 
+# With a results database (omnisubmit.py --results-db) record the run as
+# running now and with its results when it ends (see results.py)
+recordResult() {
+  if [[ -n "$PINGPONG_RESULTS_DB" ]]; then
+    python3 ${scriptDir}/results.py --db "$PINGPONG_RESULTS_DB" record --status $1 --output $tmpOut --name "$PINGPONG_EXPERIMENT" -- "${dispatchArgs[@]}"
+  fi
+}
+dispatchArgs=("$@")
+recordResult running
+
 inputFlags=""
-simFlags="--numDims $dimCount --N $sideLength --timeToRun $timeStepCount --$commConfig --edgeDelay=$edgeDelay"
+simFlags="--numDims $dimCount --N $sideLength --timeToRun $timeStepCount --$commConfig --edgeDelay=$edgeDelay --printPhases"
+# With omnisubmit.py --sample-interval, every rank samples its memory and
+# progress to ${prefix}_samples_<rank>.bin (see Sampler.h); it's off by default
+# so the sampler thread isn't part of the times.  JSON input doesn't run a
+# builder, so it isn't sampled
+if [[ -n "$PINGPONG_SAMPLE_INTERVAL" ]]; then
+  simFlags="$simFlags --sample ${prefix}_samples --sampleInterval $PINGPONG_SAMPLE_INTERVAL"
+fi
 if [[ "$inputMethod" == "json" ]]; then
   echo "Generating JSON input file..."
-  ${scriptDir}/json-generator/jsonGenerator --rankCount $nodeCount --threadsPerRank $threadsPerRank --sideLength $sideLength --timeToRun $timeStepCount --edgeDelay=$edgeDelay --outputPrefix=$prefix --$commConfig --numDims $dimCount
+  # The Chapel generator if it's been built, and otherwise the Python one
+  # (both take the same options and write the same files).
+  jsonGenerator="${scriptDir}/json-generator/jsonGenerator"
+  if [[ ! -x "$jsonGenerator" ]]; then
+    jsonGenerator="python3 ${scriptDir}/json-generator/jsonGenerator.py"
+  fi
+  generatorArgs="--rankCount $nodeCount --threadsPerRank $threadsPerRank --sideLength $sideLength --timeToRun $timeStepCount --edgeDelay=$edgeDelay --$commConfig --numDims $dimCount"
+  # With a cache directory (omnisubmit.py --json-cache) jobs that need the
+  # same files share one generated copy (see json-generator/jsonCache.py).
+  if [[ -n "$PINGPONG_JSON_CACHE" ]]; then
+    python3 ${scriptDir}/json-generator/jsonCache.py --cacheDir "$PINGPONG_JSON_CACHE" --maxSize "${PINGPONG_JSON_CACHE_SIZE:-0}" --outputPrefix=$prefix -- $jsonGenerator $generatorArgs
+  else
+    $jsonGenerator $generatorArgs --outputPrefix=$prefix
+  fi
   inputFlags="--parallel-load=MULTI ${prefix}.json"
 elif [[ "$inputMethod" == "parallelPython" ]]; then
   inputFlags="--parallel-load=SINGLE ${scriptDir}/pingpong_parLoad.py"
@@ -33,7 +75,24 @@ else
   inputFlags="${scriptDir}/pingpong.py"
 fi
 
-srunPortion="srun -N $nodeCount --ntasks-per-node=$ranksPerNode --cpus-per-task=$threadsPerRank"
+if [[ "$OMNI_EXECUTOR" == "local" ]]; then
+  # Every "node" is this machine
+  srunPortion="mpirun -np $((nodeCount * ranksPerNode)) --bind-to none"
+elif [[ "$OMNI_EXECUTOR" == "bundle" ]]; then
+  # A step of a bundle's allocation, sharing the nodes with other steps.  Where
+  # memory is a consumable resource a step without a memory request gets all
+  # of the node's and the others wait for it, so each asks for the node's
+  # memory in proportion to its cores ($PINGPONG_MEM_PER_CPU MB overrides).
+  nodeMemory=${SLURM_MEM_PER_NODE:-$(scontrol show node "${SLURMD_NODENAME:-$(hostname -s)}" | grep -o 'RealMemory=[0-9]*' | cut -d= -f2)}
+  memPerCpu=${PINGPONG_MEM_PER_CPU:-$(( ${nodeMemory:-0} / ${SLURM_CPUS_ON_NODE:-1} ))}
+  srunPortion="srun -N $nodeCount --ntasks-per-node=$ranksPerNode --cpus-per-task=$threadsPerRank --exact"
+  # --mem-per-cpu=0 would ask for all of it
+  if [[ "$memPerCpu" -gt 0 ]]; then
+    srunPortion="$srunPortion --mem-per-cpu=${memPerCpu}M"
+  fi
+else
+  srunPortion="srun -N $nodeCount --ntasks-per-node=$ranksPerNode --cpus-per-task=$threadsPerRank"
+fi
 
 
 sstVerbose=""
@@ -58,6 +117,7 @@ $srunPortion $hpcPortion $sstPortion > $tmpOut
 
 if [[ $? -ne 0 ]]; then
   echo "Failure" > $timeFile
+  recordResult failure
   if [[ "$inputMethod" == "json" ]]; then
     rm ${prefix}*.json
   fi
@@ -69,6 +129,11 @@ grep "Run stage Time:" $tmpOut | awk '{print $4}' >> $timeFile
 grep "Max Resident Set Size:" $tmpOut | awk -F': *' '{print $2}' >> $timeFile
 grep "Approx. Global Max RSS Size:" $tmpOut | awk -F': *' '{print $2}' >> $timeFile
 
+# The Python builders' per-phase timings, one JSON line per rank (see phases.py)
+grep "^Builder phases: " $tmpOut | sed 's/^Builder phases: //' > ${prefix}.phases
+
+recordResult ok
+
 
 if [[ "$withToolkit" != "None" ]]; then
   hpcstruct -c hpcstruct_cache $measurementsDir
@@ -1,8 +1,13 @@
 import math
 import argparse
 import itertools
+import json
 import subprocess
 import os
+import collections
+import executors
+import nodehealth
+import results
 
 working_dir = os.getcwd()
 script_dir = os.path.dirname(os.path.realpath(__file__))
@@ -21,16 +26,19 @@ def parse_arguments():
     scale_group.add_argument(
         "node_counts", 
         type=int_list, 
+        nargs="?",
         help="List of node counts to use (e.g., '1 2 4 8')."
     )
     scale_group.add_argument(
         "ranks_per_node", 
         type=int_list, 
+        nargs="?",
         help="List of MPI ranks per node to use (e.g., '1 2 4')."
     )
     scale_group.add_argument(
         "threads_per_rank", 
         type=int_list, 
+        nargs="?",
         help="List of threads per MPI rank to use (e.g., '1 2')."
     )
 
@@ -39,7 +47,6 @@ def parse_arguments():
     grid_group.add_argument(
         "--dimensions", 
         type=int_list,
-        required=True, 
         help="Number(s) of dimensions to use (1 or 2 or '1 2' for both)."
     )
     grid_group.add_argument(
@@ -109,7 +116,6 @@ def parse_arguments():
         "--input-method",
         type=input_type_list,
         metavar="METHOD(S)",
-        required=True,
         help="Input method to use (options: 'python', 'parallelPython', 'json'). This accepts a quoted, space-separated list of valid options as well. (e.g., --input-method 'python parallelPython')"
     )
 
@@ -137,26 +143,114 @@ def parse_arguments():
               with scaled problem sizes of those base configurations."
     )
 
+    experiment_group.add_argument(
+        "--json-cache",
+        type=str,
+        default=None,
+        metavar="DIR",
+        help="Share generated JSON input files between jobs through a cache in this directory (on storage all nodes can see)."
+    )
+
+    experiment_group.add_argument(
+        "--json-cache-size",
+        type=str,
+        default="0",
+        metavar="SIZE",
+        help="Size cap for the JSON cache (e.g., '500G'); least recently used files are removed to stay under it. Default is no cap."
+    )
+
     experiment_group.add_argument(
         "--name",
         type=str,
         help="(Optional) Name of the experiment that is appended to the output files."
     )
 
+    parser.add_argument(
+        "--executor",
+        choices=["slurm", "local"],
+        default="slurm",
+        help="Submit the jobs to Slurm (the default), or run them on this machine with mpirun, as many at a time as fit in its cores."
+    )
+
+    parser.add_argument(
+        "--exclude-bad-nodes",
+        action="store_true",
+        help="Keep the jobs off the nodes that earlier jobs' connection failures cluster on (see nodehealth.py), with sbatch --exclude (so not with --executor local). The failures are those in the .out files and nodehealth.json when this command runs, so a bad node a job of this submission runs into is only excluded from later submissions; rerun with --resume to resubmit the jobs that failed on it elsewhere."
+    )
+
+    parser.add_argument(
+        "--bad-node-threshold",
+        type=float,
+        default=nodehealth.DEFAULT_THRESHOLD,
+        help=f"With --exclude-bad-nodes, the health score (connection failures, halving every {nodehealth.DEFAULT_HALF_LIFE:g} hours) at which a node is excluded. Default is {nodehealth.DEFAULT_THRESHOLD:g}."
+    )
+
+    parser.add_argument(
+        "--results-db",
+        default="results.db",
+        help="SQLite database the jobs record their configuration and results in (see results.py). Default is results.db in the current directory; pass '' to only write .time files."
+    )
+
+    parser.add_argument(
+        "--sample-interval",
+        type=float,
+        metavar="SECONDS",
+        help="(Optional) Have every rank sample its memory and progress every SECONDS seconds (the builders' --sample, see Sampler.h) into the results database's samples table. Off by default, as the sampler thread adds to the times measured."
+    )
+
+    parser.add_argument(
+        "--bundle",
+        action="store_true",
+        help="Submit jobs with the same node count together in one Slurm allocation, running side by side when their ranks x threads fit on the nodes and one after another otherwise."
+    )
+
+    parser.add_argument(
+        "--bundle-size",
+        type=int,
+        default=20,
+        help="With --bundle, the most jobs to put in one allocation. Default is 20."
+    )
+
+    parser.add_argument(
+        "--max-cores",
+        type=int,
+        default=None,
+        help="With --executor local, the number of cores the jobs may use at once (ranks x threads per job). Default is every core."
+    )
+
     parser.add_argument(
         "--dry",
         action="store_true",
         help="Dry run (do not submit jobs)."
     )
 
+    parser.add_argument(
+        "--plan",
+        metavar="FILE",
+        help="Submit the configurations listed in a plan file written by planner.py, instead of every combination of the scale, grid, and pattern options."
+    )
+
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Skip the jobs that already finished successfully, and those that are still queued or running, so a partly failed experiment can be restarted. Failed jobs are submitted again."
+    )
+
     args = parser.parse_args()
+    if args.plan is None and None in [args.node_counts, args.ranks_per_node, args.threads_per_rank, args.dimensions, args.input_method]:
+        parser.error("node counts, ranks per node, threads per rank, --dimensions, and --input-method are required without a --plan")
 
-    if args.side_lengths + args.component_counts == []:
+    if args.plan is None and args.side_lengths + args.component_counts == []:
         parser.error("At least one of --side-length or --component-counts must be provided.")
 
+    if args.exclude_bad_nodes and args.executor == "local":
+        parser.error("--exclude-bad-nodes excludes Slurm nodes and can't be used with --executor local")
+
     return args
 
 def print_args(args):
+    if args.plan:
+        print(f"Plan: {args.plan}")
     print(f"Node counts: {args.node_counts}")
     print(f"Ranks per node: {args.ranks_per_node}")
     print(f"Threads per rank: {args.threads_per_rank}")
@@ -178,12 +272,24 @@ def print_args(args):
         print("Verbose output enabled")
     if args.hpctoolkit != '0':
         print("Running simulations with hpctoolkit")
+    if args.executor == "local":
+        print(f"Running jobs locally on {args.max_cores or os.cpu_count()} cores")
+    if args.bundle:
+        print(f"Bundling up to {args.bundle_size} jobs per allocation")
+    if args.resume:
+        print("Resuming: skipping finished, queued, and running jobs")
     if args.dry:
         print("Dry run enabled")
     if args.weak_scaling:
         print("Running weak scaling evaluation")
+    if args.json_cache:
+        print(f"JSON cache: {args.json_cache} (size cap {args.json_cache_size})")
     if args.name:
         print(f"Experiment name: {args.name}")
+    if args.results_db:
+        print(f"Results database: {args.results_db}")
+    if args.sample_interval:
+        print(f"Sampling every {args.sample_interval:g} seconds")
 
 def comm_configs_list(args):
     comm_pattern_args = []
@@ -236,17 +342,29 @@ def submit_job(node_count, ranks_per_node, threads_per_rank, comm_config, grid_c
             prefix = prefix + "_" + with_toolkit.replace(' ', '_')
     if args.name:
         prefix = prefix + "_" + args.name
-    outfile = prefix + ".out"
-
 
-    script_path = os.path.join(script_dir, "omnidispatch.sh")
-
-    sbatch_portion = f"sbatch -N {node_count} --cpus-per-task {threads_per_rank} --ntasks-per-node {ranks_per_node} -o {outfile}"
+    if args.resume:
+        # A job's results are <prefix>.time in the current directory
+        status = results.time_file_status(prefix + ".time")
+        if prefix in queued_prefixes:
+            status = "queued"
+        resume_counts[status or "new"] += 1
+        if status in ["ok", "running", "queued"]:
+            print(f"Skipping {prefix} ({status})")
+            return
+
+    env = {}
+    if args.json_cache and input_method == "json":
+        env["PINGPONG_JSON_CACHE"] = os.path.abspath(args.json_cache)
+        env["PINGPONG_JSON_CACHE_SIZE"] = args.json_cache_size
+    if args.results_db:
+        env["PINGPONG_RESULTS_DB"] = os.path.abspath(args.results_db)
+        if args.name:
+            env["PINGPONG_EXPERIMENT"] = args.name
+    if args.sample_interval:
+        env["PINGPONG_SAMPLE_INTERVAL"] = f"{args.sample_interval:g}"
     arglist = f'{node_count} {ranks_per_node} {threads_per_rank} "{comm_config}" {grid_config[0]} {grid_config[1]} {timestep_count} {edge_delay} {int(verbosity)} {input_method} "{with_toolkit}" {prefix}'
-    command = sbatch_portion + f" {script_path} " + arglist
-    print(command)
-    if not dry:
-        result = subprocess.run(command, shell=True, capture_output=True, text=True)
+    executor.submit(executors.Job(prefix, node_count, ranks_per_node, threads_per_rank, arglist, env))
 
 def scale_comms(comm_config, scale_config):
     if comm_config == "corners" or comm_config == "wavefront":
@@ -277,20 +395,53 @@ if __name__ == "__main__":
     args = parse_arguments()
     print_args(args)
     
-    scale_configs = list(itertools.product(args.node_counts, args.ranks_per_node, args.threads_per_rank))
-    comm_configs = comm_configs_list(args)
-    grid_configs = grid_config_lists(args)
-
     os.chdir(script_dir)
     subprocess.run("make", shell=True, check=True)
     os.chdir(working_dir)
 
-    if args.weak_scaling:
-        run_weak_scaling(args, scale_configs, comm_configs, grid_configs)
+    exclude = []
+    if args.exclude_bad_nodes:
+        health = nodehealth.NodeHealth().scan(working_dir)
+        health.report(args.bad_node_threshold)
+        exclude = health.bad_nodes(args.bad_node_threshold)
+
+    script_path = os.path.join(script_dir, "omnidispatch.sh")
+    if args.executor == "local":
+        executor = executors.LocalExecutor(script_path, args.dry, args.max_cores)
+    elif args.bundle:
+        executor = executors.BundledSlurmExecutor(script_path, args.dry, args.bundle_size, args.name, exclude)
     else:
+        executor = executors.SlurmExecutor(script_path, args.dry, exclude)
+
+    resume_counts = collections.Counter()
+    queued_prefixes = executor.queued_prefixes() if args.resume else set()
+
+    if args.plan:
+        # One configuration per line (see planner.py)
+        with open(args.plan) as f:
+            for line in f:
+                if line.strip():
+                    point = json.loads(line)
+                    submit_job(point["node_count"], point["ranks_per_node"], point["threads_per_rank"], point["comm_config"],
+                               (point["dimensions"], point["side_length"]), point["timestep_count"],
+                               point.get("edge_delay", args.edge_delay),
+                               args.verbose, point["input_method"], args.hpctoolkit, args.dry)
+    elif args.weak_scaling:
+        scale_configs = list(itertools.product(args.node_counts, args.ranks_per_node, args.threads_per_rank))
+        run_weak_scaling(args, scale_configs, comm_configs_list(args), grid_config_lists(args))
+    else:
+        scale_configs = list(itertools.product(args.node_counts, args.ranks_per_node, args.threads_per_rank))
+        comm_configs = comm_configs_list(args)
+        grid_configs = grid_config_lists(args)
         for (node_count, ranks_per_node, threads_per_rank) in scale_configs:
             for comm_config in comm_configs:
                 for grid_config in grid_configs:
                     for timestep_count in args.timestep_counts:
                         for input_method in args.input_method:
-                            submit_job(node_count, ranks_per_node, threads_per_rank, comm_config, grid_config, timestep_count, args.edge_delay, args.verbose, input_method, args.hpctoolkit, args.dry)
\ No newline at end of file
+                            submit_job(node_count, ranks_per_node, threads_per_rank, comm_config, grid_config, timestep_count, args.edge_delay, args.verbose, input_method, args.hpctoolkit, args.dry)
+
+    executor.wait()
+
+    if args.resume:
+        print(f"Resumed: {resume_counts['ok']} finished, {resume_counts['running'] + resume_counts['queued']} still queued or running (skipped); "
+              f"{resume_counts['failure']} failed and {resume_counts['new']} new (submitted)")
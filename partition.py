@@ -0,0 +1,248 @@
+# Rank and thread partitioning of the ping pong grid for the parallel loader.
+#
+# Every partitioner answers two questions for an M x N grid of pongers (rows x
+# columns, ponger id = row * N + col):
+#
+#   owned(rank)        -- the (rows, cols, threads) of the pongers the rank
+#                         owns, sorted by ponger id.
+#   owner(rows, cols)  -- the (ranks, threads) owning the given pongers.
+#
+# Strategies:
+#
+#   rows     -- rank r owns a strip of M/numRanks rows (the final rank takes
+#               the excess) and threads split the columns into strips.  This is
+#               how pingpong_parLoad.py always partitioned the grid.
+#   blocks   -- ranks are laid out on a py x px grid of 2D blocks and each
+#               block is split into sub-blocks for its threads.
+#   hilbert,
+#   morton   -- pongers are ordered along a Hilbert or Morton (Z-order) curve
+#               that covers the grid and the curve is cut into numRanks *
+#               numThreads pieces with equal numbers of pongers.  Rank r owns
+#               pieces [r * numThreads, (r+1) * numThreads).
+#
+# In 1D (a single column of M pongers linked north to south) blocks and curves
+# degenerate to contiguous, balanced runs of rows.
+
+import numpy as np
+
+STRATEGIES = ['rows', 'blocks', 'hilbert', 'morton']
+
+def nearSquareFactors(n, rows=-1, cols=-1):
+  # Returns (rows, cols) with rows * cols == n, honouring whichever of the two
+  # was given and otherwise picking the factorization closest to square.
+  if rows != -1 and cols != -1:
+    if rows * cols != n:
+      raise ValueError("%d x %d is not %d" % (rows, cols, n))
+    return rows, cols
+  if rows != -1 or cols != -1:
+    given = rows if rows != -1 else cols
+    if n % given != 0:
+      raise ValueError("%d does not divide %d" % (given, n))
+    return (given, n // given) if rows != -1 else (n // given, given)
+  rows = int(np.sqrt(n))
+  while n % rows != 0:
+    rows -= 1
+  return rows, n // rows
+
+def splitPoints(length, parts):
+  # Boundaries of 'parts' balanced, contiguous pieces of range(length).
+  return (np.arange(parts + 1, dtype=np.int64) * length) // parts
+
+# -----------------------------------------------------------------------------
+
+class RowPartition:
+  def __init__(self, N, M, numDims, numRanks, numThreads):
+    self.N, self.M, self.numDims = N, M, numDims
+    self.numRanks, self.numThreads = numRanks, numThreads
+    self.rowsPerRank = int(M / numRanks)
+    self.colsPerRank = max(1, int(N / numThreads))
+
+  def rankRows(self, rank):
+    start = rank * self.rowsPerRank
+    end = self.M if rank == self.numRanks-1 else start + self.rowsPerRank
+    return start, end
+
+  def threadOf(self, cols):
+    return np.minimum(cols // self.colsPerRank, self.numThreads-1)
+
+  def owned(self, rank):
+    start, end = self.rankRows(rank)
+    numCols = 1 if self.numDims == 1 else self.N
+    rows = np.repeat(np.arange(start, end, dtype=np.int64), numCols)
+    cols = np.tile(np.arange(numCols, dtype=np.int64), end - start)
+    return rows, cols, self.threadOf(cols)
+
+  def owner(self, rows, cols):
+    ranks = np.minimum(rows // max(1, self.rowsPerRank), self.numRanks-1)
+    return ranks, self.threadOf(cols)
+
+class BlockPartition:
+  def __init__(self, N, M, numDims, numRanks, numThreads, px=-1, py=-1):
+    self.N, self.M, self.numDims = N, M, numDims
+    self.numRanks, self.numThreads = numRanks, numThreads
+    if numDims == 1:
+      self.py, self.px = numRanks, 1
+      self.ty, self.tx = numThreads, 1
+    else:
+      self.py, self.px = nearSquareFactors(numRanks, py, px)
+      self.ty, self.tx = nearSquareFactors(numThreads)
+    self.rowSplits = splitPoints(M, self.py)
+    self.colSplits = splitPoints(1 if numDims == 1 else N, self.px)
+
+  def owned(self, rank):
+    by, bx = divmod(rank, self.px)
+    r0, r1 = self.rowSplits[by], self.rowSplits[by+1]
+    c0, c1 = self.colSplits[bx], self.colSplits[bx+1]
+    rows = np.repeat(np.arange(r0, r1, dtype=np.int64), c1 - c0)
+    cols = np.tile(np.arange(c0, c1, dtype=np.int64), r1 - r0)
+    return rows, cols, self.owner(rows, cols)[1]
+
+  def owner(self, rows, cols):
+    by = np.searchsorted(self.rowSplits, rows, side='right') - 1
+    bx = np.searchsorted(self.colSplits, cols, side='right') - 1
+    # Threads split the rank's block the same way ranks split the grid.
+    r0, r1 = self.rowSplits[by], self.rowSplits[by+1]
+    c0, c1 = self.colSplits[bx], self.colSplits[bx+1]
+    ty = np.minimum(((rows - r0) * self.ty) // np.maximum(1, r1 - r0), self.ty-1)
+    tx = np.minimum(((cols - c0) * self.tx) // np.maximum(1, c1 - c0), self.tx-1)
+    return by * self.px + bx, ty * self.tx + tx
+
+# -----------------------------------------------------------------------------
+
+def hilbertKey(x, y, side):
+  x, y = x.copy(), y.copy()
+  key = np.zeros_like(x)
+  s = side // 2
+  while s > 0:
+    rx = (x & s) > 0
+    ry = (y & s) > 0
+    key += s * s * ((3 * rx) ^ ry)
+    # Rotate the quadrant so the curve's sub-square is in standard position.
+    flip = ~ry & rx
+    x[flip] = side-1 - x[flip]
+    y[flip] = side-1 - y[flip]
+    swap = ~ry
+    x[swap], y[swap] = y[swap], x[swap].copy()
+    s //= 2
+  return key
+
+def hilbertCell(key, side):
+  t = key.copy()
+  x = np.zeros_like(key)
+  y = np.zeros_like(key)
+  s = 1
+  while s < side:
+    rx = 1 & (t // 2)
+    ry = 1 & (t ^ rx)
+    flip = (ry == 0) & (rx == 1)
+    x[flip] = s-1 - x[flip]
+    y[flip] = s-1 - y[flip]
+    swap = ry == 0
+    x[swap], y[swap] = y[swap], x[swap].copy()
+    x += s * rx
+    y += s * ry
+    t //= 4
+    s *= 2
+  return x, y
+
+def mortonKey(x, y, side):
+  key = np.zeros_like(x)
+  bit = 0
+  while (1 << bit) < side:
+    key |= ((x >> bit) & 1) << (2*bit)
+    key |= ((y >> bit) & 1) << (2*bit + 1)
+    bit += 1
+  return key
+
+def mortonCell(key, side):
+  x = np.zeros_like(key)
+  y = np.zeros_like(key)
+  bit = 0
+  while (1 << bit) < side:
+    x |= ((key >> (2*bit)) & 1) << bit
+    y |= ((key >> (2*bit + 1)) & 1) << bit
+    bit += 1
+  return x, y
+
+class CurvePartition:
+  # Chunks of key range decoded at once when enumerating a rank's pongers.
+  chunk = 1 << 20
+
+  def __init__(self, N, M, numDims, numRanks, numThreads, curve):
+    self.N, self.M, self.numDims = N, M, numDims
+    self.numRanks, self.numThreads = numRanks, numThreads
+    self.cols = 1 if numDims == 1 else N
+    numParts = numRanks * numThreads
+    if numDims == 1:
+      # A curve through a single column is just the column.
+      self.side = None
+      self.splits = splitPoints(M, numParts)
+      return
+
+    self.side = 1
+    while self.side < max(N, M):
+      self.side *= 2
+    self.toKey, self.toCell = (hilbertKey, hilbertCell) if curve == 'hilbert' else (mortonKey, mortonCell)
+
+    # Cut the curve into pieces holding equal numbers of in-grid pongers.
+    self.splits = self.keysAfter(splitPoints(N * M, numParts))
+
+  def quadrantArea(self, prefixes, level):
+    # Number of in-grid pongers in each quadtree node of size 2^level, given by
+    # the key prefix shared by the pongers in the node.
+    x, y = self.toCell(prefixes << (2 * level), self.side)
+    x0, y0 = (x >> level) << level, (y >> level) << level
+    size = 1 << level
+    w = np.clip(np.minimum(x0 + size, self.N) - x0, 0, None)
+    h = np.clip(np.minimum(y0 + size, self.M) - y0, 0, None)
+    return w * h
+
+  def keysAfter(self, counts):
+    # For each count c, the smallest key with c in-grid pongers below it.  All
+    # counts descend the quadtree together: at each level a count skips the
+    # child nodes it covers entirely and continues into the one it ends in.
+    counts = np.asarray(counts, dtype=np.int64)
+    remaining = counts.copy()
+    prefixes = np.zeros(len(counts), dtype=np.int64)
+    for level in range(self.side.bit_length() - 2, -1, -1):
+      prefixes <<= 2
+      for q in range(3):
+        area = self.quadrantArea(prefixes, level)
+        skip = remaining > area
+        remaining[skip] -= area[skip]
+        prefixes[skip] += 1
+    # 'prefixes' now holds the key of the count'th ponger.
+    return np.where(counts == 0, 0, prefixes + 1)
+
+  def owned(self, rank):
+    lo = self.splits[rank * self.numThreads]
+    hi = self.splits[(rank + 1) * self.numThreads]
+    if self.side is None:
+      rows = np.arange(lo, hi, dtype=np.int64)
+      cols = np.zeros_like(rows)
+    else:
+      rowChunks, colChunks = [], []
+      for start in range(lo, hi, self.chunk):
+        x, y = self.toCell(np.arange(start, min(hi, start + self.chunk), dtype=np.int64), self.side)
+        inGrid = (x < self.N) & (y < self.M)
+        rowChunks.append(y[inGrid])
+        colChunks.append(x[inGrid])
+      rows = np.concatenate(rowChunks) if rowChunks else np.zeros(0, dtype=np.int64)
+      cols = np.concatenate(colChunks) if colChunks else np.zeros(0, dtype=np.int64)
+      order = np.argsort(rows * self.N + cols)
+      rows, cols = rows[order], cols[order]
+    return rows, cols, self.owner(rows, cols)[1]
+
+  def owner(self, rows, cols):
+    keys = rows if self.side is None else self.toKey(cols, rows, self.side)
+    parts = np.searchsorted(self.splits, keys, side='right') - 1
+    return parts // self.numThreads, parts % self.numThreads
+
+def makePartition(strategy, N, M, numDims, numRanks, numThreads, px=-1, py=-1):
+  if strategy == 'rows':
+    return RowPartition(N, M, numDims, numRanks, numThreads)
+  if strategy == 'blocks':
+    return BlockPartition(N, M, numDims, numRanks, numThreads, px, py)
+  if strategy in ('hilbert', 'morton'):
+    return CurvePartition(N, M, numDims, numRanks, numThreads, strategy)
+  raise ValueError("Unknown partitioner '%s'" % strategy)
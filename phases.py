@@ -0,0 +1,64 @@
+# Per-phase timing for the model builders.
+#
+# A builder creates one PhaseTimer when it starts and calls start() as it
+# moves from one phase of building the model to the next (parsing arguments,
+# placing balls, creating components, creating links, ...).  For every phase
+# the timer records the wall time, any object counts the builder adds with
+# count(), and, when tracemalloc is tracing (--phaseMemory), the peak traced
+# Python memory.  report() prints the result as one JSON line per rank,
+#
+#   Builder phases: {"builder": ..., "rank": 0, "numRanks": 2, "phases": [...]}
+#
+# which omnidispatch.sh collects into <prefix>.phases for consolidate.py.
+
+import json, time, tracemalloc
+
+try:
+  import resource
+except ImportError:
+  resource = None
+
+REPORT_PREFIX = "Builder phases: "
+
+class PhaseTimer:
+  def __init__(self, firstPhase="args"):
+    self.phases = []
+    self.startTime = time.perf_counter()
+    self._begin(firstPhase)
+
+  def _begin(self, name):
+    self.current = {"name": name, "seconds": 0.0}
+    self.phaseStart = time.perf_counter()
+    if tracemalloc.is_tracing():
+      tracemalloc.reset_peak()
+
+  def _end(self):
+    self.current["seconds"] = time.perf_counter() - self.phaseStart
+    if tracemalloc.is_tracing():
+      self.current["peakBytes"] = tracemalloc.get_traced_memory()[1]
+    self.phases.append(self.current)
+
+  def start(self, name):
+    # Ends the current phase and starts the next.
+    self._end()
+    self._begin(name)
+
+  def count(self, **counts):
+    # Adds to the current phase's object counts, e.g. count(components=10).
+    for key, n in counts.items():
+      self.current[key] = self.current.get(key, 0) + int(n)
+
+  def report(self, builder, rank, numRanks):
+    # Ends the last phase and prints this rank's JSON line.
+    self._end()
+    result = {
+      "builder":      builder,
+      "rank":         rank,
+      "numRanks":     numRanks,
+      "totalSeconds": time.perf_counter() - self.startTime,
+      "phases":       self.phases}
+    if resource is not None:
+      # ru_maxrss is in kilobytes on Linux
+      result["maxRssBytes"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    print(REPORT_PREFIX + json.dumps(result), flush=True)
+    return result
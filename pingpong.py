@@ -1,5 +1,11 @@
 import sst
-import argparse, random
+import argparse, tracemalloc
+import phases
+import placement
+import sampler
+import tiling
+
+timer = phases.PhaseTimer()
 
 parser = argparse.ArgumentParser(
   prog='SSTPingPong',
@@ -10,6 +16,16 @@ parser.add_argument('--numDims',        type=int, choices=[1,2], default=2)
 parser.add_argument('--edgeDelay',      type=int, default=50)
 parser.add_argument('--artificialWork', type=int, default=0)
 parser.add_argument('--verbose',        default=False, action='store_true')
+parser.add_argument('--aggregate',      default=False, action='store_true')
+parser.add_argument('--seed',           type=int, default=None)
+parser.add_argument('--tileSize',       type=int, default=1)
+parser.add_argument('--statLevel',      type=int, default=0)
+parser.add_argument('--statFile',       default="stats.csv")
+parser.add_argument('--trace',          default="")
+parser.add_argument('--sample',         default="")
+parser.add_argument('--sampleInterval', type=float, default=1.0)
+parser.add_argument('--printPhases',    default=False, action='store_true')
+parser.add_argument('--phaseMemory',    default=False, action='store_true')
 group = parser.add_mutually_exclusive_group(required=True)
 group.add_argument('--single',          default=False, action='store_true')
 group.add_argument('--corners',         default=False, action='store_true')
@@ -18,118 +34,129 @@ group.add_argument('--randomOverlap',   type=int, default=-1)
 group.add_argument('--wavefront',       default=False, action='store_true')
 args = parser.parse_args()
 
+if args.phaseMemory:
+  tracemalloc.start()
+
+# With --sample the rank's memory is sampled from here on, through the build
+# and SST's partitioning of the model (see sampler.py)
+buildSampler = None
+if args.sample:
+  buildSampler = sampler.BuildSampler(args.sample, args.sampleInterval, sst.getMyMPIRank())
+
+if args.tileSize > 1 and args.edgeDelay < 2:
+  parser.error("--tileSize needs an --edgeDelay of at least 2 (links between tiles take edgeDelay-1)")
+
 # -----------------------------------------------------------------------------
 
 def oppositeDir(direction):
   opposites = {'north': 'south', 'south': 'north', 'west' : 'east', 'east' : 'west'}
   return opposites[direction]
 
+# See TilePonger.h for why links between tiles are a picosecond shorter.
+linkDelay = args.edgeDelay if args.tileSize == 1 else args.edgeDelay - 1
+
 numLinks = 0
 def link(x, y, direction):
   global numLinks
   if args.verbose:
     print("connect ", x.getFullName(), direction, "--", y.getFullName(), oppositeDir(direction))
-  sst.Link("link%i" % numLinks).connect( (x, "%sPort" % direction, "%ips" % args.edgeDelay), (y, "%sPort" % oppositeDir(direction), "%ips" % args.edgeDelay) )
+  sst.Link("link%i" % numLinks).connect( (x, "%sPort" % direction, "%ips" % linkDelay), (y, "%sPort" % oppositeDir(direction), "%ips" % linkDelay) )
   numLinks += 1
 
 # -----------------------------------------------------------------------------
 
+# Component statistics (see the README) are off unless --statLevel is given.
+# This build doesn't know how SST will partition the grid, so the pongers'
+# crossPartitionSends stay zero; use pingpong_parLoad.py to measure those.
+if args.statLevel > 0:
+  sst.setStatisticLoadLevel(args.statLevel)
+  sst.setStatisticOutput("sst.statOutputCSV", {"filepath": args.statFile, "separator": ","})
+  sst.enableAllStatisticsForAllComponents()
+
+# With --sample every rank records its memory and progress to
+# <sample>_<rank>.bin (see Sampler.h); the pongers share the parameters, and
+# continue the builder's samples.
+if args.sample:
+  sst.addGlobalParams("sampling", {"sampleFile": args.sample, "sampleInterval": args.sampleInterval,
+                                   "sampleEpoch": buildSampler.epoch})
+
+# With --trace the pongers on every rank record the balls they send, not only
+# those on the simulator's rank (see Trace.h)
+if args.trace:
+  sst.addGlobalParams("tracing", {"traceFile": args.trace})
+
 simulator = sst.Component("sim", "pingpong.simulator")
 simulator.addParams({"timeToRun"      : args.timeToRun,
                    "verbose"        : args.verbose,
-                   "artificialWork" : args.artificialWork})
+                   "artificialWork" : args.artificialWork,
+                   "traceFile"      : args.trace})
 
 pingPongers = {}
-ballsHeadingNorthAt = {}
-ballsHeadingSouthAt = {}
-ballsHeadingWestAt  = {}
-ballsHeadingEastAt  = {}
-
-NW_PONGER = 0
-NE_PONGER = args.N-1
-SW_PONGER = args.N * (args.N-1)
-SE_PONGER = (args.N * args.N) - 1
-
-if args.single:
-  if args.numDims == 1:
-    ballsHeadingSouthAt[NW_PONGER] = 1
-  elif args.numDims == 2:
-    ballsHeadingEastAt[NW_PONGER] = 1
-  else:
-    print("Invalid configuration")
-    exit(1)
-elif args.corners:
-  if args.numDims == 1:
-    ballsHeadingEastAt[NW_PONGER] = 1
-    ballsHeadingWestAt[NE_PONGER] = 1
-  elif args.numDims > 1:
-    ballsHeadingEastAt[NW_PONGER] = 1
-    ballsHeadingWestAt[NE_PONGER] = 1
-    ballsHeadingEastAt[SW_PONGER] = 1
-    ballsHeadingWestAt[SE_PONGER] = 1
-    ballsHeadingSouthAt[NW_PONGER] = 1
-    ballsHeadingSouthAt[NE_PONGER] = 1
-    ballsHeadingNorthAt[SW_PONGER] = 1
-    ballsHeadingNorthAt[SE_PONGER] = 1
-elif args.random != -1:
-  sample = random.sample(range(args.N * args.N), min(args.N *args.N,args.random))
-  for r in sample:
-    direction = random.randint(0,3)
-    if direction   == 0: ballsHeadingNorthAt[r] = 1
-    elif direction == 1: ballsHeadingSouthAt[r] = 1
-    elif direction == 2: ballsHeadingWestAt[r]  = 1
-    elif direction == 3: ballsHeadingEastAt[r]  = 1
-elif args.randomOverlap != -1:
-  for _ in range(args.randomOverlap):
-    r = random.randint(0, args.N * args.N - 1)
-    direction = random.randint(0,3)
-    if direction   == 0: ballsHeadingNorthAt[r] = ballsHeadingNorthAt.get(r,0) + 1
-    elif direction == 1: ballsHeadingSouthAt[r] = ballsHeadingSouthAt.get(r,0) + 1
-    elif direction == 2: ballsHeadingWestAt[r]  = ballsHeadingWestAt.get(r,0) + 1
-    elif direction == 3: ballsHeadingEastAt[r]  = ballsHeadingEastAt.get(r,0) + 1
-elif args.wavefront:
-  for i in range(0,args.N):
-     ballsHeadingSouthAt[i]                   = 1
-     ballsHeadingEastAt[i*args.N]             = 1
-     ballsHeadingWestAt[(i+1)*args.N-1]       = 1
-     ballsHeadingNorthAt[args.N*(args.N-1)+i] = 1
-else:
-  print("Unknown ball placement configuration")
-  exit(1)
+
+timer.start("placement")
+ids    = placement.gridIds(args.N, 0, args.N, args.numDims)
+counts = placement.placeBalls(args, args.N, args.N, ids, rng=placement.makeRng(args.seed))
 
 if args.verbose:
   print("Initial balls --")
-  for i in [0] if args.numDims == 1 else range(0,args.N):
-    for j in range(0,args.N):
-      me = i * args.N + j;
-      if me in ballsHeadingEastAt:  print("%5i %s" % (me, "east"))
-      if me in ballsHeadingWestAt:  print("%5i %s" % (me, "west"))
-      if me in ballsHeadingSouthAt: print("%5i %s" % (me, "south"))
-      if me in ballsHeadingNorthAt: print("%5i %s" % (me, "north"))
-
-for i in range(0,args.N):
-  for j in [0] if args.numDims == 1 else range(0,args.N):
-    me = i * args.N + j;
-    ponger = sst.Component("pong_%i_%i" % (i,j), "pingpong.ponger")
-    ponger.addParams({
-      "ballsHeadingNorth": ballsHeadingNorthAt.get(me, 0),
-      "ballsHeadingSouth": ballsHeadingSouthAt.get(me, 0),
-      "ballsHeadingWest":  ballsHeadingWestAt.get(me, 0),
-      "ballsHeadingEast":  ballsHeadingEastAt.get(me, 0)})
-    pingPongers[me] = ponger;
+  placement.printBalls(ids, counts, args.N)
+
+# With --tileSize the grid is built from tile pongers, each simulating a
+# block of pongers (see tiling.py); the tiles are linked like pongers.
+timer.start("components")
+if args.tileSize > 1:
+  rows, cols = tiling.tileGrid(args.N, args.N, args.numDims, args.tileSize)
+  tileBalls  = tiling.tileBalls(ids, counts, args.N, args.N, args.numDims, args.tileSize)
+  for i in range(0,rows):
+    for j in range(0,cols):
+      tile = sst.Component("tile_%i_%i" % (i,j), "pingpong.tilePonger")
+      tile.addParams(tiling.tileParams(i, j, args.N, args.N, args.numDims, args.tileSize,
+                                       args.edgeDelay, tileBalls.get((i,j))))
+      if args.sample:
+        tile.addGlobalParamSet("sampling")
+      pingPongers[i * cols + j] = tile
+else:
+  rows, cols = args.N, 1 if args.numDims == 1 else args.N
+  k = 0
+  for i in range(0,rows):
+    for j in range(0,cols):
+      me = i * cols + j;
+      north, south, west, east = counts[k].tolist()
+      ponger = sst.Component("pong_%i_%i" % (i,j), "pingpong.ponger")
+      ponger.addParams({
+        "ballsHeadingNorth": north,
+        "ballsHeadingSouth": south,
+        "ballsHeadingWest":  west,
+        "ballsHeadingEast":  east,
+        "aggregateBalls":    args.aggregate})
+      if args.sample:
+        ponger.addGlobalParamSet("sampling")
+      if args.trace:
+        ponger.addGlobalParamSet("tracing")
+      pingPongers[me] = ponger;
+      k += 1
+
+timer.count(components=len(pingPongers))
 
 # i = row, j = col, (0,0) = north west corner
-for i in range(0,args.N):
-  for j in [0] if args.numDims == 1 else range(0,args.N):
-    me = i * args.N + j;
-    neighborS = me + args.N
+timer.start("links")
+for i in range(0,rows):
+  for j in range(0,cols):
+    me = i * cols + j;
+    neighborS = me + cols
     neighborE = me + 1
 
-    connectS = i < args.N-1 
-    connectE = j < args.N-1 and args.numDims > 1
+    connectS = i < rows-1
+    connectE = j < cols-1
 
     if connectS:
       link(pingPongers[me], pingPongers[neighborS], "south")
     if connectE:
       link(pingPongers[me], pingPongers[neighborE], "east")
+timer.count(links=numLinks)
+
+if args.printPhases:
+  timer.report("pingpong", sst.getMyMPIRank(), sst.getMPIRankCount())
 
+if buildSampler:
+  buildSampler.partition()
@@ -4,9 +4,14 @@
 # balls are placed on the final rank.
 
 import sst
-import time, argparse, random
+import sys, time, argparse, random, tracemalloc
+from array import array
+import hypermap
+import phases
+import sampler
 
 startTime = time.time()
+timer = phases.PhaseTimer()
 
 parser = argparse.ArgumentParser(
   prog='SSTPingPong',
@@ -16,7 +21,22 @@ parser.add_argument('--timeToRun',      type=int, default=200)
 parser.add_argument('--edgeDelay',      type=int, default=50)
 parser.add_argument('--artificialWork', type=int, default=0)
 parser.add_argument('--verbose',        default=False, action='store_true')
+parser.add_argument('--aggregate',      default=False, action='store_true')
+parser.add_argument('--grids',          type=int, default=-1)
+parser.add_argument('--fanout',         type=int, default=100)
+parser.add_argument('--localBias',      type=float, default=1.0)
+parser.add_argument('--seed',           type=int, default=0)
 parser.add_argument('--dryRun',         type=int, default=-1)
+parser.add_argument('--preflight',      default=False, action='store_true')
+parser.add_argument('--mapping',        choices=hypermap.STRATEGIES, default='block')
+parser.add_argument('--mapPasses',      type=int, default=2)
+parser.add_argument('--statLevel',      type=int, default=0)
+parser.add_argument('--statFile',       default="stats.csv")
+parser.add_argument('--trace',          default="")
+parser.add_argument('--sample',         default="")
+parser.add_argument('--sampleInterval', type=float, default=1.0)
+parser.add_argument('--printPhases',    default=False, action='store_true')
+parser.add_argument('--phaseMemory',    default=False, action='store_true')
 group = parser.add_mutually_exclusive_group(required=True)
 group.add_argument('--corners',         default=False, action='store_true')
 group.add_argument('--random',          type=int, default=-1)
@@ -24,11 +44,23 @@ group.add_argument('--randomOverlap',   type=int, default=-1)
 group.add_argument('--wavefront',       default=False, action='store_true')
 args = parser.parse_args()
 
+if args.phaseMemory:
+  tracemalloc.start()
+
+# With --sample the rank's memory is sampled from here on, through the build
+# and SST's partitioning of the model (see sampler.py)
+buildSampler = None
+if args.sample and args.dryRun == -1:
+  buildSampler = sampler.BuildSampler(args.sample, args.sampleInterval, sst.getMyMPIRank())
+
 # -----------------------------------------------------------------------------
 
 N = args.N
-nGrids = (N*N) * 100
-nHlPerPt = 100
+# Each point has --fanout pass 1 and --fanout pass 2 hyperlinks (ports
+# port_0 .. port_<2*fanout-1>), and there are N*N*100 grids unless --grids says
+# otherwise.
+nHlPerPt = args.fanout
+nGrids = args.grids if args.grids != -1 else (N*N) * 100
 
 if args.dryRun == -1:
   myRank   = sst.getMyMPIRank()
@@ -39,9 +71,17 @@ else:
 
 # -----------------------------------------------------------------------------
 
-pongers = {}
+# The pongers this rank owns, N*N per grid in a list in the order of myGrids
+# (gridSlot[g] is grid g's place in it, or -1), and its ghosts by ponger id.
+# A ghost grid has only a few of its points linked to this rank, so only
+# those get an entry.
+pongers = []
+gridSlot = None
+ghostPongers = {}
+remotePorts = {}  # owned ponger -> its ports that link to another rank
 numGhostPongers = 0
 numNumGhostComponents = 0
+numLinks = 0
 
 def oppositeDir(direction):
   opposites = {'north': 'south', 'south': 'north', 'west' : 'east', 'east' : 'west'}
@@ -57,40 +97,54 @@ def pongerLoc(someId):
   j = int(xyId % N)
   return (gridNum,i,j)
 
+def pongerIndex(g,i,j):
+  # The owned ponger's place in pongers
+  return gridSlot[g] * (N*N) + i * N + j
+
 def ponger(g,i,j):
-  global pongers, numGhostPongers, numNumGhostComponents 
+  global numGhostPongers, numNumGhostComponents
 
   me = pongerId(g,i,j)
-  if me in pongers:
-    return pongers[me]
+  if gridSlot[g] != -1:
+    k = pongerIndex(g,i,j)
+    if pongers[k] is not None:
+      return pongers[k]
+  elif me in ghostPongers:
+    return ghostPongers[me]
 
   ponger = None
   if args.dryRun == -1:
     ponger = sst.Component("p%i" % (me), "pingpong.hyperPonger")
   else:
     ponger = 1 # dummy value
-  pongerRank = int(g / gridsPerRank)
+  pongerRank = gridRank[g]
   if args.dryRun == -1:
     ponger.setRank(pongerRank)
     if pongerRank == myRank:
-      ponger.addParams({"numBalls": 0})
-  pongers[me] = ponger;
-
-  isGhostPonger = int(g/gridsPerRank) != myRank
+      ponger.addParams({"numBalls": 0, "aggregateBalls": args.aggregate, "hyperPorts": 2 * nHlPerPt,
+                        "localBias": args.localBias, "seed": args.seed})
+      if args.sample:
+        ponger.addGlobalParamSet("sampling")
+      if args.trace:
+        ponger.addGlobalParamSet("tracing")
+
+  isGhostPonger = pongerRank != myRank
   if isGhostPonger:
+    ghostPongers[me] = ponger
     numGhostPongers += 1
   else:
+    pongers[k] = ponger
     numNumGhostComponents += 1
 
   if args.verbose:
-    print(f"Make ponger ({g},{i},{j}) on {int(g / gridsPerRank)} {'*' if isGhostPonger else ' '}")
+    print(f"Make ponger ({g},{i},{j}) on {pongerRank} {'*' if isGhostPonger else ' '}")
   return ponger
 
 def hyperLink(g1,i1,j1, g2,i2,j2, port1Name, port2Name, isPass2=False):
+  global numLinks
+  numLinks += 1
   id1 = pongerId(g1,i1,j1)
   id2 = pongerId(g2,i2,j2)
-  minId = min(id1,id2)
-  maxId = max(id1,id2)
 
   ponger1 = ponger(g1,i1,j1)
   ponger2 = ponger(g2,i2,j2)
@@ -98,10 +152,29 @@ def hyperLink(g1,i1,j1, g2,i2,j2, port1Name, port2Name, isPass2=False):
   if args.verbose:
     print("Connect (%d,%d,%d) %s -- (%d,%d,%d) %s" % (g1,i1,j1,port1Name, g2,i2,j2,port2Name))
 
-  linkName = "l%s%d_%d" % ('' if not isPass2 else 'b', minId, maxId)
+  if args.statLevel > 0:
+    rank1, rank2 = gridRank[g1], gridRank[g2]
+    if rank1 != rank2:
+      for rank, me, portName in ((rank1, id1, port1Name), (rank2, id2, port2Name)):
+        if rank == myRank:
+          remotePorts.setdefault(me, []).append(portNumber(portName))
+
+  # Both ranks of a link between ranks give it the same name.  A pair of
+  # pongers can have several hyperlinks between them (once --fanout wraps round
+  # the grids), so the name has the lower ponger's port in it too.
   if args.dryRun == -1:
+    lowPort = portNumber(port1Name if id1 <= id2 else port2Name)
+    linkName = "l%s%d_%d_%d" % ('' if not isPass2 else 'b', min(id1,id2), max(id1,id2), lowPort)
     sst.Link(linkName).connect( (ponger1, port1Name, "%ips" % args.edgeDelay), (ponger2, port2Name, "%ips" % args.edgeDelay) )
 
+# The hyperPonger's number for a port: 0-3 for port_n, port_s, port_w, and
+# port_e, then 4+x for port_x.
+def portNumber(portName):
+  gridPorts = {"port_n": 0, "port_s": 1, "port_w": 2, "port_e": 3}
+  if portName in gridPorts:
+    return gridPorts[portName]
+  return 4 + int(portName[len("port_"):])
+
 def prevDivisor(x, y):
   while True:
     if x % y == 0:
@@ -123,16 +196,65 @@ if nGrids % numRanks != 0:
         (nGrids, numRanks, prevDivisor(nGrids, numRanks), nextDivisor(nGrids, numRanks)))
   exit(1)
 
+# Which rank each grid goes to (see hypermap.py).  Every rank computes the
+# same mapping.
+timer.start("mapping")
+graph = hypermap.HyperGraph(nGrids, N * N, nHlPerPt)
+gridRank = hypermap.makeMapping(args.mapping, graph, numRanks, args.mapPasses)
+if myRank == 0 and args.mapping != 'block':
+  totalLinks = graph.totalLinks()
+  print("Hyperlinks cut between ranks: %.1f%% with block mapping, %.1f%% with %s mapping" %
+        (100.0 * graph.cutLinks(hypermap.blockMapping(nGrids, numRanks)) / totalLinks,
+         100.0 * graph.cutLinks(gridRank) / totalLinks, args.mapping))
+
+# --preflight only prints each rank's expected share of the model and what it
+# needs in memory (see hypermap.preflight), without making any of it.
+if args.preflight:
+  if myRank == 0:
+    hypermap.printPreflight(hypermap.preflight(graph, gridRank, numRanks))
+  sys.exit(0)
+
+gridRank = gridRank.tolist()
+myGrids = [g for g in range(nGrids) if gridRank[g] == myRank]
+gridSlot = array('i', [-1]) * nGrids
+for slot, g in enumerate(myGrids):
+  gridSlot[g] = slot
+pongers = [None] * (len(myGrids) * N*N)
+
+# Component statistics (see the README) are off unless --statLevel is given.
+if args.statLevel > 0 and args.dryRun == -1:
+  sst.setStatisticLoadLevel(args.statLevel)
+  sst.setStatisticOutput("sst.statOutputCSV", {"filepath": args.statFile, "separator": ","})
+  sst.enableAllStatisticsForAllComponents()
+
+# With --sample every rank records its memory and progress to
+# <sample>_<rank>.bin (see Sampler.h); the pongers share the parameters, and
+# continue the builder's samples.
+if args.sample and args.dryRun == -1:
+  sst.addGlobalParams("sampling", {"sampleFile": args.sample, "sampleInterval": args.sampleInterval,
+                                   "sampleEpoch": buildSampler.epoch})
+
+# With --trace the pongers on every rank record the balls they send, not only
+# those on the simulator's rank (see Trace.h)
+if args.trace and args.dryRun == -1:
+  sst.addGlobalParams("tracing", {"traceFile": args.trace})
+
 if myRank == 0:
-  print("Simulating %d, %dx%d grids" % (nGrids, N, N))
+  print("Simulating %d, %dx%d grids, %d hyperlinks per point" % (nGrids, N, N, 2 * nHlPerPt))
+  # A ball leaves its grid through one of the point's hyperlinks, each
+  # weighted 1, or stays through one of its (up to 4) grid ports, each
+  # weighted --localBias
+  print("A ball at a point with four neighbors in its grid leaves it with probability %.3f" %
+        (2 * nHlPerPt / (2 * nHlPerPt + 4 * args.localBias)))
   simulation = sst.Component("sim", "pingpong.simulator")
   simulation.addParams({"timeToRun"      : args.timeToRun,
                      "verbose"        : args.verbose,
-                     "artificialWork" : args.artificialWork})
+                     "artificialWork" : args.artificialWork,
+                     "traceFile"      : args.trace})
   simulation.setRank(0)
 
-# Consider if we have 400 2x2 grids, we assign inter-grid connections as
-# follows, where each * is a point in the 2x2 grid.  The number above each
+# Consider if we have 400 2x2 grids (and the default fanout of 100), we assign
+# inter-grid connections as follows, where each * is a point in the 2x2 grid.  The number above each
 # point we call the pass 1 links and the numbers bove and below we call pass 2.
 #
 #           GRID 0                   GRID 1
@@ -151,8 +273,10 @@ if myRank == 0:
 
 passVerbosity = 0  # Set to 1 to see debug output for pass 1 links, and 2 to see debug output for pass 2 links 
 
-firstGridOnRank = myRank * gridsPerRank
-for g in range(firstGridOnRank, (myRank+1) * gridsPerRank):
+# Pongers are created as the links between them are, so the two are timed
+# together.
+timer.start("grids")
+for g in myGrids:
   pass1NextGrid = (nGrids - g) % nGrids
   pass2NextGrid = nGrids - g - 1
 
@@ -173,15 +297,16 @@ for g in range(firstGridOnRank, (myRank+1) * gridsPerRank):
         hyperLink(g,i,j, g,i,j+1, "port_e", "port_w")
 
       for x in range(0,nHlPerPt):
-        if pass1NextGrid > g or pass1NextGrid < firstGridOnRank:
+        # Links between grids on the same rank are made from the lower one
+        if pass1NextGrid > g or gridRank[pass1NextGrid] != myRank:
           hyperLink(g,i,j, pass1NextGrid,i,j, "port_%d" % (x), "port_%d" % (x))
           if passVerbosity == 1:
             print(pass1NextGrid, " ", end="")
         elif passVerbosity == 1:
           print("-", " ", end="")
 
-        if pass2NextGrid > g or pass2NextGrid < firstGridOnRank:
-          hyperLink(g,i,j, pass2NextGrid,i,j, "port_%d" % (x + 100), "port_%d" % (x + 100), True)
+        if pass2NextGrid > g or gridRank[pass2NextGrid] != myRank:
+          hyperLink(g,i,j, pass2NextGrid,i,j, "port_%d" % (x + nHlPerPt), "port_%d" % (x + nHlPerPt), True)
           if passVerbosity == 2:
             print(pass2NextGrid, " ", end="")
         elif passVerbosity == 2:
@@ -190,6 +315,17 @@ for g in range(firstGridOnRank, (myRank+1) * gridsPerRank):
         pass1NextGrid = (pass1NextGrid + 1) % nGrids
         pass2NextGrid = (pass2NextGrid - 1) % nGrids
 
+if args.statLevel > 0 and args.dryRun == -1:
+  for me, ports in remotePorts.items():
+    pongers[pongerIndex(*pongerLoc(me))].addParams({"remotePorts": "[%s]" % ", ".join(map(str, ports))})
+
+timer.count(components=numNumGhostComponents, ghosts=numGhostPongers, links=numLinks)
+if args.printPhases:
+  timer.report("pingpong_hyper", myRank, numRanks)
+
+if buildSampler:
+  buildSampler.partition()
+
 if(args.dryRun != -1):
   endTime = time.time()
   elapsedTime = endTime - startTime
@@ -2,11 +2,22 @@
 # --parallel-load=SINGLE.  For --random and --randomOverlap ball placement we
 # put a (roughly) even number of randomly place balls in each rank. Excess
 # balls are placed on the final rank.
+#
+# How the grid is divided between ranks and threads is chosen with
+# --partitioner (see partition.py).  Each rank creates the pongers it owns plus
+# a "ghost" for every neighbor owned by another rank.
 
 import sst, time
-import argparse, random
+import argparse, tracemalloc
+import numpy as np
+import partition
+import phases
+import placement
+import sampler
+import tiling
 
 startTime = time.time()
+timer = phases.PhaseTimer()
 
 parser = argparse.ArgumentParser(
   prog='SSTPingPong',
@@ -18,7 +29,21 @@ parser.add_argument('--timeToRun',      type=int, default=200)
 parser.add_argument('--edgeDelay',      type=int, default=50)
 parser.add_argument('--artificialWork', type=int, default=0)
 parser.add_argument('--verbose',        default=False, action='store_true')
+parser.add_argument('--aggregate',      default=False, action='store_true')
 parser.add_argument('--printTime',      default=False, action='store_true')
+parser.add_argument('--seed',           type=int, default=None)
+parser.add_argument('--tileSize',       type=int, default=1)
+parser.add_argument('--partitioner',    choices=partition.STRATEGIES, default='rows')
+parser.add_argument('--px',             type=int, default=-1)
+parser.add_argument('--py',             type=int, default=-1)
+parser.add_argument('--printPartition', default=False, action='store_true')
+parser.add_argument('--statLevel',      type=int, default=0)
+parser.add_argument('--statFile',       default="stats.csv")
+parser.add_argument('--trace',          default="")
+parser.add_argument('--sample',         default="")
+parser.add_argument('--sampleInterval', type=float, default=1.0)
+parser.add_argument('--printPhases',    default=False, action='store_true')
+parser.add_argument('--phaseMemory',    default=False, action='store_true')
 group = parser.add_mutually_exclusive_group(required=True)
 group.add_argument('--single',          default=False, action='store_true')
 group.add_argument('--corners',         default=False, action='store_true')
@@ -30,20 +55,36 @@ args = parser.parse_args()
 if args.M == -1:
   args.M = args.N
 
+if args.phaseMemory:
+  tracemalloc.start()
+
+# With --sample the rank's memory is sampled from here on, through the build
+# and SST's partitioning of the model (see sampler.py)
+buildSampler = None
+if args.sample:
+  buildSampler = sampler.BuildSampler(args.sample, args.sampleInterval, sst.getMyMPIRank())
+
+if args.tileSize > 1 and args.edgeDelay < 2:
+  parser.error("--tileSize needs an --edgeDelay of at least 2 (links between tiles take edgeDelay-1)")
+
 # -----------------------------------------------------------------------------
 
 def oppositeDir(direction):
   opposites = {'north': 'south', 'south': 'north', 'west' : 'east', 'east' : 'west'}
   return opposites[direction]
 
+# See TilePonger.h for why links between tiles are a picosecond shorter.
+linkDelay = args.edgeDelay if args.tileSize == 1 else args.edgeDelay - 1
+
 numLinks = 0
 def link(x,y, ponger1, ponger2, direction):
   global numLinks
   if args.verbose:
     print("on %d connect " % myRank, ponger1.getFullName(), direction, "--", ponger2.getFullName(), oppositeDir(direction))
+  numLinks += 1
   linkName = "link_%d_%d_%s" % (x,y,direction)
 
-  sst.Link(linkName).connect( (ponger1, "%sPort" % direction, "%i ps" % args.edgeDelay), (ponger2, "%sPort" % oppositeDir(direction), "%i ps" % args.edgeDelay) )
+  sst.Link(linkName).connect( (ponger1, "%sPort" % direction, "%i ps" % linkDelay), (ponger2, "%sPort" % oppositeDir(direction), "%i ps" % linkDelay) )
 
 # -----------------------------------------------------------------------------
 
@@ -60,150 +101,176 @@ if myRank == 0:
   warnIfNotDivisibleByNumRanks(args.random)
   warnIfNotDivisibleByNumRanks(args.randomOverlap)
 
+# Component statistics (see the README) are off unless --statLevel is given.
+if args.statLevel > 0:
+  sst.setStatisticLoadLevel(args.statLevel)
+  sst.setStatisticOutput("sst.statOutputCSV", {"filepath": args.statFile, "separator": ","})
+  sst.enableAllStatisticsForAllComponents()
+
+# With --sample every rank records its memory and progress to
+# <sample>_<rank>.bin (see Sampler.h); the pongers share the parameters, and
+# continue the builder's samples.
+if args.sample:
+  sst.addGlobalParams("sampling", {"sampleFile": args.sample, "sampleInterval": args.sampleInterval,
+                                   "sampleEpoch": buildSampler.epoch})
+
 simulator = sst.Component("sim", "pingpong.simulator")
 simulator.addParams({"timeToRun"      : args.timeToRun,
                      "verbose"        : args.verbose,
-                     "artificialWork" : args.artificialWork})
+                     "artificialWork" : args.artificialWork,
+                     "traceFile"      : args.trace})
 simulator.setRank(myRank)
 
 pingPongers = {}
-ballsHeadingNorthAt = {}
-ballsHeadingSouthAt = {}
-ballsHeadingWestAt  = {}
-ballsHeadingEastAt  = {}
-
-rowsPerRank  = int(args.M / numRanks)
-colsPerRank  = int(args.N / numThreads)
-rankRowStart = myRank * rowsPerRank
-rankRowEnd   = args.M if myRank == numRanks-1 else rankRowStart + rowsPerRank
-numComponentsOwnedByRank = (rankRowEnd - rankRowStart) * args.N;
-
-NW_PONGER = 0
-NE_PONGER = args.N-1
-SW_PONGER = args.N * (args.M-1)
-SE_PONGER = (args.N * args.M) - 1
-
-if args.single:
-  if args.numDims == 1:
-    ballsHeadingSouthAt[NW_PONGER] = 1
-  elif args.numDims == 2:
-    ballsHeadingEastAt[NW_PONGER] = 1
-  else:
-    print("Invalid configuration")
-    exit(1)
-elif args.corners:
-  if args.numDims == 1:
-    ballsHeadingSouthAt[NW_PONGER] = 1
-    ballsHeadingNorthAt[SW_PONGER] = 1
-  elif args.numDims == 2:
-    ballsHeadingEastAt[NW_PONGER] = 1
-    ballsHeadingWestAt[NE_PONGER] = 1
-    ballsHeadingEastAt[SW_PONGER] = 1
-    ballsHeadingWestAt[SE_PONGER] = 1
-    ballsHeadingSouthAt[NW_PONGER] = 1
-    ballsHeadingSouthAt[NE_PONGER] = 1
-    ballsHeadingNorthAt[SW_PONGER] = 1
-    ballsHeadingNorthAt[SE_PONGER] = 1
-  else:
-    print("Invalid configuration")
-    exit(1)
-elif args.random != -1:
-  if args.numDims == 1:
-    print("--random does not currently work with numDims=1. Use --randomOverlap.")
-    exit(1)
-  numBalls = args.random / numRanks
-  if myRank == numRanks-1:
-    numBalls += args.random % numRanks
-  sample = random.sample(range(numComponentsOwnedByRank), args.random)
-  for r in sample:
-    loc = rankRowStart * args.N + r
-    direction = random.randint(0,3)
-    if direction   == 0: ballsHeadingNorthAt[loc] = 1
-    elif direction == 1: ballsHeadingSouthAt[loc] = 1
-    elif direction == 2: ballsHeadingWestAt[loc]  = 1
-    elif direction == 3: ballsHeadingEastAt[loc]  = 1
-elif args.randomOverlap != -1:
-  numBalls = int(args.randomOverlap / numRanks)
+
+# With --tileSize the grid is built from tile pongers, each simulating a block
+# of pongers (see tiling.py), and it's the grid of tiles that is partitioned,
+# ghosted, and linked below.  Otherwise each ponger is its own component.
+if args.tileSize > 1:
+  gridM, gridN = tiling.tileGrid(args.N, args.M, args.numDims, args.tileSize)
+else:
+  gridM, gridN = args.M, args.N
+
+timer.start("partition")
+part = partition.makePartition(args.partitioner, gridN, gridM, args.numDims,
+                               numRanks, numThreads, args.px, args.py)
+rows, cols, threads = part.owned(myRank)
+
+timer.start("placement")
+# Random balls are split evenly between ranks (with the excess on the final
+# rank) and each rank only places balls on the pongers it owns.
+numBalls = None
+if args.random != -1 or args.randomOverlap != -1:
+  totalBalls = args.random if args.random != -1 else args.randomOverlap
+  numBalls = int(totalBalls / numRanks)
   if myRank == numRanks-1:
-    numBalls += args.randomOverlap % numRanks
-  for _ in range(numBalls):
-    if args.numDims == 1:
-      r = random.randint(0, (rankRowEnd - rankRowStart)-1)
-      loc = (rankRowStart * args.N) + (r * args.N)
-      direction = random.randint(0,1)
-    else:
-      r = random.randint(0, numComponentsOwnedByRank - 1)
-      loc = rankRowStart * args.N + r
-      direction = random.randint(0,3)
-    if direction   == 0: ballsHeadingNorthAt[loc] = ballsHeadingNorthAt.get(loc, 0) + 1
-    elif direction == 1: ballsHeadingSouthAt[loc] = ballsHeadingSouthAt.get(loc, 0) + 1
-    elif direction == 2: ballsHeadingWestAt[loc]  = ballsHeadingWestAt.get(loc, 0) + 1
-    elif direction == 3: ballsHeadingEastAt[loc]  = ballsHeadingEastAt.get(loc, 0) + 1
-elif args.wavefront:
-  print("--wavefront does not currently work in this version.")
+    numBalls += totalBalls % numRanks
+
+if args.tileSize > 1:
+  ids = tiling.tilePongerIds(rows, cols, args.N, args.M, args.numDims, args.tileSize)
 else:
-  print("Unknown ball placement configuration")
-  exit(1)
+  ids = rows * args.N + cols
+counts = placement.placeBalls(args, args.N, args.M, ids, numBalls, placement.makeRng(args.seed, myRank))
+if args.tileSize > 1:
+  tileBalls = tiling.tileBalls(ids, counts, args.N, args.M, args.numDims, args.tileSize)
 
 if args.verbose:
   print("Initial balls on rank %d --" % myRank)
-  for i in range(0,args.M):
-    for j in [0] if args.numDims == 1 else range(0,args.N):
-      me = i * args.N + j;
-      if me in ballsHeadingEastAt:  print("%5i %4i %4i %s" % (me, i, j, "east"))
-      if me in ballsHeadingWestAt:  print("%5i %4i %4i %s" % (me, i, j, "west"))
-      if me in ballsHeadingSouthAt: print("%5i %4i %4i %s" % (me, i, j, "south"))
-      if me in ballsHeadingNorthAt: print("%5i %4i %4i %s" % (me, i, j, "north"))
-
-def makePonger(i,j,rank):
-  me = i * args.N + j;
-  ponger = sst.Component("pong_%i_%i" % (i,j), "pingpong.ponger")
-  ponger.addParams({
-    "ballsHeadingNorth": ballsHeadingNorthAt.get(me, 0),
-    "ballsHeadingSouth": ballsHeadingSouthAt.get(me, 0),
-    "ballsHeadingWest":  ballsHeadingWestAt.get(me, 0),
-    "ballsHeadingEast":  ballsHeadingEastAt.get(me, 0)})
+  placement.printBalls(ids, counts, args.N)
+
+# Ghost pongers are only placeholders for the pongers on neighboring ranks;
+# their parameters come from the rank that owns them.  'balls' is a row of
+# placement counts for a ponger or a tiling.tileBalls list for a tile.
+def makePonger(i,j,rank,thread,balls=None):
+  me = i * gridN + j;
+  if args.tileSize > 1:
+    ponger = sst.Component("tile_%i_%i" % (i,j), "pingpong.tilePonger")
+    if balls is not None:
+      ponger.addParams(tiling.tileParams(i, j, args.N, args.M, args.numDims, args.tileSize,
+                                         args.edgeDelay, balls))
+  else:
+    ponger = sst.Component("pong_%i_%i" % (i,j), "pingpong.ponger")
+    if balls is not None:
+      north, south, west, east = balls.tolist()
+      ponger.addParams({
+        "ballsHeadingNorth": north,
+        "ballsHeadingSouth": south,
+        "ballsHeadingWest":  west,
+        "ballsHeadingEast":  east,
+        "aggregateBalls":    args.aggregate})
+  if args.sample and balls is not None:
+    ponger.addGlobalParamSet("sampling")
   if numThreads > 1:
-    ponger.setRank(rank, min(int(j/colsPerRank),numThreads-1))
+    ponger.setRank(rank, thread)
   else:
     ponger.setRank(rank)
   pingPongers[me] = ponger;
 
-# top row of "ghost" pongers
-if myRank > 0:
-  i = rankRowStart-1
-  for j in [0] if args.numDims == 1 else range(0,args.N):
-    makePonger(i,j,myRank-1)
+timer.start("ghosts")
+# Neighbors of the owned pongers that live on another rank become ghosts.  For
+# each direction: which owned pongers have a neighbor that way, and whether
+# that neighbor is a ghost.
+offsets = {'north': (-1,0), 'south': (1,0)}
+if args.numDims > 1:
+  offsets.update({'west': (0,-1), 'east': (0,1)})
+neighbors = {}
+ghostIds = []
+for direction, (di,dj) in offsets.items():
+  ni, nj = rows + di, cols + dj
+  inGrid = (ni >= 0) & (ni < gridM) & (nj >= 0) & (nj < gridN)
+  ghost = np.zeros_like(inGrid)
+  ghost[inGrid] = part.owner(ni[inGrid], nj[inGrid])[0] != myRank
+  neighbors[direction] = (inGrid, ghost)
+  ghostIds.append(ni[ghost] * gridN + nj[ghost])
+ghostIds = np.unique(np.concatenate(ghostIds))
+ghostRanks, ghostThreads = part.owner(ghostIds // gridN, ghostIds % gridN)
+
+for me, rank, thread in zip(ghostIds.tolist(), ghostRanks.tolist(), ghostThreads.tolist()):
+  makePonger(me // gridN, me % gridN, rank, thread)
+
+timer.count(components=len(ghostIds))
 
 # pongers owned by this rank
-for i in range(rankRowStart,rankRowEnd):
-  for j in [0] if args.numDims == 1 else range(0,args.N):
-    makePonger(i,j,myRank)
+timer.start("components")
+for k, (i, j, thread) in enumerate(zip(rows.tolist(), cols.tolist(), threads.tolist())):
+  makePonger(i,j,myRank,thread,counts[k] if args.tileSize == 1 else tileBalls.get((i,j), []))
 
-# bottom row of "ghost" pongers
-if myRank < numRanks-1:
-  i = rankRowEnd
-  for j in [0] if args.numDims == 1 else range(0,args.N):
-    makePonger(i,j,myRank+1)
+timer.count(components=len(rows))
+
+# For the pongers' statistics: which ports lead to a ponger on another rank or
+# thread (a bit per direction, see Ponger.h), and the thread each ponger is on.
+if args.statLevel > 0 and args.tileSize == 1:
+  remotePorts = np.zeros(len(rows), dtype=np.int64)
+  for bit, direction in enumerate(('north', 'south', 'west', 'east')):
+    if direction not in offsets:
+      continue
+    di, dj = offsets[direction]
+    inGrid, ghost = neighbors[direction]
+    otherRanks, otherThreads = part.owner(rows[inGrid]+di, cols[inGrid]+dj)
+    remote = np.zeros_like(inGrid)
+    remote[inGrid] = (otherRanks != myRank) | (otherThreads != threads[inGrid])
+    remotePorts |= remote.astype(np.int64) << bit
+  for i, j, thread, mask in zip(rows.tolist(), cols.tolist(), threads.tolist(), remotePorts.tolist()):
+    pingPongers[i * gridN + j].addParams({"remotePorts": mask, "thread": thread})
 
 # i = row, j = col, (0,0) = north west corner
-# Note this loop won't create the east/westward links on of the final row of
-# "ghost" pongers but those aren't necessary.
-for i in range(max(0,rankRowStart-1),rankRowEnd):
-  for j in [0] if args.numDims == 1 else range(0,args.N):
-    me = i * args.N + j;
-    neighborS = me + args.N
-    neighborE = me + 1
-
-    connectS = i < args.M-1
-    connectE = j < args.N-1 and args.numDims > 1
-
-    if connectS:
-      link(i,j, pingPongers[me], pingPongers[neighborS], "south")
-    if connectE:
-      link(i,j, pingPongers[me], pingPongers[neighborE], "east")
+timer.start("links")
+# Every owned ponger links to its southern and eastern neighbors, and to its
+# northern and western neighbors when those are ghosts (the owning rank creates
+# the links between its own pongers).  Links are named after their north/west
+# end so both ranks name a cut link the same way.
+for direction, (di,dj) in offsets.items():
+  inGrid, ghost = neighbors[direction]
+  forward = direction in ('south', 'east')
+  for k in np.flatnonzero(inGrid if forward else ghost).tolist():
+    i, j = int(rows[k]), int(cols[k])
+    me = i * gridN + j
+    other = (i+di) * gridN + (j+dj)
+    if forward:
+      link(i,j, pingPongers[me], pingPongers[other], direction)
+    else:
+      link(i+di,j+dj, pingPongers[other], pingPongers[me], oppositeDir(direction))
+
+timer.count(links=numLinks)
+
+if args.printPartition:
+  cutLinks = sum(int(ghost.sum()) for (inGrid, ghost) in neighbors.values())
+  threadCutLinks = 0
+  for direction in ('south', 'east') if args.numDims > 1 else ('south',):
+    di, dj = offsets[direction]
+    inGrid, ghost = neighbors[direction]
+    local = inGrid & ~ghost
+    threadCutLinks += int((part.owner(rows[local]+di, cols[local]+dj)[1] != threads[local]).sum())
+  print("Partition (%s) on rank %d: %d owned, %d ghost, %d cut links, %d cross-thread links" %
+        (args.partitioner, myRank, len(rows), len(ghostIds), cutLinks, threadCutLinks))
 
 endTime = time.time()
 elapsedTime = endTime - startTime
 if args.printTime:
   print("Elapsed time on rank %i is %f secs" % (myRank, elapsedTime))
+
+if args.printPhases:
+  timer.report("pingpong_parLoad", myRank, numRanks)
+
+if buildSampler:
+  buildSampler.partition()
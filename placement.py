@@ -0,0 +1,106 @@
+# Initial ball placement shared by the ping pong model builders.
+#
+# A builder needs four numbers for every ponger it creates: how many balls are
+# initially heading north, south, west, and east.  Rather than keeping four
+# sparse dicts and probing each of them per ponger, we compute one NumPy int32
+# array with a row per ponger and a column per direction.  Rows line up with an
+# array of global ponger ids (id = row * N + col) supplied by the caller, so a
+# builder that owns only part of the grid only pays for the pongers it owns.
+#
+# In 1D only column 0 of each row exists (the pongers are linked north to
+# south), so balls are only ever placed heading north or south.
+
+import numpy as np
+
+NORTH, SOUTH, WEST, EAST = range(4)
+DIRECTION_NAMES = ['north', 'south', 'west', 'east']
+
+def makeRng(seed=None, rank=0):
+  # Each rank draws from its own stream; passing the same seed reproduces the
+  # same placement for the same rank count.
+  if seed is None:
+    return np.random.default_rng()
+  return np.random.default_rng([seed, rank])
+
+def gridIds(N, rowStart, rowEnd, numDims):
+  # Global ids of the pongers in rows [rowStart, rowEnd) in build order.
+  if numDims == 1:
+    return np.arange(rowStart, rowEnd, dtype=np.int64) * N
+  return np.arange(rowStart * N, rowEnd * N, dtype=np.int64)
+
+def fixedBalls(args, N, M):
+  # Returns (ids, directions) for the deterministic placement patterns.
+  NW_PONGER = 0
+  NE_PONGER = N-1
+  SW_PONGER = N * (M-1)
+  SE_PONGER = (N * M) - 1
+
+  if args.single:
+    if args.numDims == 1:
+      balls = [(NW_PONGER, SOUTH)]
+    else:
+      balls = [(NW_PONGER, EAST)]
+  elif args.corners:
+    if args.numDims == 1:
+      balls = [(NW_PONGER, SOUTH), (SW_PONGER, NORTH)]
+    else:
+      balls = [(NW_PONGER, EAST),  (NE_PONGER, WEST),
+               (SW_PONGER, EAST),  (SE_PONGER, WEST),
+               (NW_PONGER, SOUTH), (NE_PONGER, SOUTH),
+               (SW_PONGER, NORTH), (SE_PONGER, NORTH)]
+  elif args.wavefront:
+    if args.numDims == 1:
+      balls = [(NW_PONGER, SOUTH), (SW_PONGER, NORTH)]
+    else:
+      cols = np.arange(N, dtype=np.int64)
+      rows = np.arange(M, dtype=np.int64)
+      ids  = np.concatenate([cols, rows * N, rows * N + N-1, N * (M-1) + cols])
+      dirs = np.repeat([SOUTH, EAST, WEST, NORTH], [N, M, M, N])
+      return ids, dirs
+  else:
+    return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+  ids, dirs = zip(*balls)
+  return np.array(ids, dtype=np.int64), np.array(dirs, dtype=np.int64)
+
+def placeBalls(args, N, M, ids, numBalls=None, rng=None):
+  # Returns an int32 array of shape (len(ids), 4) holding the number of balls
+  # heading [north, south, west, east] at each ponger in 'ids'.  'ids' must be
+  # sorted.  Deterministic patterns are clipped to 'ids'; random patterns place
+  # 'numBalls' balls (defaulting to the count given on the command line) among
+  # 'ids' only.
+  counts = np.zeros((len(ids), 4), dtype=np.int32)
+  if len(ids) == 0:
+    return counts
+  numDirs = 2 if args.numDims == 1 else 4
+  if rng is None:
+    rng = makeRng()
+
+  if args.random != -1:
+    if numBalls is None:
+      numBalls = args.random
+    pos  = rng.choice(len(ids), size=min(len(ids), numBalls), replace=False)
+    dirs = rng.integers(0, numDirs, size=len(pos))
+    counts[pos, dirs] = 1
+  elif args.randomOverlap != -1:
+    if numBalls is None:
+      numBalls = args.randomOverlap
+    pos  = rng.integers(0, len(ids), size=numBalls)
+    dirs = rng.integers(0, numDirs, size=numBalls)
+    counts[:] = np.bincount(pos * 4 + dirs, minlength=len(ids) * 4).reshape(-1, 4)
+  else:
+    fixedIds, dirs = fixedBalls(args, N, M)
+    pos = np.searchsorted(ids, fixedIds)
+    inRange = pos < len(ids)
+    inRange[inRange] = ids[pos[inRange]] == fixedIds[inRange]
+    counts[pos[inRange], dirs[inRange]] = 1
+
+  return counts
+
+def printBalls(ids, counts, N):
+  for k in np.flatnonzero(counts.any(axis=1)):
+    me = int(ids[k])
+    i, j = divmod(me, N)
+    for d in (EAST, WEST, SOUTH, NORTH):
+      if counts[k, d]:
+        print("%5i %4i %4i %s" % (me, i, j, DIRECTION_NAMES[d]))
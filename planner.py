@@ -0,0 +1,240 @@
+# Picks the next configurations worth running.
+#
+# A sweep over every combination of node counts, ranks per node, threads,
+# and problem sizes spends most of its node hours on points a model of the
+# points already run could have predicted.  This fits such a model to the
+# results so far (consolidate.py's CSV file or the results database, see
+# results.py), then picks, out of the same combinations omnisubmit.py would
+# run, the ones that teach it the most per node hour until a budget is spent.
+#
+# The model is a Bayesian linear regression of the log build time and the log
+# run time on the log component count, ball count, node count, ranks per
+# node, threads per rank, timestep count, and edge delay, plus the message pattern and
+# input method.  Squares of the log ranks and threads, their product, and the
+# log of the total thread count times the log component count let the best
+# ranks x threads split of a problem lie inside the candidates rather than
+# always at a corner.  A run's worth is how much it would shrink the model's
+# uncertainty (the information gain, 1/2 log(1 + x' Sigma x / noise)), and
+# its cost is its predicted node hours, plus a fixed --overhead-seconds for
+# starting a job.  Points are picked greedily, updating the uncertainty after
+# each as if it had been run, so the plan doesn't pick the same kind of point
+# over and over.
+#
+# It also prints the predicted fastest ranks per node x threads per rank
+# split for every problem and node count among the candidates.
+#
+# Usage: python3 planner.py "1 2 4 8" "1 2 4" "1 2 4" --dimensions 2 \
+#            --side-lengths "512 1024" --random 1024 --input-method python \
+#            [--edge-delay "1 50"] --budget 20 [--results results.db] [-o plan.jsonl]
+#        python3 omnisubmit.py --plan plan.jsonl
+#
+# The plan file has one JSON configuration per line, edge delay included.
+
+import argparse
+import itertools
+import json
+import math
+import os
+import numpy as np
+
+import omnisubmit
+import scaling
+
+PATTERNS = ["random", "randomOverlap", "corners", "wavefront"]
+INPUT_METHODS = ["python", "parallelPython", "json"]
+
+PRIOR_PRECISION = 0.01  # how strongly coefficients are pulled towards 0
+DEFAULT_NOISE = 0.1     # variance of log times before there are enough runs to estimate it
+DEFAULT_EDGE_DELAY = 50 # omnisubmit.py's, for runs recorded without one
+FEATURE_COUNT = 12 + len(PATTERNS) - 1 + len(INPUT_METHODS) - 1
+
+def features(config):
+    # [1, log components, log balls, log nodes, log ranks, log threads,
+    #  log steps, log edge delay, log ranks^2, log threads^2, log ranks log threads,
+    #  log total threads log components, pattern and input method indicators]
+    (nodes, ranks, threads, pattern, balls, dims, side_length, steps, edge_delay, input_method) = config
+    log_components = math.log(side_length ** dims)
+    log_ranks = math.log(ranks)
+    log_threads = math.log(threads)
+    return np.array([
+        1.0,
+        log_components,
+        math.log1p(balls or 0),
+        math.log(nodes),
+        log_ranks,
+        log_threads,
+        math.log(steps),
+        math.log(edge_delay),
+        log_ranks ** 2,
+        log_threads ** 2,
+        log_ranks * log_threads,
+        math.log(nodes * ranks * threads) * log_components,
+    ] + [float(pattern == name) for name in PATTERNS[1:]]
+      + [float(input_method == name) for name in INPUT_METHODS[1:]])
+
+def run_config(run):
+    return (run['Node Count'], run['Tasks Per Node'], run['Thread Count'], run['Message Pattern'],
+            run.get('Message Count'), run.get('Dimensions') or 2, run['Side Length'], run['Step Count'],
+            run.get('Edge Delay') or DEFAULT_EDGE_DELAY, run.get('Input Method') or 'python')
+
+class CostModel:
+    # One Bayesian linear regression of log time on the features
+    def __init__(self, xs, ys):
+        self.size = FEATURE_COUNT
+        x = np.array(xs).reshape(-1, self.size)
+        y = np.array(ys)
+        self.noise = DEFAULT_NOISE
+        self._fit(x, y)
+        if len(y) > self.size:
+            residuals = y - x @ self.mean
+            self.noise = max(float(residuals @ residuals) / (len(y) - self.size), 1e-4)
+            self._fit(x, y)
+
+    def _fit(self, x, y):
+        precision = PRIOR_PRECISION * np.eye(self.size) + x.T @ x / self.noise
+        self.covariance = np.linalg.inv(precision)
+        self.mean = self.covariance @ x.T @ y / self.noise
+
+    def predict(self, x):
+        # Seconds
+        return math.exp(float(x @ self.mean))
+
+    def gain(self, x):
+        return 0.5 * math.log1p(float(x @ self.covariance @ x) / self.noise)
+
+    def observe(self, x):
+        # The covariance after running x (which doesn't depend on its time)
+        cx = self.covariance @ x
+        self.covariance = self.covariance - np.outer(cx, cx) / (self.noise + float(x @ cx))
+
+def fit_models(runs):
+    xs, build_times, run_times = [], [], []
+    for run in runs:
+        if run.get('Build Time') is None or run.get('Run Time') is None:
+            continue
+        xs.append(features(run_config(run)))
+        # Runs too short to time count as a millisecond
+        build_times.append(math.log(max(run['Build Time'], 1e-3)))
+        run_times.append(math.log(max(run['Run Time'], 1e-3)))
+    return CostModel(xs, build_times), CostModel(xs, run_times), len(xs)
+
+def candidates(args):
+    # The combinations omnisubmit.py would run with the same options
+    configs = []
+    for (nodes, ranks, threads) in itertools.product(args.node_counts, args.ranks_per_node, args.threads_per_rank):
+        for comm_config in omnisubmit.comm_configs_list(args):
+            pattern, *count = comm_config.split()
+            balls = int(count[0]) if count else None
+            for (dims, side_length) in omnisubmit.grid_config_lists(args):
+                if pattern == "corners":
+                    balls = 2 ** dims
+                for (steps, edge_delay) in itertools.product(args.timestep_counts, args.edge_delays):
+                    for input_method in args.input_method:
+                        configs.append((nodes, ranks, threads, pattern, balls, dims, side_length, steps, edge_delay, input_method))
+    return configs
+
+def node_hours(config, build_model, run_model, overhead_seconds):
+    x = features(config)
+    return config[0] * (build_model.predict(x) + run_model.predict(x) + overhead_seconds) / 3600
+
+def plan(configs, build_model, run_model, budget, overhead_seconds, max_points):
+    # Greedily the point with the most information per node hour that still
+    # fits in the budget
+    chosen = []
+    remaining = list(configs)
+    spent = 0.0
+    while remaining and len(chosen) < max_points:
+        best = None
+        for config in remaining:
+            cost = node_hours(config, build_model, run_model, overhead_seconds)
+            if spent + cost > budget:
+                continue
+            x = features(config)
+            value = (build_model.gain(x) + run_model.gain(x)) / cost
+            if best is None or value > best[0]:
+                best = (value, config, cost)
+        if best is None:
+            break
+        _, config, cost = best
+        x = features(config)
+        build_model.observe(x)
+        run_model.observe(x)
+        remaining.remove(config)
+        chosen.append((config, cost))
+        spent += cost
+    return chosen, spent
+
+def best_splits(configs, build_model, run_model):
+    # {(problem, nodes): (predicted seconds, ranks, threads)} of the fastest split
+    best = {}
+    for config in configs:
+        (nodes, ranks, threads, pattern, balls, dims, side_length, steps, edge_delay, input_method) = config
+        key = (pattern, balls, dims, side_length, steps, edge_delay, input_method, nodes)
+        x = features(config)
+        seconds = build_model.predict(x) + run_model.predict(x)
+        if key not in best or seconds < best[key][0]:
+            best[key] = (seconds, ranks, threads)
+    return best
+
+def comm_config(pattern, balls):
+    return f"{pattern} {balls}" if pattern in ["random", "randomOverlap"] else pattern
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Plan the most informative runs to do next within a node hour budget.")
+    parser.add_argument("node_counts", type=omnisubmit.int_list, help="Candidate node counts (e.g., '1 2 4 8').")
+    parser.add_argument("ranks_per_node", type=omnisubmit.int_list, help="Candidate MPI ranks per node.")
+    parser.add_argument("threads_per_rank", type=omnisubmit.int_list, help="Candidate threads per MPI rank.")
+    parser.add_argument("--dimensions", type=omnisubmit.int_list, required=True, help="Number(s) of dimensions.")
+    parser.add_argument("--side-lengths", "--side-length", type=omnisubmit.int_list, dest="side_lengths", default="")
+    parser.add_argument("--component-counts", "--component-count", type=omnisubmit.int_list, dest="component_counts", default="")
+    parser.add_argument("--corners", action="store_true")
+    parser.add_argument("--wavefront", action="store_true")
+    parser.add_argument("--random", type=omnisubmit.int_list, metavar="COUNT(S)")
+    parser.add_argument("--random-overlap", type=omnisubmit.int_list, dest="random_overlap", metavar="COUNT(S)")
+    parser.add_argument("--timestep-count", "--timestep-counts", type=omnisubmit.int_list, dest="timestep_counts", default="1000")
+    parser.add_argument("--edge-delay", "--edge-delays", type=omnisubmit.int_list, dest="edge_delays",
+                        default=str(DEFAULT_EDGE_DELAY), help="Candidate edge delay(s). Default is 50.")
+    parser.add_argument("--input-method", type=str.split, required=True, metavar="METHOD(S)")
+    parser.add_argument("--results", default="results.db",
+                        help="Results so far: the results database or consolidate.py's CSV file. Default is results.db.")
+    parser.add_argument("--budget", type=float, required=True, help="Node hours to spend.")
+    parser.add_argument("--overhead-seconds", type=float, default=60,
+                        help="Seconds each job costs besides building and running the model. Default is 60.")
+    parser.add_argument("--max-points", type=int, default=100, help="Most configurations to plan. Default is 100.")
+    parser.add_argument("-o", "--output", default="plan.jsonl", help="Plan file for omnisubmit.py --plan. Default is plan.jsonl.")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_arguments()
+    runs = scaling.read_runs(args.results) if os.path.exists(args.results) else []
+    build_model, run_model, run_count = fit_models(runs)
+    print(f"Fit the cost model to {run_count} runs")
+
+    done = {run_config(run) for run in runs}
+    configs = [config for config in candidates(args) if config not in done]
+    # Planning only changes the models' uncertainty, not their predictions
+    chosen, spent = plan(configs, build_model, run_model, args.budget, args.overhead_seconds, args.max_points)
+
+    print(f"Planned {len(chosen)} of {len(configs)} new configurations, {spent:.2f} of {args.budget:g} node hours:")
+    for (config, cost) in chosen:
+        (nodes, ranks, threads, pattern, balls, dims, side_length, steps, edge_delay, input_method) = config
+        print(f"  {nodes} nodes x {ranks} ranks x {threads} threads, {comm_config(pattern, balls)}, "
+              f"{dims}D side {side_length}, {steps} steps, edge delay {edge_delay}, {input_method}: "
+              f"{cost:.3f} node hours")
+    with open(args.output, 'w') as f:
+        for (config, _) in chosen:
+            (nodes, ranks, threads, pattern, balls, dims, side_length, steps, edge_delay, input_method) = config
+            f.write(json.dumps({
+                "node_count": nodes, "ranks_per_node": ranks, "threads_per_rank": threads,
+                "comm_config": comm_config(pattern, balls), "dimensions": dims, "side_length": side_length,
+                "timestep_count": steps, "edge_delay": edge_delay, "input_method": input_method}) + "\n")
+    print("Wrote to ", args.output)
+
+    if run_count:
+        print("Predicted fastest split of each problem and node count:")
+        for (key, (seconds, ranks, threads)) in sorted(best_splits(candidates(args), build_model, run_model).items(),
+                                                       key=lambda item: (str(item[0][:-1]), item[0][-1])):
+            (pattern, balls, dims, side_length, steps, edge_delay, input_method, nodes) = key
+            print(f"  {comm_config(pattern, balls)}, {dims}D side {side_length}, {steps} steps, "
+                  f"edge delay {edge_delay}, {input_method}, "
+                  f"{nodes} nodes: {ranks} ranks x {threads} threads ({seconds:.2f} s)")
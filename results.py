@@ -0,0 +1,536 @@
+# A SQLite database of run results.
+#
+# Every run is one row of 'runs', keyed by its directory and file prefix,
+# holding the run's whole configuration as columns and its status ('ok',
+# 'failure', or 'running').  Every number SST prints with
+# --print-timing-info, and the builder's phase timings, go in 'metrics', one
+# row per (run, metric) with the value and its unit.
+#
+# omnidispatch.sh records runs directly when PINGPONG_RESULTS_DB is set
+# (omnisubmit.py --results-db): once as 'running' when it starts and again
+# with the results when it ends.  Runs from before that, or from the
+# strong-scaling and weak-scaling scripts, are ingested from their .time
+# files (and the .tmp and .phases files next to them, when there are any),
+# reading the configuration out of the file name.  Ingesting is incremental:
+# a .time file whose size and modification time match what the database
+# already has is skipped, so ingesting the same directory again only picks up
+# what changed.
+#
+# Runs that sampled their ranks (the builders' --sample, see Sampler.h) leave
+# a <prefix>_samples_<rank>.bin file per rank, which go in 'samples', one row
+# per sample, and add a few metrics: each phase's peak RSS over the ranks and
+# the rate the ranks handled events while running.
+#
+# Usage:
+#   python3 results.py [--db results.db] ingest [DIR...]
+#   python3 results.py [--db results.db] export [-o times.csv] [--where SQL] [--all]
+#   python3 results.py [--db results.db] query "SELECT ..."
+#   python3 results.py [--db results.db] record --status STATUS [--output FILE] -- DISPATCH_ARGS...
+#   python3 results.py progress PREFIX
+#
+# progress prints the latest sample of every rank of a run, running or not.
+#
+# The export has the columns consolidate.py always wrote (Node Count, Build
+# Time, Local Memory Usage, ...) followed by one "<metric> (<unit>)" column
+# per metric (sizes in bytes).  The consolidate.py scripts ingest their
+# directory and export it, and the plots.py scripts read either their CSV
+# files or the database itself.
+
+import argparse
+import csv
+import json
+import os
+import re
+import sqlite3
+import struct
+import sys
+import time
+
+DEFAULT_DB = "results.db"
+
+# (column, SQL type, exported name)
+CONFIG_COLUMNS = [
+    ("node_count", "INTEGER", "Node Count"),
+    ("ranks_per_node", "INTEGER", "Tasks Per Node"),
+    ("threads_per_rank", "INTEGER", "Thread Count"),
+    ("pattern", "TEXT", "Message Pattern"),
+    ("message_count", "INTEGER", "Message Count"),
+    ("dimensions", "INTEGER", "Dimensions"),
+    ("side_length", "INTEGER", "Side Length"),
+    ("step_count", "INTEGER", "Step Count"),
+    ("edge_delay", "INTEGER", "Edge Delay"),
+    ("verbose", "INTEGER", "Verbose"),
+    ("input_method", "TEXT", "Input Method"),
+    ("toolkit", "TEXT", "HPCToolkit"),
+    ("name", "TEXT", "Experiment"),
+]
+
+# The four numbers .time files hold, in order, and the names consolidate.py
+# gave them.  Older SSTs called the run time "Run loop time".
+TIME_FILE_METRICS = [
+    ("Build time", "Build Time"),
+    ("Run stage Time", "Run Time"),
+    ("Max Resident Set Size", "Local Memory Usage"),
+    ("Approx. Global Max RSS Size", "Global Memory Usage"),
+]
+
+INPUT_METHODS = ["python", "parallelPython", "json"]
+
+# Sampler.h's SampleRecord: wall time (s), simulated time (ps), events
+# handled, RSS (bytes), phase
+SAMPLE_RECORD = struct.Struct("<dQQQI4x")
+SAMPLE_PHASES = ["build", "partition", "construct", "run", "finish"]
+SAMPLE_FILE = re.compile(r"_samples_([0-9]+)\.bin$")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    directory TEXT NOT NULL,
+    prefix TEXT NOT NULL,
+    %s,
+    status TEXT NOT NULL,
+    source TEXT NOT NULL,
+    source_size INTEGER,
+    source_mtime REAL,
+    recorded_at REAL NOT NULL,
+    PRIMARY KEY (directory, prefix));
+CREATE TABLE IF NOT EXISTS metrics (
+    directory TEXT NOT NULL,
+    prefix TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    value REAL,
+    unit TEXT,
+    PRIMARY KEY (directory, prefix, metric));
+CREATE TABLE IF NOT EXISTS samples (
+    directory TEXT NOT NULL,
+    prefix TEXT NOT NULL,
+    rank INTEGER NOT NULL,
+    wall_time REAL NOT NULL,
+    sim_cycle INTEGER,
+    events INTEGER,
+    rss_bytes INTEGER,
+    phase TEXT);
+CREATE INDEX IF NOT EXISTS samples_run ON samples (directory, prefix, rank);
+""" % ",\n    ".join("%s %s" % (column, sql_type) for (column, sql_type, _) in CONFIG_COLUMNS)
+
+def connect(db_path):
+    # Many jobs may finish at once; wait for each other's writes rather than
+    # failing.  (SQLite needs working file locks, which some parallel file
+    # systems only give when mounted with them.)
+    db = sqlite3.connect(db_path, timeout=120)
+    db.executescript(SCHEMA)
+    return db
+
+# ---------------------------------------------------------------------------
+# Reading a run's files
+
+def message_count(pattern, count, dimensions):
+    if pattern in ["random", "randomOverlap"]:
+        return int(count)
+    if pattern == "corners":
+        return 2 ** int(dimensions)
+    return None
+
+def config_from_dispatch_args(dispatch_args, name=None):
+    # omnidispatch.sh's arguments: nodes, ranks per node, threads per rank,
+    # comm config ("random 512"), dims, side length, steps, edge delay,
+    # verbosity, input method, toolkit flags, and prefix.
+    (nodes, ranks, threads, comm_config, dims, side_length, steps, edge_delay,
+     verbosity, input_method, toolkit, prefix) = dispatch_args
+    comm = comm_config.split()
+    config = {
+        "node_count": int(nodes),
+        "ranks_per_node": int(ranks),
+        "threads_per_rank": int(threads),
+        "pattern": comm[0],
+        "message_count": message_count(comm[0], comm[1] if len(comm) > 1 else None, dims),
+        "dimensions": int(dims),
+        "side_length": int(side_length),
+        "step_count": int(steps),
+        "edge_delay": int(edge_delay),
+        "verbose": int(verbosity),
+        "input_method": input_method,
+        "toolkit": None if toolkit == "None" else toolkit,
+        "name": name or None,
+    }
+    return prefix, config
+
+def config_from_prefix(prefix):
+    # The configuration of a run from before runs were recorded, read from
+    # its file name.  omnisubmit.py names runs
+    #   nodes_ranks_threads_pattern[_count]_dims_side_steps[_delay]_verbosity_input[_hpctoolkit[_flags]][_name]
+    # (the edge delay was added later), and the strong-scaling and
+    # weak-scaling scripts
+    #   nodes_ranks_threads_side_messages_steps[_json][_1d]
+    # where messages is a random ball count, 'wavefront', or 'corners'.
+    pieces = prefix.split("_")
+    if len(pieces) < 6:
+        raise ValueError("Too few fields in the file name")
+    config = {column: None for (column, _, _) in CONFIG_COLUMNS}
+    config["node_count"], config["ranks_per_node"], config["threads_per_rank"] = map(int, pieces[0:3])
+
+    if pieces[3].isdigit():
+        side_length, messages, steps = pieces[3:6]
+        extra = pieces[6:]
+        config["dimensions"] = 1 if "1d" in extra else 2
+        config["pattern"] = messages if messages in ["wavefront", "corners"] else "random"
+        config["message_count"] = message_count(config["pattern"], messages, config["dimensions"])
+        config["side_length"] = int(side_length)
+        config["step_count"] = int(steps)
+        config["input_method"] = "json" if "json" in extra else "python"
+        return config
+
+    config["pattern"] = pieces[3]
+    rest = pieces[4:]
+    count = rest.pop(0) if config["pattern"] in ["random", "randomOverlap"] else None
+    methods = [i for (i, piece) in enumerate(rest) if piece in INPUT_METHODS]
+    if not methods:
+        raise ValueError("No input method in the file name")
+    fields = rest[:methods[0]]
+    if len(fields) == 4:
+        dims, side_length, steps, verbosity = fields
+        edge_delay = None
+    elif len(fields) == 5:
+        dims, side_length, steps, edge_delay, verbosity = fields
+    else:
+        raise ValueError("Unexpected grid and time fields in the file name")
+    config["message_count"] = message_count(config["pattern"], count, dims)
+    config["dimensions"] = int(dims)
+    config["side_length"] = int(side_length)
+    config["step_count"] = int(steps)
+    config["edge_delay"] = int(edge_delay) if edge_delay is not None else None
+    config["verbose"] = int(verbosity)
+    config["input_method"] = rest[methods[0]]
+    extra = rest[methods[0] + 1:]
+    if extra and extra[0] == "hpctoolkit":
+        # Toolkit flags and an experiment name can't be told apart
+        config["toolkit"] = " ".join(extra[1:])
+    elif extra:
+        config["name"] = "_".join(extra)
+    return config
+
+def parse_value(text):
+    # "18.728 MB" -> (18.728, "MB"); "0.0117" -> (0.0117, None)
+    words = text.split()
+    if not words:
+        raise ValueError("Empty value")
+    return float(words[0]), (" ".join(words[1:]) or None)
+
+TIMING_LINE = re.compile(r"^\s*([A-Za-z][^:]*?):\s+(-?[0-9][0-9.eE+-]*)(?:\s+(.*?))?\s*$")
+
+def read_timing_info(filename):
+    # Every "<name>: <value> <unit>" line of the --print-timing-info block in
+    # SST's output, by name.
+    metrics = {}
+    in_block = False
+    with open(filename, errors="replace") as f:
+        for line in f:
+            if "Simulation Timing Information" in line:
+                in_block = True
+                continue
+            if not in_block:
+                continue
+            if line.startswith("---"):
+                in_block = False
+                continue
+            match = TIMING_LINE.match(line)
+            if match:
+                try:
+                    metrics[match.group(1)] = (float(match.group(2)), match.group(3) or None)
+                except ValueError:
+                    pass
+    return metrics
+
+def read_time_file(filename):
+    # A .time file's status and its four numbers (older ones only have the
+    # build and run times).
+    with open(filename, errors="replace") as f:
+        values = [line.strip() for line in f if line.strip()]
+    if not values:
+        return "running", {}
+    if values[0] == "Failure":
+        return "failure", {}
+    metrics = {}
+    for ((metric, _), value) in zip(TIME_FILE_METRICS, values):
+        number, unit = parse_value(value)
+        metrics[metric] = (number, unit or ("s" if metric in ["Build time", "Run stage Time"] else None))
+    return "ok", metrics
+
+def time_file_status(filename):
+    # 'ok', 'failure', or 'running' (an empty .time file), or None for a run
+    # that never started
+    if not os.path.exists(filename):
+        return None
+    try:
+        return read_time_file(filename)[0]
+    except ValueError:
+        # Cut off partway through writing its results
+        return "failure"
+
+def read_phase_metrics(filename):
+    # The builder's phase timings (see phases.py), taking the slowest rank
+    # for each as consolidate.py does.
+    if not os.path.exists(filename):
+        return {}
+    with open(filename) as f:
+        reports = [json.loads(line) for line in f if line.strip()]
+    if not reports:
+        return {}
+    metrics = {"Builder time": (max(report["totalSeconds"] for report in reports), "s")}
+    for report in reports:
+        for phase in report["phases"]:
+            metric = "Builder %s time" % phase["name"]
+            metrics[metric] = (max(metrics.get(metric, (0.0,))[0], phase["seconds"]), "s")
+            if "peakBytes" in phase:
+                metric = "Builder %s peak Python memory" % phase["name"]
+                metrics[metric] = (max(metrics.get(metric, (0,))[0], phase["peakBytes"]), "B")
+    rss = [report["maxRssBytes"] for report in reports if "maxRssBytes" in report]
+    if rss:
+        metrics["Builder max RSS"] = (max(rss), "B")
+    return metrics
+
+def read_samples(path_prefix):
+    # {rank: [(wall time, sim cycle, events, rss bytes, phase name)]} from a
+    # run's sample files.  A running job may be partway through writing a
+    # record; that one is left out.
+    directory, prefix = os.path.split(path_prefix)
+    samples = {}
+    for filename in os.listdir(directory or "."):
+        match = SAMPLE_FILE.search(filename)
+        if not match or filename[:match.start()] != prefix:
+            continue
+        with open(os.path.join(directory, filename), "rb") as f:
+            data = f.read()
+        data = data[:len(data) - len(data) % SAMPLE_RECORD.size]
+        # The builder's sampler (sampler.py) may get one last sample in after
+        # the components' first
+        samples[int(match.group(1))] = sorted(
+            (wall_time, sim_cycle, events, rss, SAMPLE_PHASES[phase] if phase < len(SAMPLE_PHASES) else str(phase))
+            for (wall_time, sim_cycle, events, rss, phase) in SAMPLE_RECORD.iter_unpack(data))
+    return samples
+
+def sample_metrics(samples):
+    # Each phase's peak RSS on any rank, and the events all ranks handled per
+    # second of running (each rank from its first to its last running sample)
+    metrics = {}
+    event_rate = 0.0
+    for series in samples.values():
+        for (_, _, _, rss, phase) in series:
+            metric = "Sampled %s peak RSS" % phase
+            metrics[metric] = (max(metrics.get(metric, (0,))[0], rss), "B")
+        running = [sample for sample in series if sample[4] == "run"]
+        if len(running) > 1 and running[-1][0] > running[0][0]:
+            event_rate += (running[-1][2] - running[0][2]) / (running[-1][0] - running[0][0])
+    if samples:
+        metrics["Sampled events handled"] = (sum(series[-1][2] for series in samples.values() if series), "")
+        metrics["Sampled event rate"] = (event_rate, "events/s")
+    return metrics
+
+def run_metrics(path_prefix, status):
+    # Everything there is to know about a finished run: the full timing info
+    # if SST's output (<prefix>.tmp) is still there, or else the .time file's
+    # numbers, and the builder's phases.
+    metrics = {}
+    if status == "ok":
+        if os.path.exists(path_prefix + ".time"):
+            metrics.update(read_time_file(path_prefix + ".time")[1])
+        if os.path.exists(path_prefix + ".tmp"):
+            metrics.update(read_timing_info(path_prefix + ".tmp"))
+    metrics.update(read_phase_metrics(path_prefix + ".phases"))
+    metrics.update(sample_metrics(read_samples(path_prefix)))
+    return metrics
+
+# ---------------------------------------------------------------------------
+# Writing
+
+def store(db, directory, prefix, config, status, metrics, source, samples=None):
+    time_file = os.path.join(directory, prefix + ".time")
+    stat = os.stat(time_file) if os.path.exists(time_file) else None
+    columns = ["directory", "prefix"] + [column for (column, _, _) in CONFIG_COLUMNS] + \
+              ["status", "source", "source_size", "source_mtime", "recorded_at"]
+    values = [directory, prefix] + [config.get(column) for (column, _, _) in CONFIG_COLUMNS] + \
+             [status, source, stat.st_size if stat else None, stat.st_mtime if stat else None, time.time()]
+    with db:
+        db.execute("INSERT OR REPLACE INTO runs (%s) VALUES (%s)" % (",".join(columns), ",".join("?" * len(columns))), values)
+        db.execute("DELETE FROM metrics WHERE directory = ? AND prefix = ?", (directory, prefix))
+        db.executemany("INSERT INTO metrics VALUES (?, ?, ?, ?, ?)",
+                       [(directory, prefix, metric, value, unit) for (metric, (value, unit)) in metrics.items()])
+        if samples is not None:
+            db.execute("DELETE FROM samples WHERE directory = ? AND prefix = ?", (directory, prefix))
+            db.executemany("INSERT INTO samples VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                           [(directory, prefix, rank) + sample for (rank, series) in samples.items() for sample in series])
+
+def record(db, status, dispatch_args, output=None, name=None):
+    # Called by omnidispatch.sh, from the directory the run writes its files to.
+    prefix, config = config_from_dispatch_args(dispatch_args, name)
+    directory = os.getcwd()
+    metrics = run_metrics(prefix, status) if status != "running" else {}
+    if output and status == "ok":
+        metrics.update(read_timing_info(output))
+    samples = read_samples(prefix) if status != "running" else None
+    store(db, directory, prefix, config, status, metrics, "dispatch", samples)
+
+def ingest(db, directory):
+    # Adds or updates the runs of every new or changed .time file in a
+    # directory.  Returns the number of files ingested.
+    directory = os.path.abspath(directory)
+    known = {prefix: (size, mtime) for (prefix, size, mtime) in
+             db.execute("SELECT prefix, source_size, source_mtime FROM runs WHERE directory = ?", (directory,))}
+    ingested = 0
+    for filename in sorted(os.listdir(directory)):
+        if not filename.endswith(".time"):
+            continue
+        prefix = filename[:-len(".time")]
+        stat = os.stat(os.path.join(directory, filename))
+        if known.get(prefix) == (stat.st_size, stat.st_mtime):
+            continue
+        try:
+            config = config_from_prefix(prefix)
+            status, _ = read_time_file(os.path.join(directory, filename))
+            metrics = run_metrics(os.path.join(directory, prefix), status)
+            samples = read_samples(os.path.join(directory, prefix))
+        except (ValueError, IndexError) as e:
+            print(f"Skipping {filename}: {e}")
+            continue
+        store(db, directory, prefix, config, status, metrics, "time file", samples)
+        ingested += 1
+    return ingested
+
+# ---------------------------------------------------------------------------
+# Reading back
+
+# SST prints sizes with SI prefixes, and which prefix depends on the size
+SIZE_UNITS = {"B": 1, "kB": 10**3, "KB": 10**3, "MB": 10**6, "GB": 10**9, "TB": 10**12,
+              "KiB": 2**10, "MiB": 2**20, "GiB": 2**30, "TiB": 2**40}
+
+def metric_column(metric, value, unit):
+    # Sizes are exported in bytes so one metric is one column
+    if unit in SIZE_UNITS:
+        return f"{metric} (B)", value * SIZE_UNITS[unit]
+    return (f"{metric} ({unit})" if unit else metric), value
+
+def export_rows(db_path, where=None, include_all=False):
+    # The runs as one dict per run with consolidate.py's column names, then
+    # one column per metric.  Only successful runs unless include_all.
+    db = connect(db_path) if isinstance(db_path, str) else db_path
+    conditions = [] if include_all else ["status = 'ok'"]
+    if where:
+        conditions.append("(%s)" % where)
+    query = "SELECT * FROM runs" + (" WHERE " + " AND ".join(conditions) if conditions else "") + \
+            " ORDER BY directory, prefix"
+    cursor = db.execute(query)
+    names = [description[0] for description in cursor.description]
+    rows = []
+    for values in cursor.fetchall():
+        run = dict(zip(names, values))
+        row = {exported: run[column] for (column, _, exported) in CONFIG_COLUMNS}
+        if run["side_length"] is not None and run["dimensions"] is not None:
+            row["Component Count"] = run["side_length"] ** run["dimensions"]
+        metrics = {metric: (value, unit) for (metric, value, unit) in db.execute(
+            "SELECT metric, value, unit FROM metrics WHERE directory = ? AND prefix = ? ORDER BY metric",
+            (run["directory"], run["prefix"]))}
+        for (metric, legacy) in TIME_FILE_METRICS:
+            if metric in metrics:
+                value, unit = metrics[metric]
+                # The memory columns keep the "18.728 MB" form consolidate.py wrote
+                row[legacy] = value if unit in [None, "s"] else f"{value:g} {unit}"
+        for (metric, (value, unit)) in metrics.items():
+            column, value = metric_column(metric, value, unit)
+            row[column] = value
+        if include_all:
+            row["Status"] = run["status"]
+        row["Prefix"] = run["prefix"]
+        rows.append(row)
+    return rows
+
+def write_csv(rows, outfile):
+    # Runs without some metric (e.g. json input has no builder phases) leave
+    # that column empty
+    columns = []
+    for row in rows:
+        columns += [key for key in row if key not in columns]
+    with open(outfile, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        writer.writeheader()
+        writer.writerows(rows)
+
+def consolidate(outfile, directory=".", where=None):
+    # What the consolidate.py scripts do: bring the database up to date with
+    # a directory's .time files and export that directory's runs.
+    db = connect(os.environ.get("PINGPONG_RESULTS_DB", DEFAULT_DB))
+    ingest(db, directory)
+    condition = "directory = '%s'" % os.path.abspath(directory).replace("'", "''")
+    if where:
+        condition += " AND (%s)" % where
+    rows = export_rows(db, condition)
+    write_csv(rows, outfile)
+    print("Wrote to ", outfile)
+
+# ---------------------------------------------------------------------------
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Record, ingest, and export SST run results.")
+    parser.add_argument("--db", default=os.environ.get("PINGPONG_RESULTS_DB", DEFAULT_DB),
+                        help=f"The results database. Default is $PINGPONG_RESULTS_DB or {DEFAULT_DB}.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ingest_parser = commands.add_parser("ingest", help="Add new and changed .time files to the database.")
+    ingest_parser.add_argument("directories", nargs="*", default=["."], help="Directories to ingest. Default is '.'.")
+
+    export_parser = commands.add_parser("export", help="Write the runs as a CSV file.")
+    export_parser.add_argument("-o", "--output", default="times.csv", help="CSV file to write. Default is times.csv.")
+    export_parser.add_argument("--where", help="SQL condition on the runs table (e.g., \"dimensions = 2 AND pattern = 'random'\").")
+    export_parser.add_argument("--all", action="store_true", help="Include failed and running runs, with a Status column.")
+
+    query_parser = commands.add_parser("query", help="Run an SQL query and print the rows.")
+    query_parser.add_argument("sql")
+
+    progress_parser = commands.add_parser("progress", help="Print the latest sample of each of a run's ranks.")
+    progress_parser.add_argument("prefix", help="The run's file prefix (with its directory).")
+
+    record_parser = commands.add_parser("record", help="Record a run (used by omnidispatch.sh).")
+    record_parser.add_argument("--status", choices=["ok", "failure", "running"], required=True)
+    record_parser.add_argument("--output", help="SST's output, for its timing info.")
+    record_parser.add_argument("--name", help="The experiment name.")
+    record_parser.add_argument("dispatch_args", nargs=argparse.REMAINDER,
+                               help="omnidispatch.sh's arguments, after '--'.")
+    args = parser.parse_args()
+    if args.command == "record":
+        if args.dispatch_args and args.dispatch_args[0] == "--":
+            args.dispatch_args = args.dispatch_args[1:]
+        if len(args.dispatch_args) != 12:
+            parser.error("record needs omnidispatch.sh's 12 arguments")
+    return args
+
+def print_progress(path_prefix):
+    samples = read_samples(path_prefix)
+    if not samples:
+        print(f"No samples for {path_prefix}")
+        return
+    print(f"{'Rank':>5} {'Wall (s)':>9} {'Phase':>7} {'Sim time (ps)':>14} {'Events':>12} {'RSS (MB)':>9}")
+    for rank in sorted(samples):
+        if not samples[rank]:
+            continue
+        (wall_time, sim_cycle, events, rss, phase) = samples[rank][-1]
+        print(f"{rank:>5} {wall_time:>9.1f} {phase:>7} {sim_cycle:>14} {events:>12} {rss / 1e6:>9.1f}")
+
+if __name__ == "__main__":
+    args = parse_arguments()
+    if args.command == "progress":
+        print_progress(args.prefix)
+        sys.exit(0)
+    db = connect(args.db)
+    if args.command == "record":
+        record(db, args.status, args.dispatch_args, args.output, args.name)
+    elif args.command == "ingest":
+        for directory in args.directories:
+            print(f"Ingested {ingest(db, directory)} new or changed .time files from {directory}")
+    elif args.command == "export":
+        rows = export_rows(db, args.where, args.all)
+        write_csv(rows, args.output)
+        print(f"Wrote {len(rows)} runs to {args.output}")
+    elif args.command == "query":
+        cursor = db.execute(args.sql)
+        writer = csv.writer(sys.stdout)
+        if cursor.description:
+            writer.writerow(description[0] for description in cursor.description)
+        writer.writerows(cursor.fetchall())
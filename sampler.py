@@ -0,0 +1,72 @@
+# Memory samples of a rank while its Python builder runs, for the builders'
+# --sample option.
+#
+# SST only constructs the components (and so starts the rank's sampler, see
+# Sampler.h) after the builder has run and the model has been partitioned.  A
+# builder with --sample starts a BuildSampler as soon as it has its arguments,
+# which writes Sampler.h's 40 byte SampleRecords of the rank's RSS to the same
+# <sample>_<rank>.bin, from a daemon thread, every --sampleInterval seconds:
+# in the BUILD phase until the builder calls partition() as its last step,
+# then in the PARTITION phase for as long as SST keeps the Python interpreter
+# alive.  The builder passes the sampler's epoch to the components
+# (sampleEpoch), whose sampler then appends to the file with wall times from
+# the same start; this one stops as soon as it sees that.
+
+import os, struct, threading, time
+
+try:
+  import resource
+except ImportError:
+  resource = None
+
+# Sampler.h's SampleRecord and SamplePhase
+RECORD = struct.Struct("<dQQQI4x")
+BUILD, PARTITION, CONSTRUCT, RUN, FINISH = range(5)
+
+def residentBytes():
+  try:
+    with open("/proc/self/statm") as statm:
+      return int(statm.read().split()[1]) * os.sysconf("SC_PAGESIZE")
+  except (OSError, ValueError, IndexError):
+    # Without /proc, the peak is the best there is
+    if resource is None:
+      return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if os.uname().sysname == "Darwin" else peak * 1024
+
+class BuildSampler:
+  def __init__(self, prefix, interval, rank):
+    self.epoch = time.time()
+    self.interval = interval
+    self.phase = BUILD
+    self.lock = threading.Lock()
+    # Appending, like the components' sampler, so neither overwrites the other
+    path = "%s_%d.bin" % (prefix, rank)
+    open(path, "wb").close()
+    self.file = open(path, "ab", buffering=0)
+    self.written = 0
+    self.sample()
+    threading.Thread(target=self._run, daemon=True).start()
+
+  def sample(self):
+    with self.lock:
+      if self.file is None:
+        return
+      # Anything this sampler didn't write is the components' sampler
+      if os.fstat(self.file.fileno()).st_size != self.written:
+        self.file.close()
+        self.file = None
+        return
+      self.file.write(RECORD.pack(time.time() - self.epoch, 0, 0, residentBytes(), self.phase))
+      self.written += RECORD.size
+
+  def partition(self):
+    # The builder is done; what follows until the components are constructed
+    # is SST partitioning the model.
+    self.phase = PARTITION
+    self.sample()
+
+  def _run(self):
+    while self.file is not None:
+      time.sleep(self.interval)
+      self.sample()
@@ -0,0 +1,249 @@
+# Scaling analysis of a set of runs.
+#
+# Reads consolidate.py's CSV file or the results database (see results.py)
+# and groups the runs into scaling series: runs that differ only in their
+# node count.  The series are keyed by message pattern, input method, ranks
+# per node, threads per rank, edge delay, experiment name, HPCToolkit, and
+# verbosity (runs that differ in any of those aren't comparable), plus the
+# problem: its size for strong
+# scaling, and its size per node for weak scaling (--weak-scaling), where the
+# problem grows with the node count.  Against the smallest node count of each
+# series it computes, for every node count p (relative to that smallest one)
+#
+# - the speedup S: T(1) / T(p) for strong scaling, and the scaled speedup
+#   p T(1) / T(p) for weak scaling,
+# - the parallel efficiency S / p,
+# - and the Karp-Flatt serial fraction (1/S - 1/p) / (1 - 1/p).
+#
+# It fits each series' speedups with Amdahl's law, S = 1 / (s + (1 - s) / p),
+# and with the Universal Scalability Law, S = p / (1 + sigma (p - 1) +
+# kappa p (p - 1)), whose speedup peaks at p = sqrt((1 - sigma) / kappa),
+# and flags the first node count whose efficiency falls below --threshold.
+# Repeated runs of a configuration count with their median time.
+#
+# Usage: python3 scaling.py <times.csv or results.db> [--weak-scaling]
+#            [--time total|build|run] [--threshold 0.5] [-o scaling.csv]
+#            [--plots PREFIX]
+#
+# --plots draws the speedup, efficiency, and Karp-Flatt fraction of every
+# series (with plotnine, as the plots.py scripts do), titled and labeled from
+# the series' configurations.
+
+import argparse
+import csv
+import math
+import statistics
+import sys
+import numpy as np
+
+import results
+
+TIME_COLUMNS = {
+    'build': ['Build Time'],
+    'run': ['Run Time'],
+    'total': ['Build Time', 'Run Time'],
+}
+
+# What identifies a series, besides the problem size
+SERIES_COLUMNS = ['Message Pattern', 'Input Method', 'Tasks Per Node', 'Thread Count', 'Dimensions', 'Step Count',
+                  'Edge Delay', 'Experiment', 'HPCToolkit', 'Verbose']
+
+def read_runs(filename):
+    if filename.endswith('.db'):
+        rows = results.export_rows(filename)
+    else:
+        with open(filename, newline='') as f:
+            rows = list(csv.DictReader(f))
+    return [{key: to_number(value) for (key, value) in row.items()} for row in rows]
+
+def to_number(value):
+    if isinstance(value, str):
+        try:
+            return int(value)
+        except ValueError:
+            try:
+                return float(value)
+            except ValueError:
+                return value if value != '' else None
+    return value
+
+def run_time(run, time_type):
+    return sum(run[column] for column in TIME_COLUMNS[time_type])
+
+def components(run):
+    return run['Side Length'] ** run.get('Dimensions', 2)
+
+def problem(run, weak_scaling):
+    # Components and messages, per node for weak scaling
+    size = (components(run), run.get('Message Count') or 0)
+    if weak_scaling:
+        return tuple(value / run['Node Count'] for value in size)
+    return size
+
+# Weak scaling rounds side lengths, so runs of a series only have about the
+# same problem per node
+WEAK_TOLERANCE = 0.1
+
+def same_problem(a, b, weak_scaling):
+    if not weak_scaling:
+        return a == b
+    return all(abs(x - y) <= WEAK_TOLERANCE * max(y, 1) for (x, y) in zip(a, b))
+
+def describe(key, weak_scaling):
+    config = dict(zip(SERIES_COLUMNS, key))
+    (problem, messages) = key[len(SERIES_COLUMNS):]
+    problem_text = "%s components and %s messages%s" % (
+        f"{problem:g}", f"{messages:g}", " per node" if weak_scaling else "")
+    text = (f"{config['Message Pattern']}, {config['Input Method']} input, "
+            f"{config['Tasks Per Node']} ranks/node x {config['Thread Count']} threads, "
+            f"{config['Dimensions']}D, {problem_text}, {config['Step Count']} steps")
+    if config['Edge Delay'] is not None:
+        text += f", {config['Edge Delay']} ps edge delay"
+    if config['HPCToolkit'] is not None:
+        text += ", HPCToolkit" + (f" {config['HPCToolkit']}" if config['HPCToolkit'] else "")
+    if config['Verbose']:
+        text += ", verbose"
+    if config['Experiment']:
+        text = f"{config['Experiment']}: {text}"
+    return text
+
+def group_series(runs, weak_scaling, time_type):
+    # {series key: [(node count, median time)]} for series with 2+ node
+    # counts.  A series' problem is that of its smallest node count.
+    times = {}
+    for run in sorted(runs, key=lambda run: run['Node Count']):
+        if any(run.get(column) is None for column in TIME_COLUMNS[time_type]):
+            continue
+        config = tuple(run.get(column) for column in SERIES_COLUMNS)
+        run_problem = problem(run, weak_scaling)
+        key = next((key for key in times if key[:-2] == config and same_problem(run_problem, key[-2:], weak_scaling)),
+                   config + run_problem)
+        times.setdefault(key, {}).setdefault(run['Node Count'], []).append(run_time(run, time_type))
+    return {key: sorted((nodes, statistics.median(values)) for (nodes, values) in by_nodes.items())
+            for (key, by_nodes) in times.items() if len(by_nodes) > 1}
+
+def analyze_series(points, weak_scaling):
+    # The speedup, efficiency, and Karp-Flatt fraction of each point.
+    base_nodes, base_time = points[0]
+    rows = []
+    for (nodes, time) in points:
+        p = nodes / base_nodes
+        speedup = (p if weak_scaling else 1.0) * base_time / time
+        karp_flatt = (1 / speedup - 1 / p) / (1 - 1 / p) if p > 1 else None
+        rows.append({'Node Count': nodes, 'p': p, 'Time': time, 'Speedup': speedup,
+                     'Efficiency': speedup / p, 'Karp-Flatt': karp_flatt})
+    return rows
+
+def fit_amdahl(rows):
+    # 1/S - 1/p = s (1 - 1/p): least squares through the origin
+    x = np.array([1 - 1 / row['p'] for row in rows if row['p'] > 1])
+    y = np.array([1 / row['Speedup'] - 1 / row['p'] for row in rows if row['p'] > 1])
+    if len(x) == 0:
+        return None
+    return float(x @ y / (x @ x))
+
+def fit_usl(rows):
+    # p/S - 1 = sigma (p - 1) + kappa p (p - 1): linear least squares, which
+    # needs two points besides the baseline
+    points = [row for row in rows if row['p'] > 1]
+    if len(points) < 2:
+        return None
+    p = np.array([row['p'] for row in points])
+    speedup = np.array([row['Speedup'] for row in points])
+    a = np.column_stack([p - 1, p * (p - 1)])
+    (sigma, kappa), *_ = np.linalg.lstsq(a, p / speedup - 1, rcond=None)
+    peak = math.sqrt((1 - sigma) / kappa) if kappa > 0 and sigma < 1 else None
+    return float(sigma), float(kappa), peak
+
+def analyze(runs, weak_scaling=False, time_type='total', threshold=0.5):
+    # [(series key, rows, summary)] for every series
+    analyses = []
+    for (key, points) in sorted(group_series(runs, weak_scaling, time_type).items(), key=lambda item: str(item[0])):
+        rows = analyze_series(points, weak_scaling)
+        below = [row['Node Count'] for row in rows if row['Efficiency'] < threshold]
+        summary = {
+            'amdahl': fit_amdahl(rows),
+            'usl': fit_usl(rows),
+            'below_threshold': below[0] if below else None,
+        }
+        analyses.append((key, rows, summary))
+    return analyses
+
+def print_analysis(analyses, weak_scaling, threshold):
+    for (key, rows, summary) in analyses:
+        print(describe(key, weak_scaling))
+        print(f"  {'Nodes':>6} {'Time':>10} {'Speedup':>8} {'Effic.':>7} {'Karp-Flatt':>10}")
+        for row in rows:
+            karp_flatt = f"{row['Karp-Flatt']:.4f}" if row['Karp-Flatt'] is not None else '-'
+            print(f"  {row['Node Count']:>6} {row['Time']:>10.3f} {row['Speedup']:>8.2f} {row['Efficiency']:>7.1%} {karp_flatt:>10}")
+        if summary['amdahl'] is not None:
+            print(f"  Amdahl serial fraction: {summary['amdahl']:.4f}")
+        if summary['usl'] is not None:
+            sigma, kappa, peak = summary['usl']
+            peak_text = f", speedup peaks at {peak * rows[0]['Node Count']:.0f} nodes" if peak is not None else ""
+            print(f"  USL: sigma {sigma:.4f}, kappa {kappa:.6f}{peak_text}")
+        if summary['below_threshold'] is not None:
+            print(f"  Efficiency falls below {threshold:.0%} at {summary['below_threshold']} nodes")
+        print()
+
+def write_analysis(analyses, weak_scaling, outfile):
+    with open(outfile, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Series'] + SERIES_COLUMNS + ['Problem', 'Messages', 'Node Count', 'Time', 'Speedup',
+                         'Efficiency', 'Karp-Flatt', 'Amdahl Serial Fraction', 'USL Sigma', 'USL Kappa'])
+        for (key, rows, summary) in analyses:
+            sigma, kappa, _ = summary['usl'] or (None, None, None)
+            for row in rows:
+                writer.writerow([describe(key, weak_scaling)] + list(key) + [
+                    row['Node Count'], row['Time'], row['Speedup'], row['Efficiency'], row['Karp-Flatt'],
+                    summary['amdahl'], sigma, kappa])
+    print("Wrote to ", outfile)
+
+def plot_analysis(analyses, weak_scaling, time_type, output_prefix):
+    from plotnine import ggplot, aes, geom_point, geom_line, geom_abline, ggtitle, labs
+    import pandas as pd
+
+    records = []
+    for (key, rows, summary) in analyses:
+        for row in rows:
+            records.append(dict(row, Series=describe(key, weak_scaling)))
+    data = pd.DataFrame(records)
+    kind = "Weak" if weak_scaling else "Strong"
+    speedup_name = "Scaled Speedup" if weak_scaling else "Speedup"
+    subtitle = f"{time_type.capitalize()} time, relative to each series' smallest node count"
+
+    speedup_plot = ggplot(data, aes(x='p', y='Speedup', color='Series')) + geom_point() + geom_line() \
+        + geom_abline(slope=1, intercept=0, linetype='dashed') \
+        + ggtitle(f"{kind} Scaling {speedup_name}") + labs(subtitle=subtitle, x='Relative Node Count', y=speedup_name)
+    speedup_plot.save(output_prefix + f'_{kind.lower()}_speedup.png')
+
+    efficiency_plot = ggplot(data, aes(x='Node Count', y='Efficiency', color='Series')) + geom_point() + geom_line() \
+        + ggtitle(f"{kind} Scaling Parallel Efficiency") + labs(subtitle=subtitle)
+    efficiency_plot.save(output_prefix + f'_{kind.lower()}_efficiency.png')
+
+    karp_flatt_plot = ggplot(data.dropna(subset=['Karp-Flatt']), aes(x='Node Count', y='Karp-Flatt', color='Series')) \
+        + geom_point() + geom_line() \
+        + ggtitle(f"{kind} Scaling Karp-Flatt Serial Fraction") + labs(subtitle=subtitle)
+    karp_flatt_plot.save(output_prefix + f'_{kind.lower()}_karp_flatt.png')
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Speedup, efficiency, and scaling model fits of a set of runs.")
+    parser.add_argument("filename", help="consolidate.py's CSV file or the results database (.db).")
+    parser.add_argument("--weak-scaling", action="store_true", help="The problem grows with the node count.")
+    parser.add_argument("--time", choices=sorted(TIME_COLUMNS), default='total',
+                        help="Which time to analyze. Default is the total (build + run) time.")
+    parser.add_argument("--threshold", type=float, default=0.5,
+                        help="Efficiency below which to flag a node count. Default is 0.5.")
+    parser.add_argument("-o", "--output", help="Also write every series' points and fits to this CSV file.")
+    parser.add_argument("--plots", metavar="PREFIX", help="Also draw the speedups, efficiencies, and Karp-Flatt fractions to PREFIX_*.png.")
+    args = parser.parse_args()
+
+    analyses = analyze(read_runs(args.filename), args.weak_scaling, args.time, args.threshold)
+    if not analyses:
+        print("No series with more than one node count")
+        sys.exit(1)
+    print_analysis(analyses, args.weak_scaling, args.threshold)
+    if args.output:
+        write_analysis(analyses, args.weak_scaling, args.output)
+    if args.plots:
+        plot_analysis(analyses, args.weak_scaling, args.time, args.plots)
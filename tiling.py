@@ -0,0 +1,61 @@
+# Grouping the ping pong grid into tiles for pingpong.tilePonger.
+#
+# With --tileSize b the builders cover the M x N grid of pongers with b x b
+# tiles (b x 1 in 1D), the tiles on the south and east edges being cut short
+# when b doesn't divide the grid.  Tile (ti, tj) holds the pongers in rows
+# [ti*b, ti*b + b) and columns [tj*b, tj*b + b).  Within a tile pongers are
+# numbered row by row.
+
+import numpy as np
+
+def tileGrid(N, M, numDims, tileSize):
+  # Number of rows and columns of tiles.
+  rows = -(-M // tileSize)
+  cols = 1 if numDims == 1 else -(-N // tileSize)
+  return rows, cols
+
+def tileExtent(ti, tj, N, M, numDims, tileSize):
+  # (firstRow, firstCol, rows, cols) of the pongers in tile (ti, tj).
+  firstRow, firstCol = ti * tileSize, tj * tileSize
+  rows = min(tileSize, M - firstRow)
+  cols = 1 if numDims == 1 else min(tileSize, N - firstCol)
+  return firstRow, firstCol, rows, cols
+
+def tilePongerIds(tileRows, tileCols, N, M, numDims, tileSize):
+  # Sorted global ids of the pongers in the tiles (tileRows[k], tileCols[k]).
+  rowOffsets = np.arange(tileSize, dtype=np.int64)
+  colOffsets = np.arange(1 if numDims == 1 else tileSize, dtype=np.int64)
+  rows = tileRows[:,None,None] * tileSize + rowOffsets[None,:,None]
+  cols = tileCols[:,None,None] * tileSize + colOffsets[None,None,:]
+  rows, cols = np.broadcast_arrays(rows, cols)
+  inGrid = (rows < M) & (cols < (1 if numDims == 1 else N))
+  return np.sort(rows[inGrid] * N + cols[inGrid])
+
+def tileBalls(ids, counts, N, M, numDims, tileSize):
+  # Regroups the per-ponger ball counts from placement.placeBalls by tile.
+  # Returns {(ti, tj): [ponger, direction, count, ...]} for the tiles that
+  # have any balls, ready to pass as a tile ponger's "balls" parameter.
+  pos, dirs = np.nonzero(counts)
+  rows, cols = np.divmod(ids[pos], N)
+  ti, tj = rows // tileSize, cols // tileSize
+  widths = 1 if numDims == 1 else np.minimum(tileSize, N - tj * tileSize)
+  local = (rows % tileSize) * widths + cols % tileSize
+  balls = {}
+  for key, triple in zip(zip(ti.tolist(), tj.tolist()),
+                         zip(local.tolist(), dirs.tolist(), counts[pos, dirs].tolist())):
+    balls.setdefault(key, []).extend(triple)
+  return balls
+
+def tileParams(ti, tj, N, M, numDims, tileSize, edgeDelay, balls=None):
+  firstRow, firstCol, rows, cols = tileExtent(ti, tj, N, M, numDims, tileSize)
+  params = {
+    "gridRows":  M,
+    "gridCols":  1 if numDims == 1 else N,
+    "firstRow":  firstRow,
+    "firstCol":  firstCol,
+    "rows":      rows,
+    "cols":      cols,
+    "edgeDelay": edgeDelay}
+  if balls:
+    params["balls"] = "[%s]" % ", ".join(map(str, balls))
+  return params
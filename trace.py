@@ -0,0 +1,145 @@
+# Reads the binary traces written by runs with --trace (see Trace.h).
+#
+# A run writes one file per rank, <trace>_<rank>.bin, of fixed-size records:
+# the simulated time a ball was sent, the sending component's id, the ball's
+# id, the number of balls in the event, and the ports the ball arrived on and
+# left by.  The files are mapped with numpy.memmap rather than read in, and
+# summary() and traffic() go through them a rank and a chunk at a time, so
+# traces larger than memory can still be summarized; only trajectory() puts
+# records in time order, and only the one ball's.
+#
+# Usage: python trace.py <trace> [--ball ID] [--top N]
+#   prints the number of sends, the busiest links (component, out port), and
+#   with --ball the trajectory of one ball.
+
+import argparse
+import glob
+import os
+import re
+import numpy as np
+
+RECORD = np.dtype([
+    ('time', '<u8'),
+    ('component', '<u8'),
+    ('ball', '<i8'),
+    ('count', '<i4'),
+    ('in_port', '<i2'),
+    ('out_port', '<i2'),
+])
+assert RECORD.itemsize == 32
+
+PORT_NAMES = {-1: '-', 0: 'north', 1: 'south', 2: 'west', 3: 'east'}
+
+def trace_files(prefix):
+    # {rank: filename} for the files written under 'prefix'.
+    files = {}
+    for filename in glob.glob(glob.escape(prefix) + '_*.bin'):
+        match = re.search(r'_(\d+)\.bin$', filename)
+        if match:
+            files[int(match.group(1))] = filename
+    return files
+
+# Records summarized at a time: 128 MB
+CHUNK = 1 << 22
+
+def read_rank(filename):
+    # The records of one rank, memory mapped (and not in time order).
+    return np.memmap(filename, dtype=RECORD, mode='r')
+
+def rank_files(prefix):
+    # [(rank, filename)] of the trace's files, or FileNotFoundError.
+    files = trace_files(prefix)
+    if not files:
+        raise FileNotFoundError("No trace files %s_<rank>.bin" % prefix)
+    return sorted(files.items())
+
+def chunks(prefix):
+    # (rank, records) for up to CHUNK records at a time of every rank, in no
+    # particular time order.
+    for (rank, filename) in rank_files(prefix):
+        if os.path.getsize(filename) == 0:
+            continue
+        records = read_rank(filename)
+        for start in range(0, len(records), CHUNK):
+            yield rank, records[start:start + CHUNK]
+
+def summary(prefix):
+    # (sends, balls sent, ranks with a send, first send time, last send time)
+    sends, balls, first, last = 0, 0, None, None
+    ranks = set()
+    for (rank, records) in chunks(prefix):
+        sends += len(records)
+        balls += int(records['count'].sum())
+        ranks.add(rank)
+        times = records['time']
+        first = int(times.min()) if first is None else min(first, int(times.min()))
+        last = int(times.max()) if last is None else max(last, int(times.max()))
+    return sends, balls, len(ranks), first, last
+
+def read_trace(prefix):
+    # The records of every rank in time order, with the rank of each.  This
+    # reads the whole trace into memory (a few copies of it); summary(),
+    # traffic(), and trajectory() don't.
+    files = rank_files(prefix)
+    parts = [read_rank(filename) for (_, filename) in files]
+    records = np.concatenate(parts)
+    record_ranks = np.repeat(np.array([rank for (rank, _) in files], dtype=np.int32), [len(part) for part in parts])
+    order = np.argsort(records['time'], kind='stable')
+    return records[order], record_ranks[order]
+
+def trajectory(prefix, ball):
+    # The sends of one ball, in time order.  Aggregated events are found by
+    # their first ball's id.
+    found = [records[records['ball'] == ball] for (_, records) in chunks(prefix)]
+    sends = np.concatenate(found) if found else np.zeros(0, dtype=RECORD)
+    return sends[np.argsort(sends['time'], kind='stable')]
+
+def traffic(prefix):
+    # Balls sent over each link, identified by the sending component and its
+    # out port: returns the sorted component ids and a matrix with a row per
+    # component and a column per port.
+    components = np.zeros(0, dtype=np.uint64)
+    matrix = np.zeros((0, 1), dtype=np.int64)
+    for (_, records) in chunks(prefix):
+        chunk_components, rows = np.unique(records['component'], return_inverse=True)
+        ports = int(records['out_port'].max()) + 1
+        chunk_matrix = np.bincount(rows * ports + records['out_port'], weights=records['count'],
+                                   minlength=len(chunk_components) * ports)
+        chunk_matrix = chunk_matrix.astype(np.int64).reshape(len(chunk_components), ports)
+
+        merged = np.union1d(components, chunk_components)
+        total = np.zeros((len(merged), max(matrix.shape[1], ports)), dtype=np.int64)
+        total[np.searchsorted(merged, components), :matrix.shape[1]] += matrix
+        total[np.searchsorted(merged, chunk_components), :ports] += chunk_matrix
+        components, matrix = merged, total
+    return components, matrix
+
+def port_name(port):
+    return PORT_NAMES.get(port, 'port_%d' % (port - 4))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Summarize a binary ping pong trace')
+    parser.add_argument('trace', help='trace file prefix, as passed to --trace')
+    parser.add_argument('--ball', type=int, default=None, help='print this ball\'s trajectory')
+    parser.add_argument('--top', type=int, default=10, help='number of busiest links to print')
+    args = parser.parse_args()
+
+    (sends, balls, ranks, first, last) = summary(args.trace)
+    if sends == 0:
+        print('No sends in %s' % args.trace)
+        raise SystemExit
+    print('%d sends of %d balls on %d ranks, from t=%d to t=%d' % (sends, balls, ranks, first, last))
+
+    components, matrix = traffic(args.trace)
+    busiest = np.argsort(matrix, axis=None)[::-1][:args.top]
+    print('Busiest links (component, out port, balls):')
+    for row, port in zip(*np.unravel_index(busiest, matrix.shape)):
+        if matrix[row, port] == 0:
+            break
+        print('  %20d %-8s %12d' % (components[row], port_name(port), matrix[row, port]))
+
+    if args.ball is not None:
+        print('Ball %d (time, component, in port, out port):' % args.ball)
+        for record in trajectory(args.trace, args.ball):
+            print('  %12d %20d %-8s %-8s' % (record['time'], record['component'],
+                                             port_name(record['in_port']), port_name(record['out_port'])))
@@ -1,17 +1,23 @@
 from plotnine import *
 import humanfriendly
 
+import os
 import pandas as pd
 import sys
 import itertools
 #Check if the correct number of arguments are passed
 if len(sys.argv) != 3:
-    print("Usage: python3 plot.py <filename> <output prefix>")
+    print("Usage: python3 plot.py <filename (.csv or .db)> <output prefix>")
     sys.exit(1)
 
-# Load the data
+# Load the data, from consolidate.py's CSV file or the results database
 filename = sys.argv[1]
-unmelted_data = pd.read_csv(filename)
+if filename.endswith('.db'):
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.realpath(__file__)), '..'))
+    import results
+    unmelted_data = pd.DataFrame(results.export_rows(filename))
+else:
+    unmelted_data = pd.read_csv(filename)
 
 output_prefix = sys.argv[2]
 